@@ -17,6 +17,10 @@ r.get('/leagues', async (_req, res, next) => {
   } catch (e) { next(e); }
 });
 
+// Latest-snapshot reads go to current_player_market / current_player_value:
+// the ETL (and points_model.py) materialize each league's latest snapshot of
+// v_player_market / v_player_value there, so no MAX(snapshot_date) rescans.
+
 // League diagnostics: each team's total value, within-league percentile + rank,
 // and HHI concentration. NOTE the 1.0* float casts — without them SQLite
 // integer-divides the value shares to zero and HHI silently breaks.
@@ -25,9 +29,8 @@ r.get('/leagues/:id/diagnostics', async (req, res, next) => {
     const sql = `
       WITH rp AS (
         SELECT league_id, roster_id, fp_market_value AS v
-        FROM v_player_market
-        WHERE snapshot_date = (SELECT MAX(snapshot_date) FROM v_player_market)
-          AND league_id = ?
+        FROM current_player_market
+        WHERE league_id = ?
           AND fp_market_value IS NOT NULL
       ),
       rt AS (
@@ -62,9 +65,8 @@ r.get('/leagues/:id/arbitrage', async (req, res, next) => {
     const sql = `
       SELECT player_name, position, fp_market_value, fc_market_value,
              arb_delta_fp_minus_fc
-      FROM v_player_market
-      WHERE snapshot_date = (SELECT MAX(snapshot_date) FROM v_player_market)
-        AND league_id = ?
+      FROM current_player_market
+      WHERE league_id = ?
         AND fp_market_value IS NOT NULL AND fc_market_value IS NOT NULL
       ORDER BY ABS(arb_delta_fp_minus_fc) DESC
       LIMIT 25
@@ -93,13 +95,10 @@ r.get('/leagues/:leagueId/value', async (req, res) => {
             v.fp_market_value, v.fc_market_value, v.vbd_value,
             v.ppg, v.vorp,
             d.years_exp
-     FROM v_player_value v
+     FROM current_player_value v
      LEFT JOIN dim_players d ON d.player_id = v.player_id
-     WHERE v.league_id = ?
-       AND v.snapshot_date = (
-         SELECT MAX(snapshot_date) FROM v_player_value WHERE league_id = ?
-       )`,
-    [lid, lid]
+     WHERE v.league_id = ?`,
+    [lid]
   );
   res.json(rows);
 });
@@ -118,20 +117,17 @@ r.get('/leagues/:id/rosters/:rosterId', async (req, res, next) => {
     SELECT m.player_name, m.position, m.age, m.nfl_team,
            m.fp_market_value, m.fc_market_value, m.fp_ecr_2qb, m.fc_trend_30day,
            m.arb_delta_fp_minus_fc, pv.ppg, pv.vbd_value
-    FROM v_player_market m
-    LEFT JOIN player_production_value pv
-      ON pv.league_id = m.league_id AND pv.player_id = m.player_id
-     AND pv.season = (SELECT MAX(season) FROM player_production_value)
-    WHERE m.snapshot_date = (SELECT MAX(snapshot_date) FROM v_player_market)
-      AND m.league_id = ? AND m.roster_id = ?
+    FROM current_player_market m
+    LEFT JOIN current_player_value pv
+      ON pv.league_id = m.league_id AND pv.roster_id = m.roster_id AND pv.player_id = m.player_id
+    WHERE m.league_id = ? AND m.roster_id = ?
     ORDER BY (m.fp_market_value IS NULL), m.fp_market_value DESC`;
   const base = `
     SELECT player_name, position, age, nfl_team,
            fp_market_value, fc_market_value, fp_ecr_2qb, fc_trend_30day,
            arb_delta_fp_minus_fc
-    FROM v_player_market
-    WHERE snapshot_date = (SELECT MAX(snapshot_date) FROM v_player_market)
-      AND league_id = ? AND roster_id = ?
+    FROM current_player_market
+    WHERE league_id = ? AND roster_id = ?
     ORDER BY (fp_market_value IS NULL), fp_market_value DESC`;
   try {
     res.json(await query(enriched, params));
@@ -152,7 +148,7 @@ r.get('/leagues/:id/rosters/:rosterId', async (req, res, next) => {
 // ─────────────────────────────────────────────────────────────────────────────
  
 // Per-roster production. Two bases, same response shape:
-//   default            -> realized REG-only VBD (v_player_value)
+//   default            -> realized REG-only VBD (current_player_value)
 //   ?basis=projected   -> m1-projected VBD (player_projected_value).
 //      LABEL THAT TRAVELS WITH IT: at preseason as-ofs the projection is
 //      statistically indistinguishable from the flat-ECR baseline (Model Lab,
@@ -184,14 +180,11 @@ r.get('/leagues/:leagueId/production', async (req, res) => {
     `SELECT v.roster_id${byPos ? ', v.position' : ''},
             SUM(v.vbd_value)       AS production_vbd,
             SUM(v.fp_market_value) AS team_value
-     FROM v_player_value v
+     FROM current_player_value v
      WHERE v.league_id = ?
-       AND v.snapshot_date = (
-         SELECT MAX(snapshot_date) FROM v_player_value WHERE league_id = ?
-       )
      GROUP BY v.roster_id${byPos ? ', v.position' : ''}
      ORDER BY v.roster_id`,
-    [lid, lid]
+    [lid]
   );
   res.json(rows);
 });
@@ -42,6 +42,8 @@ import pandas as pd
 
 import build_features as _bf
 from build_features import build_features, visible_weeks
+from pipeline_metrics import instrumented, stage
+from stage_profiler import profiled
 
 if getattr(_bf, "SCHEMA_VERSION", 1) < 2:
     sys.exit(
@@ -124,6 +126,7 @@ def features_with_rank(con, as_of: str, season: int) -> pd.DataFrame:
 # B1 curve
 # ---------------------------------------------------------------------------
 
+@profiled
 def train_b1_curve(con, train_seasons: list[int], league_id: str,
                    cache: dict) -> pd.DataFrame:
     """(position, pos_rank) -> expected per-remaining-week total rate and
@@ -188,6 +191,7 @@ def log_predictions(con, model_id: str, as_of: str, df: pd.DataFrame) -> None:
                     rows)
 
 
+@instrumented("backtest_baselines")
 def main() -> int:
     ap = argparse.ArgumentParser()
     ap.add_argument("--db", default="data/dynasty.db")
@@ -210,60 +214,61 @@ def main() -> int:
     eval_rows, pooled = [], []
 
     for S in TEST_SEASONS:
-        train = [s for s in range(2019, S)]
-        curve = train_b1_curve(con, train, league_id, cache)
-        con.execute("INSERT OR REPLACE INTO model_runs "
-                    "(model_id, train_window, grid) VALUES (?,?,?)",
-                    ("b1_ecr_v1", f"seasons<{S}", str(GRID_WEEKS)))
-        con.execute("INSERT OR REPLACE INTO model_runs "
-                    "(model_id, train_window, grid) VALUES (?,?,?)",
-                    ("b0_lastseason", f"seasons<{S}", str(GRID_WEEKS)))
-
-        season_frames = []
-        for ao in as_of_grid(con, S):
-            f = cache.setdefault((S, ao), features_with_rank(con, ao, S))
-            b1 = b1_predict(f, curve).assign(model="b1_ecr_v1")
-            b0 = f[f.ppg_prev_season.notna()][
-                ["sleeper_id", "ppg_prev_season", "weeks_remaining"]].copy()
-            b0["yhat_total"] = b0.ppg_prev_season * b0.weeks_remaining
-            b0["yhat_ppg"] = b0.ppg_prev_season
-            b0 = b0[["sleeper_id", "yhat_total", "yhat_ppg"]].assign(
-                model="b0_lastseason")
-            log_predictions(con, "b1_ecr_v1", ao, b1)
-            log_predictions(con, "b0_lastseason", ao, b0)
-
-            r = realized(con, ao, S, league_id)
-            f_meta = f[["sleeper_id", "position"]]
-            both = (b1.merge(b0, on="sleeper_id",
-                             suffixes=("_b1", "_b0"))   # common support
-                      .merge(f_meta, on="sleeper_id")
-                      .merge(r, on="sleeper_id", how="left"))
-            both["real_total"] = both.real_total.fillna(0.0)
-            both["as_of"] = ao
-            season_frames.append(both)
-            cov_b1 = len(b1)
-            cov_b0 = len(b0)
-        sf = pd.concat(season_frames, ignore_index=True)
-        sf["ae_b1"] = (sf.yhat_total_b1 - sf.real_total).abs()
-        sf["ae_b0"] = (sf.yhat_total_b0 - sf.real_total).abs()
-        pooled.append(sf)
-
-        for pos, g in sf.groupby("position"):
-            mae1, mae0 = g.ae_b1.mean(), g.ae_b0.mean()
-            sp1 = g[["yhat_total_b1", "real_total"]].corr(
-                method="spearman").iloc[0, 1]
-            sp0 = g[["yhat_total_b0", "real_total"]].corr(
-                method="spearman").iloc[0, 1]
-            skill = 1 - mae1 / mae0
-            for mid, mae, sp in (("b1_ecr_v1", mae1, sp1),
-                                 ("b0_lastseason", mae0, sp0)):
-                eval_rows += [
-                    (mid, S, "ros", pos, "mae_total", float(mae), len(g)),
-                    (mid, S, "ros", pos, "spearman_total", float(sp), len(g))]
-            eval_rows.append(("b1_ecr_v1", S, "ros", pos, "skill_vs_b0",
-                              float(skill), len(g)))
-        print(f"{S}: common-support n/as_of≈{len(sf)//len(as_of_grid(con,S))}, "
-              f"B1-only coverage (rookies etc.) ≈{cov_b1 - len(sf)//len(as_of_grid(con,S))}/as_of")
+        with stage(f"season_{S}", con=con):
+            train = [s for s in range(2019, S)]
+            curve = train_b1_curve(con, train, league_id, cache)
+            con.execute("INSERT OR REPLACE INTO model_runs "
+                        "(model_id, train_window, grid) VALUES (?,?,?)",
+                        ("b1_ecr_v1", f"seasons<{S}", str(GRID_WEEKS)))
+            con.execute("INSERT OR REPLACE INTO model_runs "
+                        "(model_id, train_window, grid) VALUES (?,?,?)",
+                        ("b0_lastseason", f"seasons<{S}", str(GRID_WEEKS)))
+
+            season_frames = []
+            for ao in as_of_grid(con, S):
+                f = cache.setdefault((S, ao), features_with_rank(con, ao, S))
+                b1 = b1_predict(f, curve).assign(model="b1_ecr_v1")
+                b0 = f[f.ppg_prev_season.notna()][
+                    ["sleeper_id", "ppg_prev_season", "weeks_remaining"]].copy()
+                b0["yhat_total"] = b0.ppg_prev_season * b0.weeks_remaining
+                b0["yhat_ppg"] = b0.ppg_prev_season
+                b0 = b0[["sleeper_id", "yhat_total", "yhat_ppg"]].assign(
+                    model="b0_lastseason")
+                log_predictions(con, "b1_ecr_v1", ao, b1)
+                log_predictions(con, "b0_lastseason", ao, b0)
+
+                r = realized(con, ao, S, league_id)
+                f_meta = f[["sleeper_id", "position"]]
+                both = (b1.merge(b0, on="sleeper_id",
+                                 suffixes=("_b1", "_b0"))   # common support
+                          .merge(f_meta, on="sleeper_id")
+                          .merge(r, on="sleeper_id", how="left"))
+                both["real_total"] = both.real_total.fillna(0.0)
+                both["as_of"] = ao
+                season_frames.append(both)
+                cov_b1 = len(b1)
+                cov_b0 = len(b0)
+            sf = pd.concat(season_frames, ignore_index=True)
+            sf["ae_b1"] = (sf.yhat_total_b1 - sf.real_total).abs()
+            sf["ae_b0"] = (sf.yhat_total_b0 - sf.real_total).abs()
+            pooled.append(sf)
+
+            for pos, g in sf.groupby("position"):
+                mae1, mae0 = g.ae_b1.mean(), g.ae_b0.mean()
+                sp1 = g[["yhat_total_b1", "real_total"]].corr(
+                    method="spearman").iloc[0, 1]
+                sp0 = g[["yhat_total_b0", "real_total"]].corr(
+                    method="spearman").iloc[0, 1]
+                skill = 1 - mae1 / mae0
+                for mid, mae, sp in (("b1_ecr_v1", mae1, sp1),
+                                     ("b0_lastseason", mae0, sp0)):
+                    eval_rows += [
+                        (mid, S, "ros", pos, "mae_total", float(mae), len(g)),
+                        (mid, S, "ros", pos, "spearman_total", float(sp), len(g))]
+                eval_rows.append(("b1_ecr_v1", S, "ros", pos, "skill_vs_b0",
+                                  float(skill), len(g)))
+            print(f"{S}: common-support n/as_of≈{len(sf)//len(as_of_grid(con,S))}, "
+                  f"B1-only coverage (rookies etc.) ≈{cov_b1 - len(sf)//len(as_of_grid(con,S))}/as_of")
 
     con.executemany("INSERT OR REPLACE INTO evaluations VALUES (?,?,?,?,?,?,?)",
                     eval_rows)
@@ -290,10 +295,11 @@ def main() -> int:
                  for pid, g in allf.groupby("sleeper_id")}
     pids = list(by_player)
     skills = []
-    for _ in range(1000):
-        take = rng.choice(len(pids), size=len(pids), replace=True)
-        arr = np.concatenate([by_player[pids[i]] for i in take])
-        skills.append(1 - arr[:, 0].mean() / arr[:, 1].mean())
+    with stage("bootstrap"):
+        for _ in range(1000):
+            take = rng.choice(len(pids), size=len(pids), replace=True)
+            arr = np.concatenate([by_player[pids[i]] for i in take])
+            skills.append(1 - arr[:, 0].mean() / arr[:, 1].mean())
     lo, hi = np.percentile(skills, [2.5, 97.5])
     print(f"player-block bootstrap 95% CI on pooled skill: "
           f"[{lo:.3f}, {hi:.3f}]")
@@ -0,0 +1,610 @@
+"""
+bench_etl.py — offline, repeatable end-to-end benchmark of the pipeline.
+
+WHY: etl_pipeline.py, pick_values_etl.py and outcomes_etl.py all run against
+live Sleeper / FantasyCalc / GitHub / nflverse responses, so two timings are
+never of the same workload and a "speedup" can just be a quiet API afternoon.
+This records one live run to a cassette (http_client's record mode) and then
+replays it as often as needed, with a fixed injected latency standing in for
+the network. Same bytes in, every time.
+
+Each stage runs in its own subprocess against a scratch DATA_DIR, so peak RSS
+is per stage, the response cache/player store/rate-limit state start cold,
+and nothing touches the real warehouse. Per stage it reports:
+  wall_s       elapsed time for the whole script
+  requests     GETs issued (http_client.request_count(); retries included)
+  peak_rss_mb  the subprocess's max resident set (psutil fallback off-POSIX)
+
+Stages run in pipeline order (later ones read what earlier ones loaded):
+  etl          etl_pipeline.py
+  pick_values  pick_values_etl.py
+  outcomes     outcomes_etl.py (needs id_crosswalk: seed with --from-db)
+
+Usage:
+    # once, live — writes the cassette
+    python bench_etl.py --record --cassette data/cassettes
+    # any number of times, offline
+    python bench_etl.py --cassette data/cassettes --latency-ms 40 --runs 2 \\
+        --from-db data/dynasty.db --json bench.json
+--runs N repeats the stage sequence in the same scratch dir: run 1 is cold,
+later runs show the warm (cached / frozen-history) path.
+
+Transform micro-benchmark (no cassette needed):
+    python bench_etl.py --fact-scaling 4 16 64 256
+builds the roster value fact for N synthetic 12-team leagues with the
+columnar etl_pipeline.build_fact and with the original per-row loop (kept
+here as the reference), checks both give the same rows, and prints rows/s.
+
+Warehouse write micro-benchmark (no cassette needed):
+    python bench_etl.py --upsert-scaling 1000 10000 100000
+upserts N roster value fact rows into a fresh SQLite warehouse twice (insert, then update
+of the same keys) through the portable staging-table path and through the
+SQLite executemany fast path, checks the resulting tables match, and prints
+rows/s for each.
+
+Warehouse scale suite (no cassette needed):
+    python bench_etl.py --warehouse-scaling xs s m --json scale.json
+builds each synth_warehouse.SCALES preset in a scratch dir, then runs the
+downstream scripts against it in build order, one subprocess each:
+  backtest     backtest_baselines.py
+  projection   projection_model.py
+  project      project_production.py (as of the preset's end date)
+  cornering    cornering_metrics.py
+  lineup       lineup_solver.py
+Each stage reports wall_s / peak_rss_mb like the replay stages, plus the
+script's own pipeline_metrics stages. Then every Analytics.js query
+(ANALYTICS_QUERIES) and warehouse_keys.BENCH_QUERIES is timed, best of
+--repeats, for the largest league. The JSON carries the preset's sizes,
+table row counts, git revision and SQLite version, so reports from
+different days line up.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import runpy
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+
+STAGES = {
+    "etl": "etl_pipeline.py",
+    "pick_values": "pick_values_etl.py",
+    "outcomes": "outcomes_etl.py",
+}
+
+# Downstream of a (synthetic) warehouse, in build order.
+WAREHOUSE_STAGES = {
+    "backtest": "backtest_baselines.py",
+    "projection": "projection_model.py",
+    "project": "project_production.py",
+    "cornering": "cornering_metrics.py",
+    "lineup": "lineup_solver.py",
+}
+SCRIPTS = {**STAGES, **WAREHOUSE_STAGES, "synth": "synth_warehouse.py"}
+
+
+def _peak_rss_mb() -> float | None:
+    try:
+        import resource
+    except ImportError:  # Windows
+        try:
+            import psutil
+        except ImportError:
+            return None
+        mi = psutil.Process().memory_info()
+        return getattr(mi, "peak_wset", mi.rss) / 1e6
+    kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return kb / 1e6 if sys.platform == "darwin" else kb / 1e3   # darwin reports bytes
+
+
+def run_child(stage: str, out: Path) -> int:
+    """Inside the stage subprocess: run the script as __main__, then write
+    the measurements for the parent."""
+    sys.path.insert(0, str(HERE))
+    import http_client
+
+    sys.argv = [SCRIPTS[stage], *json.loads(os.environ.get("BENCH_STAGE_ARGS", "[]"))]
+    status = "ok"
+    t0 = time.perf_counter()
+    try:
+        runpy.run_path(str(HERE / SCRIPTS[stage]), run_name="__main__")
+    except SystemExit as exc:
+        if exc.code not in (None, 0):
+            status = f"exit {exc.code}"
+    except Exception as exc:  # report the failure, keep benchmarking the rest
+        status = f"{type(exc).__name__}: {exc}"
+    out.write_text(json.dumps({
+        "stage": stage,
+        "status": status,
+        "wall_s": round(time.perf_counter() - t0, 3),
+        "requests": http_client.request_count(),
+        "peak_rss_mb": _peak_rss_mb(),
+    }))
+    return 0
+
+
+def spawn(stage: str, args: list[str], env: dict, work: Path, log_path: Path,
+          timeout: float | None = None) -> dict:
+    """Run one stage in a fresh subprocess (run_child) and return its
+    measurements; output goes to log_path."""
+    out = work / f"_bench_{stage}.json"
+    out.unlink(missing_ok=True)
+    status = None
+    with log_path.open("w", encoding="utf-8") as logf:
+        try:
+            subprocess.run(
+                [sys.executable, str(Path(__file__).resolve()),
+                 "--child", stage, "--child-out", str(out)],
+                env={**env, "BENCH_STAGE_ARGS": json.dumps(args)}, cwd=HERE,
+                stdout=logf, stderr=subprocess.STDOUT, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            status = f"timeout after {timeout:g}s"
+    try:
+        return json.loads(out.read_text())
+    except (OSError, ValueError):
+        return {"stage": stage, "status": status or "crashed", "wall_s": None,
+                "requests": None, "peak_rss_mb": None}
+
+
+def stage_args(stage: str, db: Path, seasons: list[int] | None) -> list[str]:
+    if stage == "etl":
+        return []
+    args = ["--db", str(db)]
+    if stage == "outcomes" and seasons:
+        args += ["--seasons", str(seasons[0]), str(seasons[1])]
+    return args
+
+
+# --------------------------------------------------------------------------- #
+# Roster value fact: columnar vs per-row reference
+# --------------------------------------------------------------------------- #
+
+def _fact_reference(rosters_by_league: dict, mv: dict, snapshot_date) -> "pd.DataFrame":
+    """The pre-vectorization build_frames loop, verbatim in behaviour."""
+    import pandas as pd
+
+    def val(row, col):
+        if not row:
+            return None
+        v = row.get(col)
+        return None if v is None or pd.isna(v) else v
+
+    rows = []
+    for lg, rs in rosters_by_league.items():
+        for r in rs:
+            for pid in (r.get("players") or []):
+                row = mv.get(str(pid))
+                rows.append({"snapshot_date": snapshot_date, "league_id": lg,
+                             "roster_id": r["roster_id"], "player_id": str(pid),
+                             "fp_value_1qb": val(row, "fp_value_1qb"),
+                             "fp_value_2qb": val(row, "fp_value_2qb"),
+                             "fp_ecr_2qb": val(row, "fp_ecr_2qb"),
+                             "fc_value_1qb": val(row, "fc_value_1qb"),
+                             "fc_value_2qb": val(row, "fc_value_2qb"),
+                             "sleeper_adp_value": val(row, "fc_adp"),
+                             "fc_trend_30day": val(row, "fc_trend_30day")})
+    return pd.DataFrame(rows)
+
+
+def fact_scaling(league_counts: list[int], repeats: int = 3) -> list[dict]:
+    import numpy as np
+    import pandas as pd
+    import etl_pipeline as etl
+
+    rng = np.random.default_rng(7)
+    n_players = 3000
+    ids = np.arange(1, n_players + 1).astype(str)
+    market = pd.DataFrame({"sleeper_id": ids[: int(n_players * 0.8)]})   # 20% unvalued
+    for col in ("fp_value_1qb", "fp_value_2qb", "fp_ecr_2qb", "fc_value_1qb", "fc_value_2qb",
+                "fc_adp", "fc_trend_30day"):
+        v = rng.integers(0, 10000, len(market)).astype(float)
+        v[rng.random(len(market)) < 0.1] = np.nan
+        market[col] = v
+    mv_frame = etl.market_index(market)
+    mv_dict = mv_frame.to_dict("index")
+
+    out = []
+    for n in league_counts:
+        rosters = {f"L{lg}": [{"roster_id": r, "players": list(rng.choice(ids, 25, replace=False))}
+                              for r in range(1, 13)] for lg in range(n)}
+        timings = {}
+        for name, fn in (("columnar", lambda: etl.build_fact(rosters, mv_frame)),
+                         ("per_row", lambda: _fact_reference(rosters, mv_dict, etl.SNAPSHOT_DATE))):
+            best = float("inf")
+            for _ in range(repeats):
+                t0 = time.perf_counter()
+                df = fn()
+                best = min(best, time.perf_counter() - t0)
+            timings[name] = (best, df)
+        a, b = timings["columnar"][1], timings["per_row"][1]
+        same = a.astype(object).where(a.notna(), None).equals(b.astype(object).where(b.notna(), None))
+        rows = len(a)
+        r = {"leagues": n, "rows": rows, "identical": same,
+             "columnar_rows_per_s": round(rows / timings["columnar"][0]),
+             "per_row_rows_per_s": round(rows / timings["per_row"][0])}
+        out.append(r)
+        print(f"  {n:>5} leagues  {rows:>8} rows  columnar {r['columnar_rows_per_s']:>10,} rows/s  "
+              f"per-row {r['per_row_rows_per_s']:>9,} rows/s  x{timings['per_row'][0] / timings['columnar'][0]:.1f}"
+              f"  identical={same}")
+    return out
+
+
+# --------------------------------------------------------------------------- #
+# Warehouse upsert: portable staging path vs SQLite executemany fast path
+# --------------------------------------------------------------------------- #
+
+def _fact_frame(n: int, rng, bump: float = 0.0) -> "pd.DataFrame":
+    import numpy as np
+    import pandas as pd
+    import etl_pipeline as etl
+
+    leagues = max(1, n // 300)
+    df = pd.DataFrame({
+        "league_id": (np.arange(n) % leagues).astype(str),
+        "roster_id": (np.arange(n) // leagues) % 12 + 1,
+        "player_id": (np.arange(n) // (leagues * 12)).astype(str),
+        "valid_from": etl.SNAPSHOT_DATE,
+        "valid_to": None,
+    })
+    for col in etl.FACT_VALUE_COLS:
+        v = rng.integers(0, 10000, n).astype(float) + bump
+        v[rng.random(n) < 0.1] = np.nan
+        df[col] = v
+    return df
+
+
+def upsert_scaling(sizes: list[int], repeats: int = 3) -> list[dict]:
+    import numpy as np
+    import etl_pipeline as etl
+    from sqlalchemy import create_engine
+
+    keys = etl.FACT_KEY + ["valid_from"]
+    out = []
+    for n in sizes:
+        frames = (_fact_frame(n, np.random.default_rng(11)), _fact_frame(n, np.random.default_rng(12), 0.5))
+        timings, tables = {}, {}
+        for name, fast in (("portable", False), ("fast", True)):
+            etl.SQLITE_FAST_UPSERT = fast
+            best = [float("inf"), float("inf")]
+            for _ in range(repeats):
+                with tempfile.TemporaryDirectory(prefix="bench_upsert_") as tmp:
+                    url = f"sqlite:///{(Path(tmp) / 'w.db').as_posix()}"
+                    engine = create_engine(url)
+                    if fast:
+                        etl.event.listen(engine, "connect", etl._sqlite_pragmas)
+                    etl.prepare_schema(engine)
+                    for i, df in enumerate(frames):   # insert, then update the same keys
+                        t0 = time.perf_counter()
+                        etl.upsert(engine, etl.FACT_TABLE, df, keys)
+                        best[i] = min(best[i], time.perf_counter() - t0)
+                    with engine.connect() as conn:
+                        tables[name] = conn.exec_driver_sql(
+                            f"SELECT * FROM {etl.FACT_TABLE} ORDER BY 1, 2, 3").fetchall()
+                    engine.dispose()
+            timings[name] = best
+        etl.SQLITE_FAST_UPSERT = True
+        same = tables["portable"] == tables["fast"]
+        r = {"rows": n, "identical": same}
+        for name, (ins, upd) in timings.items():
+            r[f"{name}_insert_rows_per_s"] = round(n / ins)
+            r[f"{name}_update_rows_per_s"] = round(n / upd)
+        out.append(r)
+        print(f"  {n:>8} rows  insert: portable {r['portable_insert_rows_per_s']:>9,}  "
+              f"fast {r['fast_insert_rows_per_s']:>9,} rows/s | update: portable "
+              f"{r['portable_update_rows_per_s']:>9,}  fast {r['fast_update_rows_per_s']:>9,} rows/s"
+              f"  identical={same}")
+    return out
+
+
+# --------------------------------------------------------------------------- #
+# Warehouse scale suite: synthetic warehouses, downstream scripts, API SQL
+# --------------------------------------------------------------------------- #
+
+# Analytics.js routes, verbatim but for named parameters.
+ANALYTICS_QUERIES = {
+    "leagues": """
+        SELECT league_id, league_name, season, number_of_teams, is_superflex, te_premium_value
+        FROM dim_leagues ORDER BY league_name, season DESC""",
+    "diagnostics": """
+        WITH rp AS (
+          SELECT league_id, roster_id, fp_market_value AS v FROM current_player_market
+          WHERE league_id = :league AND fp_market_value IS NOT NULL),
+        rt AS (SELECT league_id, roster_id, SUM(v) AS team_value, COUNT(*) AS n_assets
+               FROM rp GROUP BY league_id, roster_id),
+        hhi AS (
+          SELECT rp.league_id, rp.roster_id,
+                 SUM((1.0 * rp.v / rt.team_value) * (1.0 * rp.v / rt.team_value)) AS hhi
+          FROM rp JOIN rt ON rt.league_id = rp.league_id AND rt.roster_id = rp.roster_id
+          GROUP BY rp.league_id, rp.roster_id)
+        SELECT m.owner_name, rt.roster_id, rt.team_value, rt.n_assets,
+               PERCENT_RANK() OVER (PARTITION BY rt.league_id ORDER BY rt.team_value) AS value_percentile,
+               RANK()         OVER (PARTITION BY rt.league_id ORDER BY rt.team_value DESC) AS value_rank,
+               h.hhi
+        FROM rt
+        JOIN hhi h ON h.league_id = rt.league_id AND h.roster_id = rt.roster_id
+        LEFT JOIN dim_managers m ON m.league_id = rt.league_id AND m.roster_id = rt.roster_id
+        ORDER BY value_rank""",
+    "arbitrage": """
+        SELECT player_name, position, fp_market_value, fc_market_value, arb_delta_fp_minus_fc
+        FROM current_player_market
+        WHERE league_id = :league AND fp_market_value IS NOT NULL AND fc_market_value IS NOT NULL
+        ORDER BY ABS(arb_delta_fp_minus_fc) DESC LIMIT 25""",
+    "value": """
+        SELECT v.player_id, v.player_name, v.position, v.roster_id, v.fp_market_value,
+               v.fc_market_value, v.vbd_value, v.ppg, v.vorp, d.years_exp
+        FROM current_player_value v
+        LEFT JOIN dim_players d ON d.player_id = v.player_id
+        WHERE v.league_id = :league""",
+    "roster": """
+        SELECT m.player_name, m.position, m.age, m.nfl_team, m.fp_market_value, m.fc_market_value,
+               m.fp_ecr_2qb, m.fc_trend_30day, m.arb_delta_fp_minus_fc, pv.ppg, pv.vbd_value
+        FROM current_player_market m
+        LEFT JOIN current_player_value pv
+          ON pv.league_id = m.league_id AND pv.roster_id = m.roster_id AND pv.player_id = m.player_id
+        WHERE m.league_id = :league AND m.roster_id = :roster
+        ORDER BY (m.fp_market_value IS NULL), m.fp_market_value DESC""",
+    "production": """
+        SELECT v.roster_id, SUM(v.vbd_value) AS production_vbd, SUM(v.fp_market_value) AS team_value
+        FROM current_player_value v WHERE v.league_id = :league
+        GROUP BY v.roster_id ORDER BY v.roster_id""",
+    "production_by_position": """
+        SELECT v.roster_id, v.position, SUM(v.vbd_value) AS production_vbd,
+               SUM(v.fp_market_value) AS team_value
+        FROM current_player_value v WHERE v.league_id = :league
+        GROUP BY v.roster_id, v.position ORDER BY v.roster_id""",
+    "production_projected": """
+        SELECT p.roster_id, SUM(p.vbd_proj) AS production_vbd, MAX(p.as_of_date) AS as_of_date,
+               MAX(p.model_id) AS model_id
+        FROM player_projected_value p
+        WHERE p.league_id = :league
+          AND p.as_of_date = (SELECT MAX(as_of_date) FROM player_projected_value WHERE league_id = :league)
+        GROUP BY p.roster_id ORDER BY p.roster_id""",
+    "construction": """
+        SELECT c.roster_id, c.osl_points, c.slots_filled, c.slots_empty, c.skipped_slots,
+               c.surplus_count, c.surplus_vorp, c.surplus_points, c.hungarian_gain, c.points_basis
+        FROM roster_construction c
+        WHERE c.league_id = :league
+          AND c.snapshot_date = (SELECT MAX(snapshot_date) FROM roster_construction WHERE league_id = :league)
+        ORDER BY c.osl_points DESC""",
+    "surplus": """
+        SELECT s.player_id, s.player_name, s.position, s.points, s.vorp
+        FROM roster_surplus s
+        WHERE s.league_id = :league AND s.roster_id = :roster
+          AND s.snapshot_date = (SELECT MAX(snapshot_date) FROM roster_surplus WHERE league_id = :league)
+        ORDER BY s.vorp DESC""",
+    "cornering_league": """
+        SELECT position, replacement_bar, bar_currency, hhi, elite_total, top_roster_id, top_share,
+               n_unprojected
+        FROM positional_cornering_league
+        WHERE league_id = :league AND basis = 'realized'
+          AND as_of_date = (SELECT MAX(as_of_date) FROM positional_cornering_league
+                            WHERE league_id = :league AND basis = 'realized')
+        ORDER BY position""",
+    "cornering_rosters": """
+        SELECT position, roster_id, vona, vona_share, elite_count
+        FROM positional_cornering
+        WHERE league_id = :league AND basis = 'realized'
+          AND as_of_date = (SELECT MAX(as_of_date) FROM positional_cornering
+                            WHERE league_id = :league AND basis = 'realized')
+        ORDER BY position, vona_share DESC""",
+}
+
+
+def time_queries(con: sqlite3.Connection, queries: dict[str, str], params: dict,
+                 repeats: int) -> dict[str, float | None]:
+    """Best-of-`repeats` milliseconds per query; None where a table the query
+    reads was never built (e.g. lineup_solver did not run)."""
+    out: dict[str, float | None] = {}
+    for name, sql in queries.items():
+        best = None
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            try:
+                con.execute(sql, params).fetchall()
+            except sqlite3.OperationalError:
+                break
+            dt = (time.perf_counter() - t0) * 1000
+            best = dt if best is None else min(best, dt)
+        out[name] = None if best is None else round(best, 2)
+    return out
+
+
+def _script_stages(work: Path, script: str) -> list[dict]:
+    """The pipeline_metrics stages the script's latest run recorded."""
+    path = work / "pipeline_metrics.db"
+    if not path.exists():
+        return []
+    con = sqlite3.connect(path)
+    try:
+        rows = con.execute(
+            "SELECT stage, wall_s, cpu_s, peak_rss_mb, rows_read, rows_written FROM pipeline_stage_metrics "
+            "WHERE run_id = (SELECT MAX(run_id) FROM pipeline_runs WHERE script = ?) ORDER BY seq",
+            (script,)).fetchall()
+    except sqlite3.OperationalError:
+        rows = []
+    con.close()
+    return [dict(zip(("stage", "wall_s", "cpu_s", "peak_rss_mb", "rows_read", "rows_written"), r))
+            for r in rows]
+
+
+def _git_rev() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def warehouse_scaling(scales: list[str], stages: list[str], work: Path, repeats: int = 5,
+                      timeout: float | None = None) -> list[dict]:
+    from synth_warehouse import SCALES
+    from warehouse_keys import bench as bench_views
+
+    out = []
+    for name in scales:
+        scale = SCALES[name]
+        wdir = work / name
+        wdir.mkdir(parents=True, exist_ok=True)
+        db, meta = wdir / "dynasty.db", wdir / "synth.json"
+        env = {**os.environ, "DATA_DIR": str(wdir), "DATABASE_URL": "", "PIPELINE_METRICS_DB": "",
+               "PYTHONUNBUFFERED": "1"}
+        plan = [("synth", ["--scale", name, "--out", str(db), "--force", "--json", str(meta)])]
+        for st in stages:
+            args = ["--db", str(db)]
+            if st in ("project", "cornering"):
+                args += ["--as-of", scale.end]
+            plan.append((st, args))
+        print(f"scale {name}: {', '.join(f'{k}={v}' for k, v in asdict(scale).items())}")
+        results = []
+        for st, args in plan:
+            r = spawn(st, args, env, wdir, wdir / f"bench_{st}.log", timeout)
+            r.update(log=str(wdir / f"bench_{st}.log"), stages=_script_stages(wdir, Path(SCRIPTS[st]).stem))
+            results.append(r)
+            rss = f"{r['peak_rss_mb']:.0f}" if r["peak_rss_mb"] is not None else "n/a"
+            print(f"  {st:<12} {r['status'][:40]:<40} wall {r['wall_s']}s  peak {rss} MB")
+            if st == "synth" and r["status"] != "ok":
+                break
+        entry = {"scale": name, "params": asdict(scale), "stages": results}
+        if db.exists() and results[0]["status"] == "ok":
+            entry.update({k: v for k, v in json.loads(meta.read_text()).items() if k in ("db_mb", "rows")})
+            con = sqlite3.connect(db)
+            row = con.execute("SELECT league_id FROM current_player_market "
+                              "GROUP BY league_id ORDER BY COUNT(*) DESC LIMIT 1").fetchone()
+            entry["api_ms"] = time_queries(con, ANALYTICS_QUERIES, {"league": row and row[0], "roster": 1},
+                                           repeats)
+            entry["view_ms"] = bench_views(con, repeats)
+            con.close()
+            slow = sorted(((v, k) for k, v in {**entry["api_ms"], **entry["view_ms"]}.items() if v is not None),
+                          reverse=True)[:3]
+            print(f"  SQL: {len(entry['api_ms'])} API + {len(entry['view_ms'])} view queries; slowest "
+                  + ", ".join(f"{k} {v:.1f} ms" for v, k in slow))
+        out.append(entry)
+    return out
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Offline record/replay ETL benchmark")
+    ap.add_argument("--cassette", default=os.getenv("HTTP_CASSETTE_DIR") or "data/cassettes")
+    ap.add_argument("--record", action="store_true", help="run live and (re)write the cassette")
+    ap.add_argument("--latency-ms", type=float, default=0.0,
+                    help="injected per-request latency during replay")
+    ap.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES))
+    ap.add_argument("--seasons", nargs=2, type=int, metavar=("FIRST", "LAST"),
+                    help="outcomes_etl season range (default: the script's own)")
+    ap.add_argument("--runs", type=int, default=1)
+    ap.add_argument("--from-db", help="warehouse to copy in as the starting state")
+    ap.add_argument("--workdir", help="scratch DATA_DIR (default: a fresh temp dir)")
+    ap.add_argument("--json", help="also write the results here")
+    ap.add_argument("--fact-scaling", nargs="+", type=int, metavar="LEAGUES",
+                    help="only run the roster-fact transform benchmark at these league counts")
+    ap.add_argument("--upsert-scaling", nargs="+", type=int, metavar="ROWS",
+                    help="only run the warehouse upsert benchmark at these fact sizes")
+    ap.add_argument("--warehouse-scaling", nargs="+", metavar="SCALE",
+                    help="only run the synthetic-warehouse suite at these synth_warehouse.SCALES presets")
+    ap.add_argument("--warehouse-stages", nargs="+", choices=list(WAREHOUSE_STAGES),
+                    default=list(WAREHOUSE_STAGES), help="downstream scripts to time (build order kept)")
+    ap.add_argument("--repeats", type=int, default=5, help="query timings: best of N")
+    ap.add_argument("--stage-timeout", type=float, default=None, metavar="S",
+                    help="give up on a warehouse stage after S seconds")
+    ap.add_argument("--child", help=argparse.SUPPRESS)
+    ap.add_argument("--child-out", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.child:
+        return run_child(args.child, Path(args.child_out))
+    if args.fact_scaling:
+        sys.path.insert(0, str(HERE))
+        print("roster value fact: columnar build_fact vs per-row reference")
+        results = fact_scaling(args.fact_scaling)
+        if args.json:
+            Path(args.json).write_text(json.dumps({"fact_scaling": results}, indent=2))
+        return 0 if all(r["identical"] for r in results) else 1
+    if args.upsert_scaling:
+        sys.path.insert(0, str(HERE))
+        print("fact upsert: portable staging path vs SQLite executemany fast path")
+        results = upsert_scaling(args.upsert_scaling)
+        if args.json:
+            Path(args.json).write_text(json.dumps({"upsert_scaling": results}, indent=2))
+        return 0 if all(r["identical"] for r in results) else 1
+
+    if args.warehouse_scaling:
+        sys.path.insert(0, str(HERE))
+        from synth_warehouse import SCALES
+
+        unknown = [n for n in args.warehouse_scaling if n not in SCALES]
+        if unknown:
+            print(f"Unknown scale(s) {unknown}; presets: {', '.join(SCALES)}")
+            return 1
+        work = Path(args.workdir or tempfile.mkdtemp(prefix="bench_scale_")).resolve()
+        print(f"warehouse scale suite; workdir {work}")
+        stages = [s for s in WAREHOUSE_STAGES if s in args.warehouse_stages]
+        results = warehouse_scaling(args.warehouse_scaling, stages, work, args.repeats, args.stage_timeout)
+        if args.json:
+            Path(args.json).write_text(json.dumps({
+                "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "git_rev": _git_rev(),
+                "python": platform.python_version(),
+                "sqlite": sqlite3.sqlite_version,
+                "warehouse_scaling": results,
+            }, indent=2))
+            print(f"Wrote {args.json}")
+        return 0 if all(r["status"] == "ok" for e in results for r in e["stages"]) else 1
+
+    cassette = Path(args.cassette).resolve()
+    if not args.record and not cassette.is_dir():
+        print(f"No cassette at {cassette}; record one first with --record")
+        return 1
+    work = Path(args.workdir or tempfile.mkdtemp(prefix="bench_etl_")).resolve()
+    work.mkdir(parents=True, exist_ok=True)
+    db = work / "dynasty.db"
+    if args.from_db:
+        shutil.copyfile(args.from_db, db)
+
+    env = {
+        **os.environ,
+        "DATA_DIR": str(work),
+        "DATABASE_URL": "",            # etl_pipeline -> sqlite:///<DATA_DIR>/dynasty.db
+        "RATE_LIMIT_DB": "",
+        "HTTP_CACHE_DIR": "",
+        "HTTP_CASSETTE_DIR": str(cassette),
+        "HTTP_CASSETTE_MODE": "record" if args.record else "replay",
+        "HTTP_REPLAY_LATENCY_MS": str(args.latency_ms),
+        "PYTHONUNBUFFERED": "1",
+    }
+    mode = "record (live)" if args.record else f"replay @ {args.latency_ms:g} ms"
+    print(f"bench: {mode}; cassette {cassette}; workdir {work}")
+
+    results = []
+    for run in range(1, args.runs + 1):
+        for stage in args.stages:
+            log_path = work / f"bench_{stage}_run{run}.log"
+            r = spawn(stage, stage_args(stage, db, args.seasons), env, work, log_path)
+            r.update(run=run, log=str(log_path))
+            results.append(r)
+            rss = f"{r['peak_rss_mb']:.0f}" if r["peak_rss_mb"] is not None else "n/a"
+            print(f"  run {run}  {stage:<12} {r['status'][:40]:<40} "
+                  f"wall {r['wall_s']}s  requests {r['requests']}  peak {rss} MB")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({
+            "mode": "record" if args.record else "replay",
+            "latency_ms": args.latency_ms,
+            "cassette": str(cassette),
+            "results": results,
+        }, indent=2))
+        print(f"Wrote {args.json}")
+    return 0 if all(r["status"] == "ok" for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
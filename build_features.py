@@ -44,6 +44,8 @@ import sqlite3
 import numpy as np
 import pandas as pd
 
+from stage_profiler import profiled
+
 # Bumped whenever the expected warehouse schema changes. Consumers
 # (backtest_baselines etc.) check this at import so a stale copy of THIS file
 # fails with instructions instead of a mid-run "no such table" traceback.
@@ -122,6 +124,7 @@ def latest_fc_snapshot(con: sqlite3.Connection, as_of: str) -> pd.DataFrame:
 # The chokepoint
 # --------------------------------------------------------------------------- #
 
+@profiled
 def build_features(con: sqlite3.Connection, as_of: str, season: int,
                    horizon: str, league_id: str | None = None) -> pd.DataFrame:
     """One row per sleeper_id; features only; facts dated <= as_of only.
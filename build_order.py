@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+build_order.py — the warehouse build order as one incremental DAG.
+
+WHY: the build order lived in a dozen docstrings ("run project_production.py
+first", "needs id_crosswalk: run dp_archive_etl.py"), every step was started
+by hand, and every step recomputed everything — a daily refresh re-ran the
+backtests even on days nothing they read had moved. Here each step declares
+the tables it reads and writes (BUILD), and:
+
+  - dependencies come from the declarations: a step waits for every EARLIER
+    step that writes one of its inputs, so BUILD's order is the build order
+    and the graph cannot cycle
+  - a step is skipped when its fingerprint matches the one it left behind
+    after its last successful run. The fingerprint is, per input table, the
+    row count, MAX(date column) and an order-independent content hash (only
+    the latest-date slice for the big append-mostly tables in TAIL), plus a
+    hash of the script and every local module it imports — so a code change
+    re-runs it too. Steps fed by the outside world (Sleeper, GitHub,
+    nflverse) also go stale after `every`.
+  - the fingerprint is stored AFTER the run, so a step that rewrites one of
+    its own inputs (pick_values_etl on dim_draft_picks) is not stale the
+    next day because of its own write
+  - independent steps run in parallel (--jobs). SQLite allows one writer:
+    two steps that write the same table never overlap, and the `exclusive`
+    steps — backtest_baselines and projection_model hold one write
+    transaction for their whole run — run alone. A step that still dies on
+    "database is locked" is retried once, alone.
+
+A daily refresh therefore re-runs the sources, then only what their new
+rows actually reach. State lives in <DATA_DIR>/build_state.db (override:
+BUILD_STATE_DB); each step's output goes to <DATA_DIR>/build_logs/<step>.log.
+
+Usage:
+    python build_order.py                         # refresh everything stale
+    python build_order.py --dry-run               # what would run, and why
+    python build_order.py --only cornering lineup # just these (if stale)
+    python build_order.py --force backtest        # re-run regardless
+    python build_order.py --list                  # the graph
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from pipeline_metrics import pipeline_run, stage
+
+HERE = Path(__file__).resolve().parent
+DATA_DIR = Path(os.getenv("DATA_DIR", "./data"))
+
+
+@dataclass(frozen=True)
+class Step:
+    name: str
+    script: str
+    inputs: tuple[str, ...]
+    outputs: tuple[str, ...]
+    args: tuple[str, ...] = ("--db", "{db}")
+    every: timedelta | None = None   # external inputs: stale after this long regardless
+    exclusive: bool = False          # holds the write lock for its whole run
+
+
+DAILY, WEEKLY = timedelta(hours=20), timedelta(days=7)
+FACT = ("dim_leagues", "dim_players", "fact_roster_value_scd", "fact_snapshot_calendar")
+HARNESS = ("outcomes", "outcomes_provenance", "nfl_week_calendar", "dp_values_history", "id_crosswalk",
+           "fc_values_snapshots")
+
+BUILD = [
+    Step("etl", "etl_pipeline.py", (),
+         ("dim_leagues", "dim_managers", "dim_players", "dim_draft_picks", "fact_roster_value_scd",
+          "fact_snapshot_calendar", "fact_transactions", "fact_weekly_player_points", "fc_market_values",
+          "current_player_market", "current_player_value"),
+         args=(), every=DAILY),
+    Step("pick_values", "pick_values_etl.py", ("dim_leagues", "dim_draft_picks", "fc_market_values"),
+         ("dim_draft_picks",)),
+    Step("dp_archive", "dp_archive_etl.py", (), ("dp_values_history", "dp_load_manifest", "id_crosswalk"),
+         every=DAILY),
+    Step("outcomes", "outcomes_etl.py", ("dim_leagues", "id_crosswalk"),
+         ("outcomes", "nfl_week_calendar", "outcomes_provenance"), every=WEEKLY),
+    Step("points_model", "points_model.py", FACT,
+         ("player_production_value", "current_player_market", "current_player_value"),
+         args=(), every=WEEKLY),
+    Step("rebuild_production", "rebuild_production_value.py",
+         ("dim_leagues", "id_crosswalk", "player_production_value"),
+         ("player_production_value", "player_production_value_legacy", "current_player_value"),
+         every=WEEKLY),
+    Step("backtest", "backtest_baselines.py", HARNESS, ("model_runs", "predictions", "evaluations"),
+         exclusive=True),
+    Step("projection", "projection_model.py", HARNESS,
+         ("model_runs", "predictions", "evaluations", "model_coefficients"), exclusive=True),
+    Step("project", "project_production.py", HARNESS + ("dim_leagues", "current_player_value"),
+         ("player_projected_value",)),
+    Step("cornering", "cornering_metrics.py",
+         ("dim_leagues", "outcomes_provenance", "player_production_value", "current_player_value",
+          "player_projected_value"),
+         ("positional_cornering", "positional_cornering_league")),
+    Step("lineup", "lineup_solver.py", ("dim_leagues", "current_player_value"),
+         ("roster_lineup_optimal", "roster_surplus", "roster_construction")),
+    Step("export_modellab", "export_modellab.py", ("evaluations", "model_runs", "predictions"), ()),
+]
+
+# table -> date column. Big, append-mostly tables: only rows at MAX(date) are
+# content-hashed (count and MAX catch everything else they see); the rest are
+# hashed whole.
+TAIL = {
+    "fact_roster_value_scd": "valid_from",
+    "fact_snapshot_calendar": "snapshot_date",
+    "fact_transactions": "txn_date",
+    "dp_values_history": "knowledge_date",
+    "outcomes": "season",
+    "fc_values_snapshots": "knowledge_date",
+    "predictions": "as_of",
+    "player_projected_value": "as_of_date",
+}
+
+STATE_DDL = """
+CREATE TABLE IF NOT EXISTS build_state (
+    step         TEXT PRIMARY KEY,
+    fingerprint  TEXT NOT NULL,     -- JSON: {"code": ..., "tables": {table: [rows, max_date, hash]}}
+    finished_at  TEXT NOT NULL,
+    wall_s       REAL
+)
+"""
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+# --------------------------------------------------------------------------- #
+# Graph
+# --------------------------------------------------------------------------- #
+
+def dependencies(steps: list[Step]) -> dict[str, list[str]]:
+    """step -> the earlier steps that write one of its inputs."""
+    deps = {}
+    for i, s in enumerate(steps):
+        deps[s.name] = [p.name for p in steps[:i] if set(p.outputs) & set(s.inputs)]
+    return deps
+
+
+def conflicts(a: Step, b: Step) -> bool:
+    """Steps that may not run at the same time."""
+    return a.exclusive or b.exclusive or bool(set(a.outputs) & set(b.outputs))
+
+
+# --------------------------------------------------------------------------- #
+# Fingerprints
+# --------------------------------------------------------------------------- #
+
+def _local_modules(path: Path, seen: set[Path]) -> set[Path]:
+    if path in seen or not path.exists():
+        return seen
+    seen.add(path)
+    for mod in re.findall(r"^\s*(?:from|import)\s+(\w+)", path.read_text(encoding="utf-8"), re.M):
+        _local_modules(HERE / f"{mod}.py", seen)
+    return seen
+
+
+def code_hash(script: str) -> str:
+    """The script and every repo module it imports, transitively."""
+    h = hashlib.sha1()
+    for p in sorted(_local_modules(HERE / script, set())):
+        h.update(p.name.encode())
+        h.update(p.read_bytes())
+    return h.hexdigest()[:16]
+
+
+def table_fingerprint(con: sqlite3.Connection, table: str) -> list | None:
+    """[rows, MAX(date) or None, content hash]; None if the table is absent.
+    The hash sums a per-row digest mod 2^64, so row order (a delete-and-
+    reinsert, a rebuilt index) does not change it."""
+    if not con.execute("SELECT 1 FROM sqlite_master WHERE name = ? AND type IN ('table', 'view')",
+                       (table,)).fetchone():
+        return None
+    col = TAIL.get(table)
+    rows, latest = con.execute(f'SELECT COUNT(*), {f"MAX({col})" if col else "NULL"} FROM "{table}"').fetchone()
+    sql, params = f'SELECT * FROM "{table}"', ()
+    if col:
+        sql, params = sql + f" WHERE {col} = ?", (latest,)
+    acc = 0
+    for row in con.execute(sql, params):
+        acc = (acc + int.from_bytes(hashlib.blake2b(repr(row).encode(), digest_size=8).digest(), "big")) % (1 << 64)
+    return [rows, latest, f"{acc:016x}"]
+
+
+def fingerprint(con: sqlite3.Connection, step: Step) -> dict:
+    return {"code": code_hash(step.script),
+            "tables": {t: table_fingerprint(con, t) for t in step.inputs}}
+
+
+class BuildState:
+    """Last successful fingerprint per step."""
+
+    def __init__(self, path: Path | None = None):
+        self.path = path or Path(os.getenv("BUILD_STATE_DB") or DATA_DIR / "build_state.db")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with sqlite3.connect(self.path) as con:
+            con.execute(STATE_DDL)
+
+    def get(self, step: str) -> tuple[dict, datetime] | None:
+        con = sqlite3.connect(self.path)
+        row = con.execute("SELECT fingerprint, finished_at FROM build_state WHERE step = ?", (step,)).fetchone()
+        con.close()
+        return (json.loads(row[0]), datetime.fromisoformat(row[1])) if row else None
+
+    def put(self, step: str, fp: dict, wall_s: float) -> None:
+        con = sqlite3.connect(self.path, timeout=30)
+        with con:
+            con.execute("INSERT OR REPLACE INTO build_state VALUES (?, ?, ?, ?)",
+                        (step, json.dumps(fp), _now().isoformat(timespec="seconds"), round(wall_s, 2)))
+        con.close()
+
+
+def stale_reason(con: sqlite3.Connection, step: Step, state: BuildState) -> str | None:
+    """Why `step` has to run, or None if it is fresh."""
+    last = state.get(step.name)
+    if last is None:
+        return "never ran"
+    fp, finished = last
+    if step.every and _now() - finished > step.every:
+        return f"last run {finished:%Y-%m-%d %H:%M} (refreshes every {step.every})"
+    now = fingerprint(con, step)
+    if now["code"] != fp["code"]:
+        return "code changed"
+    changed = [t for t in step.inputs if now["tables"][t] != fp["tables"].get(t)]
+    return f"input changed: {', '.join(changed)}" if changed else None
+
+
+# --------------------------------------------------------------------------- #
+# Run
+# --------------------------------------------------------------------------- #
+
+def run_step(step: Step, db: Path, logs: Path) -> tuple[int, float, Path]:
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{db.resolve().as_posix()}", "PYTHONUNBUFFERED": "1"}
+    log_path = logs / f"{step.name}.log"
+    t0 = time.perf_counter()
+    with stage(step.name), log_path.open("w", encoding="utf-8") as logf:
+        rc = subprocess.run([sys.executable, str(HERE / step.script),
+                             *(a.format(db=db) for a in step.args)],
+                            env=env, cwd=HERE, stdout=logf, stderr=subprocess.STDOUT).returncode
+    return rc, time.perf_counter() - t0, log_path
+
+
+def _locked(log_path: Path) -> bool:
+    return "database is locked" in log_path.read_text(encoding="utf-8", errors="replace")[-4000:]
+
+
+def build(steps: list[Step], db: Path, jobs: int, force: set[str], dry_run: bool = False) -> dict[str, str]:
+    """Run every stale step in dependency order; returns step -> outcome
+    (ran | fresh | failed | blocked, or would run under dry_run)."""
+    deps = dependencies(steps)
+    names = {s.name for s in steps}
+    state = BuildState()
+    logs = DATA_DIR / "build_logs"
+    logs.mkdir(parents=True, exist_ok=True)
+    con = sqlite3.connect(db, timeout=30)
+    done: dict[str, str] = {}
+    pending = list(steps)
+    running: dict[Future, Step] = {}
+    retried: set[str] = set()
+    with ThreadPoolExecutor(max_workers=max(jobs, 1)) as pool:
+        while pending or running:
+            for s in list(pending):
+                up = [d for d in deps[s.name] if d in names]
+                if any(d not in done for d in up):
+                    continue
+                if any(done[d] in ("failed", "blocked") for d in up):
+                    done[s.name] = "blocked"
+                    pending.remove(s)
+                    print(f"  {s.name:<20} blocked (upstream failed)")
+                    continue
+                if s.name in force:
+                    reason = "forced"
+                elif dry_run and any(done[d] == "would run" for d in up):
+                    reason = "upstream will run"
+                else:
+                    reason = stale_reason(con, s, state)
+                if reason is None:
+                    done[s.name] = "fresh"
+                    pending.remove(s)
+                    print(f"  {s.name:<20} fresh")
+                    continue
+                if dry_run:
+                    done[s.name] = "would run"
+                    pending.remove(s)
+                    print(f"  {s.name:<20} would run: {reason}")
+                    continue
+                alone = s.exclusive or s.name in retried
+                if len(running) >= jobs or (alone and running) or any(
+                        conflicts(s, r) or r.name in retried for r in running.values()):
+                    if alone:
+                        break   # hold later steps back so this one gets its turn
+                    continue
+                pending.remove(s)
+                print(f"  {s.name:<20} running: {reason}")
+                running[pool.submit(run_step, s, db, logs)] = s
+            if not running:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                s = running.pop(fut)
+                rc, wall, log_path = fut.result()
+                if rc == 0:
+                    state.put(s.name, fingerprint(con, s), wall)
+                    done[s.name] = "ran"
+                    print(f"  {s.name:<20} done in {wall:.1f} s")
+                elif s.name not in retried and _locked(log_path):
+                    retried.add(s.name)
+                    pending.insert(0, s)
+                    print(f"  {s.name:<20} hit a locked database; retrying alone")
+                else:
+                    done[s.name] = "failed"
+                    print(f"  {s.name:<20} FAILED (exit {rc}) — see {log_path}")
+    con.close()
+    return done
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Run the stale steps of the warehouse build order")
+    ap.add_argument("--db", type=Path, default=DATA_DIR / "dynasty.db")
+    ap.add_argument("--jobs", type=int, default=3, help="steps to run at once")
+    ap.add_argument("--only", nargs="+", metavar="STEP", help="consider only these steps")
+    ap.add_argument("--force", nargs="+", default=[], metavar="STEP", help="run these even if fresh")
+    ap.add_argument("--force-all", action="store_true")
+    ap.add_argument("--dry-run", action="store_true", help="report what is stale; run nothing")
+    ap.add_argument("--list", action="store_true", help="print the graph and exit")
+    args = ap.parse_args()
+    known = {s.name for s in BUILD}
+    unknown = sorted((set(args.only or []) | set(args.force)) - known)
+    if unknown:
+        print(f"Unknown step(s) {unknown}; steps: {', '.join(s.name for s in BUILD)}")
+        return 1
+    if args.list:
+        deps = dependencies(BUILD)
+        for s in BUILD:
+            flags = ", ".join(f for f, on in (("exclusive", s.exclusive), (f"every {s.every}", s.every)) if on)
+            print(f"{s.name:<20} {s.script:<28} after: {', '.join(deps[s.name]) or '-'}"
+                  + (f"  [{flags}]" if flags else ""))
+        return 0
+    if not args.db.exists() and not args.dry_run:
+        args.db.parent.mkdir(parents=True, exist_ok=True)
+    steps = [s for s in BUILD if not args.only or s.name in args.only]
+    force = known if args.force_all else set(args.force)
+    print(f"build: {args.db} ({len(steps)} step(s), {args.jobs} at a time{', dry run' if args.dry_run else ''})")
+    with pipeline_run("build_order"):
+        done = build(steps, args.db, args.jobs, force, args.dry_run)
+    counts = {k: sum(v == k for v in done.values()) for k in dict.fromkeys(done.values())}
+    print("summary: " + ", ".join(f"{n} {k}" for k, n in counts.items()))
+    return 1 if any(v in ("failed", "blocked") for v in done.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -60,12 +60,15 @@ import sqlite3
 import sys
 from datetime import date
 
+from pipeline_metrics import instrumented, stage
+
 DDL = """
 CREATE TABLE IF NOT EXISTS positional_cornering (
     basis TEXT, as_of_date TEXT, league_id TEXT, position TEXT,
     roster_id INTEGER, vona REAL, vona_share REAL, elite_count INTEGER,
     PRIMARY KEY (basis, as_of_date, league_id, position, roster_id)
 );
+CREATE INDEX IF NOT EXISTS ix_positional_cornering_asof ON positional_cornering (as_of_date);
 CREATE TABLE IF NOT EXISTS positional_cornering_league (
     basis TEXT, as_of_date TEXT, league_id TEXT, position TEXT,
     replacement_bar REAL, bar_currency TEXT, hhi REAL, elite_total INTEGER,
@@ -138,6 +141,7 @@ def write_basis(con, basis, as_of, rows_by_league_pos):
              top_rid, round(top_share, 6) if total > 0 else None, n_unproj))
 
 
+@instrumented("cornering_metrics")
 def main() -> int:
     ap = argparse.ArgumentParser()
     ap.add_argument("--db", default="data/dynasty.db")
@@ -162,58 +166,59 @@ def main() -> int:
     # current rostered world, scoped to latest season-with-data per league
     league_rows = con.execute(
         "SELECT l.league_id FROM dim_leagues l WHERE l.season = "
-        "(SELECT MAX(d2.season) FROM dim_leagues d2 JOIN v_player_value v "
+        "(SELECT MAX(d2.season) FROM dim_leagues d2 JOIN current_player_value v "
         " ON v.league_id=d2.league_id WHERE d2.league_name=l.league_name)"
     ).fetchall()
     leagues = [r[0] for r in league_rows]
 
     # ---- realized basis ------------------------------------------------------
-    work = {}
-    for lid in leagues:
-        for pos in POSITIONS:
-            if (lid, pos) not in bars:
-                continue
-            players = con.execute(
-                "SELECT roster_id, ppg FROM v_player_value "
-                "WHERE league_id=? AND position=? AND ppg IS NOT NULL AND "
-                "snapshot_date=(SELECT MAX(snapshot_date) FROM v_player_value "
-                "WHERE league_id=?)", (lid, pos, lid)).fetchall()
-            work[(lid, pos)] = (bars[(lid, pos)][0], "league", players, 0)
-    con.execute("DELETE FROM positional_cornering WHERE basis='realized' AND as_of_date=?", (args.as_of,))
-    con.execute("DELETE FROM positional_cornering_league WHERE basis='realized' AND as_of_date=?", (args.as_of,))
-    write_basis(con, "realized", args.as_of, work)
-    print(f"realized basis: {len(work)} (league, position) cells written")
+    with stage("realized", con=con):
+        work = {}
+        for lid in leagues:
+            for pos in POSITIONS:
+                if (lid, pos) not in bars:
+                    continue
+                players = con.execute(
+                    "SELECT roster_id, ppg FROM current_player_value "
+                    "WHERE league_id=? AND position=? AND ppg IS NOT NULL",
+                    (lid, pos)).fetchall()
+                work[(lid, pos)] = (bars[(lid, pos)][0], "league", players, 0)
+        con.execute("DELETE FROM positional_cornering WHERE basis='realized' AND as_of_date=?", (args.as_of,))
+        con.execute("DELETE FROM positional_cornering_league WHERE basis='realized' AND as_of_date=?", (args.as_of,))
+        write_basis(con, "realized", args.as_of, work)
+        print(f"realized basis: {len(work)} (league, position) cells written")
 
     # ---- projected basis (skipped honestly if Step 3 hasn't run) -------------
     has_proj = con.execute(
         "SELECT name FROM sqlite_master WHERE name='player_projected_value'"
     ).fetchone()
     if has_proj:
-        work = {}
-        for lid in leagues:
-            asof_proj = con.execute(
-                "SELECT MAX(as_of_date) FROM player_projected_value "
-                "WHERE league_id=?", (lid,)).fetchone()[0]
-            if asof_proj is None:
-                continue
-            for pos in POSITIONS:
-                if (lid, pos) not in cbars:
+        with stage("projected", con=con):
+            work = {}
+            for lid in leagues:
+                asof_proj = con.execute(
+                    "SELECT MAX(as_of_date) FROM player_projected_value "
+                    "WHERE league_id=?", (lid,)).fetchone()[0]
+                if asof_proj is None:
                     continue
-                players = con.execute(
-                    "SELECT roster_id, ppg_proj FROM player_projected_value "
-                    "WHERE league_id=? AND position=? AND as_of_date=? "
-                    "AND ppg_proj IS NOT NULL", (lid, pos, asof_proj)).fetchall()
-                n_unproj = con.execute(
-                    "SELECT COUNT(*) FROM player_projected_value "
-                    "WHERE league_id=? AND position=? AND as_of_date=? "
-                    "AND ppg_proj IS NULL", (lid, pos, asof_proj)).fetchone()[0]
-                work[(lid, pos)] = (cbars[(lid, pos)], "canonical",
-                                    players, n_unproj)
-        con.execute("DELETE FROM positional_cornering WHERE basis='projected' AND as_of_date=?", (args.as_of,))
-        con.execute("DELETE FROM positional_cornering_league WHERE basis='projected' AND as_of_date=?", (args.as_of,))
-        write_basis(con, "projected", args.as_of, work)
-        print(f"projected basis: {len(work)} cells written "
-              f"(numerator ppg_proj, canonical-currency bar, same K)")
+                for pos in POSITIONS:
+                    if (lid, pos) not in cbars:
+                        continue
+                    players = con.execute(
+                        "SELECT roster_id, ppg_proj FROM player_projected_value "
+                        "WHERE league_id=? AND position=? AND as_of_date=? "
+                        "AND ppg_proj IS NOT NULL", (lid, pos, asof_proj)).fetchall()
+                    n_unproj = con.execute(
+                        "SELECT COUNT(*) FROM player_projected_value "
+                        "WHERE league_id=? AND position=? AND as_of_date=? "
+                        "AND ppg_proj IS NULL", (lid, pos, asof_proj)).fetchone()[0]
+                    work[(lid, pos)] = (cbars[(lid, pos)], "canonical",
+                                        players, n_unproj)
+            con.execute("DELETE FROM positional_cornering WHERE basis='projected' AND as_of_date=?", (args.as_of,))
+            con.execute("DELETE FROM positional_cornering_league WHERE basis='projected' AND as_of_date=?", (args.as_of,))
+            write_basis(con, "projected", args.as_of, work)
+            print(f"projected basis: {len(work)} cells written "
+                  f"(numerator ppg_proj, canonical-currency bar, same K)")
         # Deferred Step 3 item, landed here because this module owns the bar:
         # a v_player_value-shaped view over projections, so lineup_solver.py
         # can run on the projected world (--source v_player_value_projected).
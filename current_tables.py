@@ -0,0 +1,78 @@
+"""
+current_tables.py — materialized latest-snapshot ("current") tables.
+
+Almost every read the API and the Step 2-4 scripts make is "the latest
+snapshot of league X": `snapshot_date = (SELECT MAX(snapshot_date) ...)`
+over v_player_market / v_player_value, and v_player_value itself joins
+player_production_value under a second `MAX(season)` subquery. Both views
+sit on the daily expansion of the SCD fact, so each request re-derives the
+MAX and re-expands history — a cost that grows with every snapshot day.
+
+The writers finish by materializing that answer instead:
+
+  current_player_market   v_player_market at each league's latest snapshot
+  current_player_value    v_player_value  at each league's latest snapshot
+                          (only once points_model.py has created the view)
+
+Same columns as the views, one snapshot per league, indexed on
+(league_id, roster_id) — a reader pays for its league's rows and nothing
+else, however much history accrues. "Latest" is per league (MAX over
+fact_snapshot_calendar), not global: a league whose snapshots stopped
+(a completed season) keeps its last rosters instead of dropping out.
+
+refresh_current_tables() builds each table under a `__new` name and swaps it
+in (DROP + RENAME) inside the caller's transaction, so readers see either
+the previous complete set or the new one, never a half-built table. On
+SQLite that transaction has to exist at the driver: pysqlite issues no BEGIN
+before DDL, so a block whose first statement is the refresh would autocommit
+each DROP and RENAME. The function opens it (BEGIN IMMEDIATE) when the driver
+has none open. etl_pipeline.run() refreshes after dim_players is synced;
+points_model.run() and rebuild_production_value.py refresh after rewriting
+player_production_value.
+"""
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING
+
+from sqlalchemy import inspect, text
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Connection
+
+log = logging.getLogger("current_tables")
+
+# table -> the view it materializes
+TABLES = {
+    "current_player_market": "v_player_market",
+    "current_player_value": "v_player_value",
+}
+
+_LATEST = """
+SELECT league_id, MAX(snapshot_date) AS snapshot_date
+FROM fact_snapshot_calendar GROUP BY league_id
+"""
+
+
+def refresh_current_tables(conn: Connection) -> dict[str, int]:
+    """Rebuild and swap in every current table whose source view exists;
+    returns rows per table. Runs on the caller's transaction, which on
+    SQLite it begins at the driver if nothing has yet."""
+    if conn.dialect.name == "sqlite" and not conn.connection.dbapi_connection.in_transaction:
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+    views = set(inspect(conn).get_view_names())
+    counts: dict[str, int] = {}
+    for table, view in TABLES.items():
+        if view not in views:
+            continue
+        new = f"{table}__new"
+        conn.execute(text(f"DROP TABLE IF EXISTS {new}"))
+        conn.execute(text(
+            f"CREATE TABLE {new} AS SELECT v.* FROM {view} v "
+            f"JOIN ({_LATEST}) c ON c.league_id = v.league_id AND c.snapshot_date = v.snapshot_date"))
+        conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+        conn.execute(text(f"ALTER TABLE {new} RENAME TO {table}"))
+        conn.execute(text(f"CREATE INDEX ix_{table}_league ON {table} (league_id, roster_id)"))
+        counts[table] = conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar_one()
+    log.info("Current tables: %s", ", ".join(f"{t} {n} rows" for t, n in counts.items()) or "none")
+    return counts
@@ -15,6 +15,9 @@ v2 fixes, responding to review:
       - pre-fp_id era: join crosswalk on merge_name (DP's own normalized key,
         present in BOTH the dyno files and db_playerids.csv — a key join, not
         fuzzy matching). The pre-2020 match rate is REPORTED, not assumed.
+      - rows neither key places fall back to normalized name + position
+        against the warehouse player_name_index (name_index.py), unambiguous
+        keys only.
     player_key = fp_id when present else 'mn:'+merge_name (stable PK either era).
   Also: "file absent at commit" vs "recognized file produced zero rows" are now
     distinguished — the second RAISES instead of passing quietly.
@@ -41,6 +44,11 @@ from pathlib import Path
 
 import pandas as pd
 
+from http_client import GITHUB_LIMITER, http_csv
+from name_index import match_names, name_lookup, read_name_index
+from pipeline_metrics import instrumented, stage as metrics_stage
+from warehouse_keys import executescript
+
 REPO_URL = "https://github.com/dynastyprocess/data.git"
 FILE_PATH = "files/values-players.csv"
 XWALK_URL = ("https://raw.githubusercontent.com/dynastyprocess/data/"
@@ -145,7 +153,7 @@ def list_snapshots(repo: Path, since: str) -> list[tuple[str, str]]:
 
 
 def load_crosswalk(con: sqlite3.Connection) -> pd.DataFrame:
-    xw = pd.read_csv(XWALK_URL, dtype=str)
+    xw = http_csv(XWALK_URL, GITHUB_LIMITER, dtype=str)
     xw = xw[["sleeper_id", "gsis_id", "fantasypros_id", "merge_name",
              "position", "birthdate"]].rename(columns={"fantasypros_id": "fp_id"})
     xw = xw[xw.sleeper_id.notna()].drop_duplicates("sleeper_id")
@@ -179,8 +187,10 @@ def load_snapshot(repo: Path, sha: str, commit_date: str) -> pd.DataFrame | None
     out["merge_name"] = out["merge_name"].astype("string").str.strip().str.lower()
     # 7th signature (2020-04-27..05-01): modern columns but NO fp_id and NO
     # mergename. Derive merge_name from player using DP's own normalization
-    # (lowercase, strip punctuation, drop Jr/Sr/II.. suffixes) so the same
-    # crosswalk merge_name join applies.
+    # (lowercase, strip punctuation, drop a TRAILING Jr/Sr/II.. suffix) so the
+    # same crosswalk merge_name join applies. Not name_index.norm_names: that
+    # drops suffix words anywhere ("V. Jefferson" -> "jefferson"), which
+    # would miss DP's key and change the stored 'mn:' player_keys.
     need = out["merge_name"].isna() & out["player"].notna()
     if need.any():
         out.loc[need, "merge_name"] = (
@@ -202,6 +212,7 @@ def load_snapshot(repo: Path, sha: str, commit_date: str) -> pd.DataFrame | None
     return out
 
 
+@instrumented("dp_archive_etl")
 def main() -> int:
     ap = argparse.ArgumentParser()
     ap.add_argument("--db", default="etl/data/dynasty.db")
@@ -212,8 +223,10 @@ def main() -> int:
     Path(args.workdir).mkdir(parents=True, exist_ok=True)
     repo = ensure_repo(Path(args.workdir))
     con = sqlite3.connect(args.db)
-    con.executescript(DDL)
-    xw = load_crosswalk(con)
+    executescript(con, DDL)   # tolerates facts keyed by warehouse_keys.py
+    with metrics_stage("crosswalk", con=con) as st:
+        xw = load_crosswalk(con)
+        st.rows_read = len(xw)
 
     have = {r[0] for r in con.execute(
         "SELECT commit_sha FROM dp_load_manifest")}
@@ -222,12 +235,14 @@ def main() -> int:
     print(f"{len(snaps)} snapshots in history; {len(todo)} new to load.")
 
     frames, absent = [], 0
-    for sha, d in todo:
-        df = load_snapshot(repo, sha, d)
-        if df is None:
-            absent += 1
-            continue
-        frames.append(df)
+    with metrics_stage("snapshots") as st:
+        for sha, d in todo:
+            df = load_snapshot(repo, sha, d)
+            if df is None:
+                absent += 1
+                continue
+            frames.append(df)
+        st.rows_read = sum(len(f) for f in frames)
     if not frames:
         print("Nothing to load.")
         con.close()
@@ -253,19 +268,31 @@ def main() -> int:
     stage["sleeper_id"] = stage["sid_fp"].where(stage["sid_fp"].notna(),
                                                 stage["sid_mn"])
     stage = stage.drop(columns=["sid_fp", "sid_mn"])
-
-    cols = ["knowledge_date", "player_key", "commit_sha", "fp_id", "merge_name",
-            "sleeper_id", "player", "pos", "team", "age", "draft_year",
-            "ecr_1qb", "ecr_2qb", "ecr_pos", "value_1qb", "value_2qb"]
-    stage = stage[cols].astype(object).where(stage[cols].notna(), None)
-    con.executemany(
-        f"INSERT OR REPLACE INTO dp_values_history ({','.join(cols)}) "
-        f"VALUES ({','.join('?' * len(cols))})",
-        stage.itertuples(index=False, name=None))
-    con.executemany(
-        "INSERT OR IGNORE INTO dp_load_manifest VALUES (?, datetime('now'))",
-        [(sha,) for sha, _ in todo])
-    con.commit()
+    # Last resort for rows neither key places: name + position against the
+    # warehouse player_name_index (written by etl_pipeline). Ambiguous keys
+    # are excluded, same policy as the merge_name join.
+    miss = stage["sleeper_id"].isna() & stage["player"].notna()
+    lookup = name_lookup(read_name_index(con))
+    if miss.any() and len(lookup):
+        stage.loc[miss, "sleeper_id"] = match_names(
+            stage.loc[miss, "player"], stage.loc[miss, "pos"], lookup, unique_only=True)
+        print(f"Name index fallback matched "
+              f"{int(stage.loc[miss, 'sleeper_id'].notna().sum())} of {int(miss.sum())} "
+              f"rows unplaced by fp_id / merge_name.")
+
+    with metrics_stage("write", con=con):
+        cols = ["knowledge_date", "player_key", "commit_sha", "fp_id", "merge_name",
+                "sleeper_id", "player", "pos", "team", "age", "draft_year",
+                "ecr_1qb", "ecr_2qb", "ecr_pos", "value_1qb", "value_2qb"]
+        stage = stage[cols].astype(object).where(stage[cols].notna(), None)
+        con.executemany(
+            f"INSERT OR REPLACE INTO dp_values_history ({','.join(cols)}) "
+            f"VALUES ({','.join('?' * len(cols))})",
+            stage.itertuples(index=False, name=None))
+        con.executemany(
+            "INSERT OR IGNORE INTO dp_load_manifest VALUES (?, datetime('now'))",
+            [(sha,) for sha, _ in todo])
+        con.commit()
 
     # ---- honest load report --------------------------------------------------
     n, lo, hi, nsnap = con.execute(
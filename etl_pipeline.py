@@ -13,8 +13,10 @@ Design note (read this in your interview):
     (KTC has no API and 503s server requests; FantasyCalc's historical endpoint
     is gone; DynastyProcess publishes only the latest scrape). Therefore the
     fact table is a SNAPSHOT fact partitioned by `snapshot_date`: every run
-    appends today's market values idempotently (ON CONFLICT upsert), accruing a
-    true longitudinal valuation series going FORWARD. Roster/transaction history,
+    records today's market values idempotently, accruing a true longitudinal
+    valuation series going FORWARD. It is stored change-only (SCD2 ranges in
+    fact_roster_value_scd, rebuilt to the daily grain by a view), so a day on
+    which nothing moved costs nothing. Roster/transaction history,
     by contrast, IS fully backfillable from Sleeper via `previous_league_id`
     chaining, which this script does.
 
@@ -30,42 +32,72 @@ Requirements (see requirements.txt):
 Configuration (environment / .env):
     SLEEPER_USERNAME=your_sleeper_handle      # OR set SLEEPER_USER_ID directly
     SLEEPER_USER_ID=                          # optional, skips username lookup
+    SLEEPER_USERNAMES=                        # optional CSV: several managers in one run
+    SLEEPER_USER_IDS=                         #   (leagues unioned + deduped; shared pulls once)
     SLEEPER_SEASON=2026
+    SLEEPER_BASE_URL=https://api.sleeper.app/v1  # point at a local stub server for offline tests
     LEAGUE_ID_FILTER=                         # optional CSV of league_ids to limit to
     BACKFILL_PREVIOUS_SEASONS=true            # walk previous_league_id for history
+    ETL_WORKERS=4                             # concurrent league-season extraction (1 = serial)
+    LOAD_ACTIVITY=true                        # transactions + weekly matchup points, incremental by week
     DATABASE_URL=                             # optional; defaults to sqlite:///<DATA_DIR>/dynasty.db
+    SQLITE_FAST_UPSERT=true                   # SQLite: executemany upsert, WAL + synchronous=NORMAL
     PLAYER_CACHE_TTL_HOURS=24
     DATA_DIR=./data
+    RATE_LIMIT_DB=                            # shared per-host token buckets (see http_client.py)
+    ETL_JOURNAL_DB=                           # checkpoint journal for --resume; defaults to <DATA_DIR>/etl_journal.db
     EXPORT_CSV=true                           # also write CSV extracts for Power BI
     EXTRACT_DIR=                              # defaults to <DATA_DIR>/powerbi
+    EXTRACT_FORMAT=csv                        # csv | parquet (fact partitioned by snapshot_date + manifest; needs pyarrow)
+    PIPELINE_METRICS=true                     # per-stage spans (see pipeline_metrics.py)
+    PIPELINE_METRICS_DB=                      # defaults to <DATA_DIR>/pipeline_metrics.db
 
 Run:
     python etl_pipeline.py            # full run
     python etl_pipeline.py --dry-run  # extract + transform, skip DB load
+    python etl_pipeline.py --workers 1  # serial extraction (reference path)
+    python etl_pipeline.py --refresh-history  # re-extract frozen completed seasons
+    python etl_pipeline.py --resume   # after a failed run: reuse today's finished units
 """
 
 from __future__ import annotations
 
 import argparse
 import csv
+import hashlib
+import importlib.util
 import io
 import json
 import logging
 import os
-import random
-import re
+import pickle
+import queue
+import shutil
+import sqlite3
 import sys
+import threading
 import time
-import unicodedata
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass, field
+from functools import lru_cache, partial
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
-from typing import Any, Iterable
+from typing import Any, Iterable, Iterator
 
 import pandas as pd
-import requests
-from sqlalchemy import create_engine, text
-from sqlalchemy.engine import Engine
+from requests.adapters import HTTPAdapter
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+from current_tables import refresh_current_tables
+from fc_market import (FantasyCalcPulls, Settings, fc_settings, fetch_fantasycalc, nearest,
+                       players_by_sleeper_id, pull_matrix, store_pulls)
+from http_client import (FOREVER, GITHUB_LIMITER, SESSION, SLEEPER_LIMITER, http_get,
+                         http_report, http_stream, iter_json_object)
+from name_index import build_name_index, match_names, name_lookup, refresh_name_index
+from pipeline_metrics import pipeline_run, stage
+from player_store import PlayerStore
 
 try:
     from dotenv import load_dotenv, find_dotenv
@@ -87,15 +119,13 @@ except ImportError:  # dotenv is optional
 # Configuration
 # --------------------------------------------------------------------------- #
 
-SLEEPER_BASE = "https://api.sleeper.app/v1"
-FANTASYCALC_BASE = "https://api.fantasycalc.com"
+SLEEPER_BASE = os.getenv("SLEEPER_BASE_URL", "https://api.sleeper.app/v1").rstrip("/")
 DP_BASE = "https://raw.githubusercontent.com/dynastyprocess/data/master/files"
 
 DATA_DIR = Path(os.getenv("DATA_DIR", "./data"))
 PLAYER_CACHE_TTL_HOURS = int(os.getenv("PLAYER_CACHE_TTL_HOURS", "24"))
 SNAPSHOT_DATE = datetime.now(timezone.utc).date()
-
-USER_AGENT = "dynasty-portfolio-etl/1.0 (+analytics-portfolio-project)"
+ETL_WORKERS = max(1, int(os.getenv("ETL_WORKERS", "4")))
 
 logging.basicConfig(
     level=logging.INFO,
@@ -109,109 +139,159 @@ log = logging.getLogger("etl")
 
 
 # --------------------------------------------------------------------------- #
-# Defensive HTTP layer: shared session, rate limiting, retry/backoff
+# Defensive HTTP layer: shared session, cross-process rate limiting,
+# retry/backoff. Lives in http_client.py so every pipeline script shares it.
 # --------------------------------------------------------------------------- #
 
-class RateLimiter:
-    """Simple min-interval limiter. Sleeper tolerates ~1000 calls/min; we stay
-    well under that with a conservative default of ~8 req/s."""
-
-    def __init__(self, min_interval_s: float = 0.12) -> None:
-        self.min_interval = min_interval_s
-        self._last = 0.0
-
-    def wait(self) -> None:
-        now = time.monotonic()
-        gap = now - self._last
-        if gap < self.min_interval:
-            time.sleep(self.min_interval - gap)
-        self._last = time.monotonic()
-
-
-SESSION = requests.Session()
-SESSION.headers.update({"User-Agent": USER_AGENT, "Accept": "application/json"})
-SLEEPER_LIMITER = RateLimiter(0.12)
-EXTERNAL_LIMITER = RateLimiter(0.5)  # be gentler with third-party hosts
-
-RETRYABLE = {429, 500, 502, 503, 504}
-
-
-def http_get(
-    url: str,
-    limiter: RateLimiter,
-    *,
-    params: dict | None = None,
-    expect: str = "json",
-    max_retries: int = 5,
-    timeout: int = 30,
-) -> Any | None:
-    """GET with exponential backoff + jitter. Returns None on a clean 404 so
-    callers can treat 'not found' as empty rather than fatal."""
-    last_exc: Exception | None = None
-    for attempt in range(max_retries):
-        limiter.wait()
-        try:
-            resp = SESSION.get(url, params=params, timeout=timeout)
-        except requests.RequestException as exc:
-            last_exc = exc
-            _sleep_backoff(attempt)
-            continue
+# Default pool is 10 connections per host; size it to the worker count so
+# concurrent extraction doesn't churn connections.
+SESSION.mount("https://", HTTPAdapter(pool_maxsize=max(10, ETL_WORKERS)))
 
-        if resp.status_code == 200:
-            return resp.json() if expect == "json" else resp.text
-        if resp.status_code == 404:
-            return None
-        if resp.status_code in RETRYABLE:
-            retry_after = resp.headers.get("Retry-After")
-            if retry_after and retry_after.isdigit():
-                time.sleep(min(60, int(retry_after)))
-            else:
-                _sleep_backoff(attempt)
-            log.warning("Retry %s/%s on %s (HTTP %s)", attempt + 1, max_retries, url, resp.status_code)
-            continue
-        resp.raise_for_status()
 
-    raise RuntimeError(f"GET failed after {max_retries} retries: {url} ({last_exc})")
+# --------------------------------------------------------------------------- #
+# Run journal: checkpoint each finished unit so a failed run can --resume
+# --------------------------------------------------------------------------- #
 
+_JOURNAL_DDL = """
+CREATE TABLE IF NOT EXISTS etl_runs (
+    run_id        INTEGER PRIMARY KEY,
+    snapshot_date TEXT NOT NULL,
+    started_at    TEXT NOT NULL,
+    finished_at   TEXT,
+    status        TEXT NOT NULL           -- running | complete | abandoned
+);
+CREATE TABLE IF NOT EXISTS etl_journal (
+    run_id       INTEGER NOT NULL,
+    unit         TEXT    NOT NULL,        -- 'market:crosswalk', 'league:<id>', ...
+    payload      BLOB    NOT NULL,        -- pickled result (local scratch only)
+    completed_at TEXT    NOT NULL,
+    PRIMARY KEY (run_id, unit)
+);
+"""
 
-def _sleep_backoff(attempt: int, base: float = 1.5, cap: float = 45.0) -> None:
-    time.sleep(min(cap, base ** attempt) + random.uniform(0, 0.75))
+
+class RunJournal:
+    """Per-run record of finished extraction units (a league-season, a history
+    chain, a market pull), each stored with its result the moment it
+    completes. With resume=True the latest unfinished run for today's
+    snapshot_date is reopened and its units are served from the journal
+    instead of the network; otherwise a new run starts and older unfinished
+    ones are discarded. finish() drops the payloads of a completed run.
+
+    Only same-day runs resume: yesterday's market pulls would mislabel today's
+    snapshot."""
+
+    def __init__(self, path: Path, resume: bool = False):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.executescript(_JOURNAL_DDL)
+        self._lock = threading.Lock()
+        self.reused = 0
+        today = SNAPSHOT_DATE.isoformat()
+        row = self._conn.execute(
+            "SELECT run_id FROM etl_runs WHERE status = 'running' AND snapshot_date = ? "
+            "ORDER BY run_id DESC LIMIT 1", (today,)).fetchone() if resume else None
+        if row:
+            self.run_id = row[0]
+            n = self._conn.execute("SELECT COUNT(*) FROM etl_journal WHERE run_id = ?",
+                                   (self.run_id,)).fetchone()[0]
+            log.info("Resuming run %s: %s finished unit(s) in the journal", self.run_id, n)
+            return
+        if resume:
+            log.info("--resume: no unfinished run for %s; starting fresh", today)
+        self._conn.execute("UPDATE etl_runs SET status = 'abandoned' WHERE status = 'running'")
+        self._conn.execute("DELETE FROM etl_journal WHERE run_id NOT IN "
+                           "(SELECT run_id FROM etl_runs WHERE status = 'running')")
+        self.run_id = self._conn.execute(
+            "INSERT INTO etl_runs (snapshot_date, started_at, status) VALUES (?, ?, 'running')",
+            (today, datetime.now(timezone.utc).isoformat(timespec="seconds"))).lastrowid
+
+    def unit(self, key: str, fn, *args, **kwargs) -> Any:
+        """fn(*args, **kwargs), or its journaled result if this run already has it."""
+        with self._lock:
+            row = self._conn.execute("SELECT payload FROM etl_journal WHERE run_id = ? AND unit = ?",
+                                     (self.run_id, key)).fetchone()
+        if row:
+            self.reused += 1
+            return pickle.loads(row[0])
+        result = fn(*args, **kwargs)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO etl_journal VALUES (?, ?, ?, ?)",
+                (self.run_id, key, pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL),
+                 datetime.now(timezone.utc).isoformat(timespec="seconds")))
+        return result
+
+    def finish(self) -> None:
+        with self._lock:
+            self._conn.execute("UPDATE etl_runs SET status = 'complete', finished_at = ? WHERE run_id = ?",
+                               (datetime.now(timezone.utc).isoformat(timespec="seconds"), self.run_id))
+            self._conn.execute("DELETE FROM etl_journal WHERE run_id = ?", (self.run_id,))
+
+
+class _NoJournal:
+    """Stand-in when no journal is wanted: every unit runs."""
+    reused = 0
+
+    @staticmethod
+    def unit(key: str, fn, *args, **kwargs) -> Any:
+        return fn(*args, **kwargs)
 
 
 # --------------------------------------------------------------------------- #
 # Sleeper extraction
 # --------------------------------------------------------------------------- #
 
-def resolve_user_id() -> dict:
-    uid = os.getenv("SLEEPER_USER_ID", "").strip()
-    if uid:
-        data = http_get(f"{SLEEPER_BASE}/user/{uid}", SLEEPER_LIMITER)
-    else:
-        username = os.getenv("SLEEPER_USERNAME", "").strip()
-        if not username:
-            raise SystemExit("Set SLEEPER_USERNAME or SLEEPER_USER_ID in your environment / .env")
-        data = http_get(f"{SLEEPER_BASE}/user/{username}", SLEEPER_LIMITER)
-    if not data:
-        raise SystemExit("Sleeper user not found — check SLEEPER_USERNAME/SLEEPER_USER_ID")
-    log.info("Resolved Sleeper user: %s (%s)", data.get("display_name"), data["user_id"])
-    return data
-
-
-def get_player_db() -> dict[str, dict]:
-    """The /players/nfl payload is ~15 MB; cache to disk with a TTL so we don't
-    re-pull it every run (Sleeper explicitly asks callers not to)."""
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-    cache = DATA_DIR / "sleeper_players.json"
-    if cache.exists():
-        age_h = (time.time() - cache.stat().st_mtime) / 3600
-        if age_h < PLAYER_CACHE_TTL_HOURS:
-            log.info("Using cached player DB (%.1f h old)", age_h)
-            return pd.read_json(cache, typ="series").to_dict()
-    log.info("Fetching Sleeper player DB (~15 MB)...")
-    data = http_get(f"{SLEEPER_BASE}/players/nfl", SLEEPER_LIMITER)
-    cache.write_text(pd.Series(data).to_json())
-    log.info("Player DB cached: %s players", len(data))
-    return data
+def _env_list(*names: str) -> list[str]:
+    """Comma-separated values across the given env vars, in order, deduped."""
+    vals = (v.strip() for n in names for v in os.getenv(n, "").split(","))
+    return list(dict.fromkeys(v for v in vals if v))
+
+
+def resolve_users() -> list[dict]:
+    """Every configured Sleeper user (ids first, then usernames), deduped by
+    user_id — the same manager listed by id and by name is one user."""
+    keys = _env_list("SLEEPER_USER_ID", "SLEEPER_USER_IDS") + _env_list("SLEEPER_USERNAME", "SLEEPER_USERNAMES")
+    if not keys:
+        raise SystemExit("Set SLEEPER_USERNAME(S) or SLEEPER_USER_ID(S) in your environment / .env")
+    users: dict[str, dict] = {}
+    for key in keys:
+        data = http_get(f"{SLEEPER_BASE}/user/{key}", SLEEPER_LIMITER)
+        if not data:
+            raise SystemExit(f"Sleeper user {key!r} not found — check SLEEPER_USERNAME(S)/SLEEPER_USER_ID(S)")
+        log.info("Resolved Sleeper user: %s (%s)", data.get("display_name"), data["user_id"])
+        users.setdefault(data["user_id"], data)
+    return list(users.values())
+
+
+def get_player_db() -> PlayerStore:
+    """The /players/nfl payload is ~15 MB; keep a slim SQLite copy with a TTL
+    so we don't re-pull it every run (Sleeper explicitly asks callers not to).
+    The download is parsed member-by-member as it streams in and written
+    straight to the store — it is never held in memory whole."""
+    store = PlayerStore(DATA_DIR / "sleeper_players.db")
+    age_h = store.age_hours()
+    if age_h is not None and age_h < PLAYER_CACHE_TTL_HOURS:
+        log.info("Using cached player DB (%.1f h old, %s players)", age_h, len(store))
+        return store
+
+    # One-time migration from the old whole-payload JSON cache, if still fresh
+    legacy = DATA_DIR / "sleeper_players.json"
+    if age_h is None and legacy.exists():
+        mtime = legacy.stat().st_mtime
+        if (time.time() - mtime) / 3600 < PLAYER_CACHE_TTL_HOURS:
+            with legacy.open(encoding="utf-8") as fh:
+                n = store.replace(iter_json_object(iter(lambda: fh.read(1 << 16), "")), fetched_at=mtime)
+            log.info("Player DB imported from %s: %s players", legacy.name, n)
+            return store
+
+    log.info("Streaming Sleeper player DB (~15 MB)...")
+    with http_stream(f"{SLEEPER_BASE}/players/nfl", SLEEPER_LIMITER) as chunks:
+        if chunks is None:
+            raise RuntimeError("Sleeper /players/nfl returned 404")
+        n = store.replace(iter_json_object(chunks))
+    log.info("Player DB stored: %s players", n)
+    return store
 
 
 def get_user_leagues(user_id: str, season: str) -> list[dict]:
@@ -224,21 +304,39 @@ def get_user_leagues(user_id: str, season: str) -> list[dict]:
     return leagues
 
 
-def walk_league_history(league: dict) -> list[dict]:
+def get_leagues_for_users(users: list[dict], season: str) -> list[dict]:
+    """The union of the users' leagues, one record per league_id (first seen
+    wins), so a league two managers share is crawled, priced and loaded once."""
+    leagues: dict[str, dict] = {}
+    for u in users:
+        for lg in get_user_leagues(u["user_id"], season):
+            leagues.setdefault(lg["league_id"], lg)
+    if len(users) > 1:
+        log.info("%s distinct league(s) across %s user(s)", len(leagues), len(users))
+    return list(leagues.values())
+
+
+def walk_league_history(league: dict, frozen: dict[str, dict] | None = None) -> list[dict]:
     """Follow previous_league_id back through prior seasons. Sleeper retains the
-    full chain — this is how we backfill roster/transaction history."""
-    chain = [league]
+    full chain — this is how we backfill roster/transaction history.
+
+    Seasons in `frozen` (completed and already loaded, see load_frozen_seasons)
+    are not fetched: their warehouse record stands in for the node and supplies
+    the next previous_league_id, so the walk continues without HTTP."""
+    frozen = frozen or {}
+    chain = [frozen.get(league["league_id"], league)]
     if os.getenv("BACKFILL_PREVIOUS_SEASONS", "true").lower() != "true":
         return chain
     prev = league.get("previous_league_id")
     while prev and prev != "0":
-        node = http_get(f"{SLEEPER_BASE}/league/{prev}", SLEEPER_LIMITER)
+        node = frozen.get(prev) or http_get(f"{SLEEPER_BASE}/league/{prev}", SLEEPER_LIMITER)
         if not node:
             break
         chain.append(node)
         prev = node.get("previous_league_id")
     if len(chain) > 1:
-        log.info("League '%s' history chain: %s seasons", league.get("name"), len(chain))
+        n_frozen = sum(bool(n.get("_frozen")) for n in chain)
+        log.info("League '%s' history chain: %s seasons (%s frozen)", league.get("name"), len(chain), n_frozen)
     return chain
 
 
@@ -259,48 +357,174 @@ def parse_league_settings(league: dict) -> dict:
         # Full settings so points_model.py can score each league EXACTLY (TEP, bonuses).
         "scoring_settings_json": json.dumps(scoring),
         "roster_positions_json": json.dumps(rp),
+        # Once loaded, a completed season is never re-extracted (see walk_league_history)
+        "is_frozen": is_completed_season(league),
     }
 
 
-def get_rosters(league_id: str) -> list[dict]:
-    return http_get(f"{SLEEPER_BASE}/league/{league_id}/rosters", SLEEPER_LIMITER) or []
+@lru_cache(maxsize=1)
+def get_nfl_state() -> dict:
+    """Current NFL season/week per Sleeper. Fetched once per run, never cached."""
+    return http_get(f"{SLEEPER_BASE}/state/nfl", SLEEPER_LIMITER, ttl=None) or {}
+
+
+@dataclass(frozen=True)
+class WeekBounds:
+    season: str
+    upper: int      # last week that can have activity yet
+    closed: int     # weeks <= closed are scored and will not change
+    final: bool     # completed season: closed == upper for good
+
 
+def league_week_bounds(league: dict) -> WeekBounds:
+    last_scored = int((league.get("settings") or {}).get("last_scored_leg") or 0)
+    season = str(league.get("season"))
+    if is_completed_season(league):
+        final = last_scored or 18
+        return WeekBounds(season, final, final, True)
+    state = get_nfl_state()
+    current = int(state.get("leg") or state.get("week") or 0) if str(state.get("season")) == season else 0
+    return WeekBounds(season, max(last_scored, current), last_scored, False)
 
-def get_league_users(league_id: str) -> list[dict]:
-    return http_get(f"{SLEEPER_BASE}/league/{league_id}/users", SLEEPER_LIMITER) or []
 
+def is_completed_season(league: dict) -> bool:
+    """A finished league-season never changes again, so anything fetched for
+    it can be cached forever (ttl=FOREVER) instead of revalidated."""
+    return league.get("status") == "complete"
 
-def get_traded_picks(league_id: str) -> list[dict]:
-    return http_get(f"{SLEEPER_BASE}/league/{league_id}/traded_picks", SLEEPER_LIMITER) or []
 
+# `ttl` is forwarded to http_get's response cache: None keeps the default
+# endpoint policy, FOREVER marks a payload the caller knows is immutable.
 
-def get_transactions(league_id: str, weeks: Iterable[int]) -> list[dict]:
+def get_rosters(league_id: str, ttl: float | None = None) -> list[dict]:
+    return _sleeper_get(f"/league/{league_id}/rosters", ttl) or []
+
+
+def get_league_users(league_id: str, ttl: float | None = None) -> list[dict]:
+    return _sleeper_get(f"/league/{league_id}/users", ttl) or []
+
+
+def get_traded_picks(league_id: str, ttl: float | None = None) -> list[dict]:
+    return _sleeper_get(f"/league/{league_id}/traded_picks", ttl) or []
+
+
+def _sleeper_get(path: str, ttl: float | None) -> Any | None:
+    url = f"{SLEEPER_BASE}{path}"
+    return http_get(url, SLEEPER_LIMITER) if ttl is None else http_get(url, SLEEPER_LIMITER, ttl=ttl)
+
+
+def get_transactions(league_id: str, weeks: Iterable[int], ttl: float | None = None) -> list[dict]:
     out: list[dict] = []
     for wk in weeks:
-        rows = http_get(f"{SLEEPER_BASE}/league/{league_id}/transactions/{wk}", SLEEPER_LIMITER) or []
+        rows = _sleeper_get(f"/league/{league_id}/transactions/{wk}", ttl) or []
         for r in rows:
             r["_week"] = wk
         out.extend(rows)
     return out
 
 
-def get_matchups(league_id: str, weeks: Iterable[int]) -> list[dict]:
+def get_matchups(league_id: str, weeks: Iterable[int], ttl: float | None = None) -> list[dict]:
     out: list[dict] = []
     for wk in weeks:
-        rows = http_get(f"{SLEEPER_BASE}/league/{league_id}/matchups/{wk}", SLEEPER_LIMITER) or []
+        rows = _sleeper_get(f"/league/{league_id}/matchups/{wk}", ttl) or []
         for r in rows:
             r["_week"] = wk
         out.extend(rows)
     return out
 
 
+def extract_league_season(node: dict) -> dict:
+    """Everything the star schema needs from ONE league-season: settings,
+    rosters, managers (roster owner joined to league users) and traded picks.
+    Self-contained so league-seasons can be extracted concurrently."""
+    meta = parse_league_settings(node)
+    lid = meta["league_id"]
+    ttl = FOREVER if is_completed_season(node) else None
+
+    rosters = get_rosters(lid, ttl)
+    users = {u["user_id"]: u for u in get_league_users(lid, ttl)}
+    managers = []
+    for r in rosters:
+        u = users.get(r.get("owner_id"), {})
+        managers.append({
+            "roster_id": r["roster_id"],
+            "league_id": lid,
+            "sleeper_user_id": r.get("owner_id"),
+            "sleeper_username": u.get("display_name"),
+            "owner_name": (u.get("metadata") or {}).get("team_name") or u.get("display_name"),
+        })
+
+    tp = get_traded_picks(lid, ttl)
+    for t in tp:
+        t["league_id"] = lid
+    return {"league_id": lid, "frozen": False, "meta": meta, "rosters": rosters,
+            "managers": managers, "traded_picks": tp, "weeks": league_week_bounds(node)}
+
+
+def _extract(node: dict, journal: RunJournal | _NoJournal = _NoJournal()) -> dict:
+    """extract_league_season, except a frozen season is served from the
+    warehouse record: its last-loaded rosters still feed today's fact snapshot,
+    while its league/manager/pick rows are already loaded and left alone."""
+    if node.get("_frozen"):
+        return {"league_id": node["league_id"], "frozen": True, "meta": None,
+                "fc_settings": node["fc_settings"],
+                "rosters": node["rosters"], "managers": [], "traded_picks": [], "weeks": None}
+    return journal.unit(f"league:{node['league_id']}", extract_league_season, node)
+
+
+def iter_league_units(leagues: list[dict], workers: int | None = None,
+                      frozen: dict[str, dict] | None = None,
+                      journal: RunJournal | _NoJournal = _NoJournal()) -> Iterator[dict]:
+    """Walk every league's history and extract each league-season, yielding
+    units as they complete (in a stable order) so downstream stages can start
+    on the first one while the rest are still in flight.
+
+    workers=1 is the original serial crawl. With more workers, history chains
+    are walked in parallel (each chain is inherently sequential) and each
+    chain's league-seasons are submitted to the same bounded pool as soon as
+    the chain is known. All calls still go through the shared SLEEPER_LIMITER,
+    so the per-host request budget is unchanged — the pool only overlaps
+    network latency. Output order matches the serial path.
+
+    Each walked chain and each extracted league-season is a journal unit."""
+    workers = ETL_WORKERS if workers is None else workers
+
+    def walk(lg: dict) -> list[dict]:
+        return journal.unit(f"chain:{lg['league_id']}", walk_league_history, lg, frozen)
+
+    extract = partial(_extract, journal=journal)
+    if workers <= 1:
+        for lg in leagues:
+            for node in walk(lg):
+                yield extract(node)
+        return
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="extract")
+    try:
+        pending: deque[Future] = deque()
+        for chain in pool.map(walk, leagues):
+            pending.extend(pool.submit(extract, node) for node in chain)
+            while pending and pending[0].done():
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def extract_leagues(leagues: list[dict], workers: int | None = None,
+                    frozen: dict[str, dict] | None = None,
+                    journal: RunJournal | _NoJournal = _NoJournal()) -> list[dict]:
+    """iter_league_units, collected."""
+    return list(iter_league_units(leagues, workers, frozen, journal))
+
+
 # --------------------------------------------------------------------------- #
 # Market value extraction
 # --------------------------------------------------------------------------- #
 
 def fetch_crosswalk() -> pd.DataFrame:
     """DynastyProcess db_playerids.csv: sleeper_id <-> ktc_id <-> fantasypros_id."""
-    txt = http_get(f"{DP_BASE}/db_playerids.csv", EXTERNAL_LIMITER, expect="text")
+    txt = http_get(f"{DP_BASE}/db_playerids.csv", GITHUB_LIMITER, expect="text")
     df = pd.read_csv(io.StringIO(txt), dtype=str)
     keep = ["sleeper_id", "ktc_id", "fantasypros_id", "mfl_id", "name", "merge_name", "position", "team"]
     df = df[[c for c in keep if c in df.columns]].copy()
@@ -310,61 +534,23 @@ def fetch_crosswalk() -> pd.DataFrame:
 
 def fetch_dynastyprocess_values() -> pd.DataFrame:
     """Player-level SF/1QB values. value_2qb = Superflex market value."""
-    txt = http_get(f"{DP_BASE}/values-players.csv", EXTERNAL_LIMITER, expect="text")
+    txt = http_get(f"{DP_BASE}/values-players.csv", GITHUB_LIMITER, expect="text")
     df = pd.read_csv(io.StringIO(txt))
     df = df.rename(columns={"fp_id": "fantasypros_id"})
     df["fantasypros_id"] = df["fantasypros_id"].astype(str)
     return df[["fantasypros_id", "player", "pos", "value_1qb", "value_2qb", "ecr_2qb", "scrape_date"]]
 
 
-def fetch_fantasycalc(num_qbs: int, num_teams: int, ppr: float) -> pd.DataFrame:
-    """FantasyCalc current values; each record carries sleeperId for a clean join.
-    Returns players AND draft picks (picks come back with position == 'PICK')."""
-    params = {"isDynasty": "true", "numQbs": num_qbs, "numTeams": num_teams, "ppr": max(ppr, 0)}
-    data = http_get(f"{FANTASYCALC_BASE}/values/current", EXTERNAL_LIMITER, params=params) or []
-    rows = []
-    for rec in data:
-        p = rec.get("player", {}) or {}
-        rows.append({
-            "sleeper_id": p.get("sleeperId"),
-            "mfl_id": p.get("mflId"),
-            "fc_name": p.get("name"),
-            "position": p.get("position"),
-            "fc_value": rec.get("value"),
-            "fc_redraft_value": rec.get("redraftValue"),
-            "fc_overall_rank": rec.get("overallRank"),
-            "fc_position_rank": rec.get("positionRank"),
-            "fc_trend_30day": rec.get("trend30Day"),
-            "fc_adp": rec.get("maybeAdp"),
-        })
-    df = pd.DataFrame(rows)
-    log.info("FantasyCalc: %s assets (numQbs=%s, numTeams=%s)", len(df), num_qbs, num_teams)
-    return df
-
-
 # --------------------------------------------------------------------------- #
 # Normalization / crosswalk join
 # --------------------------------------------------------------------------- #
 
-_SUFFIXES = re.compile(r"\b(jr|sr|ii|iii|iv|v)\b")
-
-
-def _norm_name(name: str | None) -> str:
-    """Normalize a player name for fuzzy identity matching: strip accents,
-    punctuation, and generational suffixes; lowercase; collapse whitespace."""
-    if not isinstance(name, str):
-        return ""
-    s = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode()
-    s = _SUFFIXES.sub("", s.lower())
-    s = re.sub(r"[^a-z ]", "", s)
-    return re.sub(r"\s+", " ", s).strip()
-
-
 def normalize_market_values(
     fc_by_format: dict[int, pd.DataFrame],
     dp: pd.DataFrame,
     crosswalk: pd.DataFrame,
-    player_db: dict[str, dict],
+    player_db: PlayerStore,
+    name_index: pd.DataFrame | None = None,
 ) -> tuple[pd.DataFrame, pd.DataFrame]:
     """Produce one row per sleeper_id with the PRIMARY (DynastyProcess FantasyPros
     ECR) values plus the SECONDARY (FantasyCalc) cross-check.
@@ -372,13 +558,16 @@ def normalize_market_values(
     PRIMARY  : DynastyProcess values-players.csv -> fp_value_1qb / fp_value_2qb /
                fp_ecr_2qb. Keyed on fantasypros_id, mapped to sleeper_id via the
                crosswalk. This is the valuation the dashboard runs on.
-    SECONDARY: FantasyCalc current values, pulled once per QB format the user's
-               leagues need (1 and/or 2). Already keyed on sleeper_id (direct
-               join). Demoted to a cross-check; the FP-vs-FC gap is the arbitrage
-               signal in Phase 3.
+    SECONDARY: FantasyCalc current values, one pull per QB format the user's
+               leagues need (1 and/or 2) — the baseline; league_market()
+               re-prices it per league settings. Already keyed on sleeper_id
+               (direct join). Demoted to a cross-check; the FP-vs-FC gap is the
+               arbitrage signal in Phase 3.
 
     Both 1QB and SF values are stored so each league resolves its own format in
     the Tableau semantic layer. Unmatched DP rows are logged to unmatched_players.csv.
+    `name_index` is the player_name_index for the fallback (built from
+    player_db when not given).
     """
     # ---- PRIMARY: DP FantasyPros ECR -> sleeper_id via crosswalk ----
     # Dedupe the mapping: db_playerids can list a player across multiple seasons,
@@ -388,22 +577,17 @@ def normalize_market_values(
 
     # Fallback: the DynastyProcess crosswalk lags for brand-new rookies, so their
     # sleeper_id is blank right after a rookie draft. Recover those by matching
-    # normalized name + position against the authoritative Sleeper player DB —
-    # this is what keeps freshly-drafted rookies from being valued at NULL.
+    # normalized name + position against the Sleeper player DB's name index
+    # (name_index.py) — this is what keeps freshly-drafted rookies from being
+    # valued at NULL.
     miss = dp_mapped["sleeper_id"].isna()
     if miss.any():
-        name_pos_lut: dict[tuple[str, str], str] = {}
-        for pid, rec in player_db.items():
-            nm = _norm_name(rec.get("full_name"))
-            pos = rec.get("position")
-            if nm and pos:
-                name_pos_lut.setdefault((nm, pos), str(pid))
-        recovered = [
-            name_pos_lut.get((_norm_name(n), p))
-            for n, p in zip(dp_mapped.loc[miss, "player"], dp_mapped.loc[miss, "pos"])
-        ]
+        if name_index is None:
+            name_index = build_name_index(player_db)
+        recovered = match_names(dp_mapped.loc[miss, "player"], dp_mapped.loc[miss, "pos"],
+                                name_lookup(name_index))
         dp_mapped.loc[miss, "sleeper_id"] = recovered
-        n_rec = sum(x is not None for x in recovered)
+        n_rec = int(recovered.notna().sum())
         if n_rec:
             log.info("Crosswalk fallback recovered %s player(s) by name+position (likely rookies)", n_rec)
 
@@ -434,12 +618,9 @@ def normalize_market_values(
         merged = merged.merge(adp_trend, on="sleeper_id", how="left")
 
     # ---- Enrich names/positions from the authoritative Sleeper player DB ----
-    def enrich(sid: str, col: str, default=None):
-        rec = player_db.get(str(sid)) or {}
-        return rec.get(col, default)
-
-    merged["player_name"] = merged["sleeper_id"].map(lambda s: enrich(s, "full_name"))
-    merged["position"] = merged["sleeper_id"].map(lambda s: enrich(s, "position"))
+    names = player_db.frame(merged["sleeper_id"], ["full_name", "position"])
+    merged["player_name"] = names["full_name"].to_numpy()
+    merged["position"] = names["position"].to_numpy()
 
     if len(unmatched_dp):
         path = DATA_DIR / "unmatched_players.csv"
@@ -474,33 +655,84 @@ def build_frames(
     managers: list[dict],
     rosters_by_league: dict[str, list[dict]],
     market: pd.DataFrame,
-    player_db: dict[str, dict],
+    player_db: PlayerStore,
     traded_picks: list[dict],
 ) -> Frames:
-    f = Frames()
-    f.dim_leagues = pd.DataFrame(leagues_meta)
-    f.dim_managers = pd.DataFrame(managers).drop_duplicates(subset=["roster_id", "league_id"])
+    """All frames in one pass (the --dry-run path). The pipelined run builds
+    the same frames per league-season with build_league_frames and
+    dim_players once at the end."""
+    f = build_league_frames(leagues_meta, managers, rosters_by_league, market_index(market), traded_picks)
+    f.dim_players = build_dim_players(player_db, rostered_ids(rosters_by_league))
+    return f
+
 
-    # Dim_Players from the Sleeper DB, restricted to rostered players for compactness
-    rostered = {
+def rostered_ids(rosters_by_league: dict[str, list[dict]]) -> set[str]:
+    return {
         str(pid)
         for rs in rosters_by_league.values()
         for r in rs
         for pid in (r.get("players") or [])
     }
-    prows = []
-    for pid in rostered:
-        rec = player_db.get(pid, {})
-        prows.append({
-            "player_id": pid,
-            "player_name": rec.get("full_name"),
-            "position": rec.get("position"),
-            "age": rec.get("age"),
-            "nfl_team": rec.get("team"),
-            "years_exp": rec.get("years_exp"),
-            "is_rookie": (rec.get("years_exp") == 0),
-        })
-    f.dim_players = pd.DataFrame(prows)
+
+
+def build_dim_players(player_db: PlayerStore, rostered: set[str]) -> pd.DataFrame:
+    """Dim_Players covers the whole Sleeper universe (plus any rostered id the
+    DB no longer knows, with NULL attributes), so dropped/cut players keep
+    resolving in the views. sync_dim_players writes only the rows whose
+    content_hash moved, and never a NULL row over a stored one."""
+    recs = player_db.frame()
+    recs = recs.reindex(recs.index.union(sorted(rostered)))
+    df = pd.DataFrame({
+        "player_id": recs.index,
+        "player_name": recs["full_name"].to_numpy(),
+        "position": recs["position"].to_numpy(),
+        "age": recs["age"].to_numpy(),
+        "nfl_team": recs["team"].to_numpy(),
+        "years_exp": recs["years_exp"].to_numpy(),
+        "is_rookie": (recs["years_exp"] == 0).to_numpy(),
+    })
+    df["content_hash"] = content_hash(df, PLAYER_HASH_COLS)
+    return df
+
+
+def market_index(market: pd.DataFrame) -> pd.DataFrame:
+    """Market rows keyed by sleeper_id, deduped so a join always finds one
+    record — never fans out — regardless of duplicate market rows."""
+    return (market.drop_duplicates(subset=["sleeper_id"], keep="first")
+                  .set_index("sleeper_id"))
+
+
+def league_market(mv: pd.DataFrame, pulls: dict[Settings, pd.DataFrame], settings: Settings) -> pd.DataFrame:
+    """`mv` (market_index) with its FantasyCalc columns priced for one
+    league's settings: the league's own QB format from its exact pull (ADP and
+    30-day trend too), the other format from the nearest pull of that format.
+    A format with no pull keeps the baseline columns."""
+    out = mv
+    for q in (settings[0], 3 - settings[0]):
+        s = settings if q == settings[0] else nearest(settings, pulls, q)
+        if s is None or s not in pulls:
+            continue
+        fc = players_by_sleeper_id(pulls[s])
+        out = out.reindex(out.index.union(fc.index)) if out is mv else out
+        out[f"fc_value_{q}qb"] = fc["fc_value"].reindex(out.index)
+        if s == settings:
+            out["fc_adp"] = fc["fc_adp"].reindex(out.index)
+            out["fc_trend_30day"] = fc["fc_trend_30day"].reindex(out.index)
+    return out
+
+
+def build_league_frames(
+    leagues_meta: list[dict],
+    managers: list[dict],
+    rosters_by_league: dict[str, list[dict]],
+    mv: pd.DataFrame,
+    traded_picks: list[dict],
+) -> Frames:
+    """Every frame except dim_players, for any subset of league-seasons."""
+    f = Frames()
+    f.dim_leagues = pd.DataFrame(leagues_meta)
+    f.dim_managers = (pd.DataFrame(managers).drop_duplicates(subset=["roster_id", "league_id"])
+                      if managers else pd.DataFrame())
 
     # Dim_Draft_Picks (current ownership from traded_picks)
     f.dim_draft_picks = pd.DataFrame([
@@ -517,44 +749,64 @@ def build_frames(
         for tp in rows
     ]) if traded_picks else pd.DataFrame()
 
-    # Fact: one row per (snapshot_date, league, roster, player).
-    # Use a dict keyed by sleeper_id (deduped) so a lookup always returns one
-    # record — never a multi-row Series — regardless of duplicate market rows.
-    mv = (market.drop_duplicates(subset=["sleeper_id"], keep="first")
-                .set_index("sleeper_id")
-                .to_dict("index"))
-
-    def val(row: dict | None, col: str):
-        if not row:
-            return None
-        v = row.get(col)
-        return None if v is None or pd.isna(v) else v
-
-    fact_rows = []
-    for lg, rs in rosters_by_league.items():
-        for r in rs:
-            rid = r["roster_id"]
-            for pid in (r.get("players") or []):
-                row = mv.get(str(pid))
-                fact_rows.append({
-                    "snapshot_date": SNAPSHOT_DATE,
-                    "league_id": lg,
-                    "roster_id": rid,
-                    "player_id": str(pid),
-                    # PRIMARY: FantasyPros ECR (DynastyProcess)
-                    "fp_value_1qb": val(row, "fp_value_1qb"),
-                    "fp_value_2qb": val(row, "fp_value_2qb"),
-                    "fp_ecr_2qb": val(row, "fp_ecr_2qb"),
-                    # SECONDARY: FantasyCalc cross-check (per format)
-                    "fc_value_1qb": val(row, "fc_value_1qb"),
-                    "fc_value_2qb": val(row, "fc_value_2qb"),
-                    "sleeper_adp_value": val(row, "fc_adp"),
-                    "fc_trend_30day": val(row, "fc_trend_30day"),
-                })
-    f.fact_roster_value = pd.DataFrame(fact_rows)
+    f.fact_roster_value = build_fact(rosters_by_league, mv)
     return f
 
 
+# fact column -> market column
+FACT_VALUE_COLS = {
+    # PRIMARY: FantasyPros ECR (DynastyProcess)
+    "fp_value_1qb": "fp_value_1qb",
+    "fp_value_2qb": "fp_value_2qb",
+    "fp_ecr_2qb": "fp_ecr_2qb",
+    # SECONDARY: FantasyCalc cross-check (per format)
+    "fc_value_1qb": "fc_value_1qb",
+    "fc_value_2qb": "fc_value_2qb",
+    "sleeper_adp_value": "fc_adp",
+    "fc_trend_30day": "fc_trend_30day",
+}
+
+
+def build_fact(rosters_by_league: dict[str, list[dict]], mv: pd.DataFrame) -> pd.DataFrame:
+    """Fact: one row per (snapshot_date, league, roster, player), built
+    columnar: one (league, roster, [players]) row per roster, exploded to one
+    row per player, then a single left merge against the market table.
+    Players the market doesn't value get NULLs; row order follows the rosters."""
+    rosters = pd.DataFrame(
+        [(lg, r["roster_id"], r.get("players") or []) for lg, rs in rosters_by_league.items() for r in rs],
+        columns=["league_id", "roster_id", "player_id"],
+    ).explode("player_id").dropna(subset=["player_id"])
+    if rosters.empty:
+        return pd.DataFrame()
+    rosters["player_id"] = rosters["player_id"].astype(str)
+    values = (mv.reindex(columns=list(FACT_VALUE_COLS.values()))
+                .set_axis(list(FACT_VALUE_COLS), axis=1)
+                .rename_axis("player_id").reset_index())
+    fact = rosters.merge(values, on="player_id", how="left", sort=False)
+    fact.insert(0, "snapshot_date", SNAPSHOT_DATE)
+    return fact.reset_index(drop=True)
+
+
+PLAYER_HASH_COLS = ["player_name", "position", "age", "nfl_team", "years_exp", "is_rookie"]
+
+
+def content_hash(df: pd.DataFrame, cols: list[str]) -> pd.Series:
+    """Per-row digest of `cols`. Values are canonicalized first (NaN/None -> '',
+    25.0 -> '25') so a dtype change between runs doesn't read as a change."""
+    def canon(v: Any) -> str:
+        if v is None or (isinstance(v, float) and v != v):
+            return ""
+        if isinstance(v, float) and v.is_integer():
+            return str(int(v))
+        return str(v)
+
+    return pd.Series(
+        [hashlib.sha1("\x1f".join(map(canon, row)).encode()).hexdigest()[:16]
+         for row in df[cols].itertuples(index=False, name=None)],
+        index=df.index, dtype=object,
+    )
+
+
 def traded_picks_by_league(rows: list[dict]) -> dict[str, list[dict]]:
     out: dict[str, list[dict]] = {}
     for r in rows:
@@ -579,7 +831,8 @@ CREATE TABLE IF NOT EXISTS dim_leagues (
     ppr                 NUMERIC,
     previous_league_id  TEXT,
     scoring_settings_json TEXT,
-    roster_positions_json TEXT
+    roster_positions_json TEXT,
+    is_frozen           BOOLEAN
 );
 CREATE TABLE IF NOT EXISTS dim_managers (
     roster_id        INT,
@@ -596,7 +849,9 @@ CREATE TABLE IF NOT EXISTS dim_players (
     age         NUMERIC,
     nfl_team    TEXT,
     years_exp   INT,
-    is_rookie   BOOLEAN
+    is_rookie   BOOLEAN,
+    content_hash    TEXT,
+    last_changed_at TEXT
 );
 CREATE TABLE IF NOT EXISTS dim_draft_picks (
     pick_id            TEXT PRIMARY KEY,
@@ -610,11 +865,16 @@ CREATE TABLE IF NOT EXISTS dim_draft_picks (
     pick_value_2qb     NUMERIC,
     pick_value_tier    TEXT
 );
-CREATE TABLE IF NOT EXISTS fact_roster_historical_value (
-    snapshot_date      DATE    NOT NULL,
+-- Roster value fact, change-only (SCD2): one row per (league, roster, player)
+-- per stretch of snapshots over which ownership and all values stayed the
+-- same. valid_to is the first snapshot_date the row no longer held (NULL =
+-- still current). fact_roster_historical_value rebuilds the daily grain.
+CREATE TABLE IF NOT EXISTS fact_roster_value_scd (
     league_id          TEXT    NOT NULL,
     roster_id          INT     NOT NULL,
     player_id          TEXT    NOT NULL,
+    valid_from         DATE    NOT NULL,
+    valid_to           DATE,
     fp_value_1qb       NUMERIC,   -- PRIMARY: FantasyPros ECR value, 1QB
     fp_value_2qb       NUMERIC,   -- PRIMARY: FantasyPros ECR value, Superflex
     fp_ecr_2qb         NUMERIC,   -- PRIMARY: FantasyPros consensus rank, Superflex
@@ -622,10 +882,70 @@ CREATE TABLE IF NOT EXISTS fact_roster_historical_value (
     fc_value_2qb       NUMERIC,   -- SECONDARY: FantasyCalc cross-check, Superflex
     sleeper_adp_value  NUMERIC,
     fc_trend_30day     NUMERIC,
-    PRIMARY KEY (snapshot_date, league_id, roster_id, player_id)
+    PRIMARY KEY (league_id, roster_id, player_id, valid_from)
+);
+CREATE INDEX IF NOT EXISTS ix_scd_player ON fact_roster_value_scd(player_id);
+CREATE INDEX IF NOT EXISTS ix_scd_league_from ON fact_roster_value_scd(league_id, valid_from);
+
+-- The days each league was snapshotted: the daily grain the view expands to.
+CREATE TABLE IF NOT EXISTS fact_snapshot_calendar (
+    league_id      TEXT NOT NULL,
+    snapshot_date  DATE NOT NULL,
+    PRIMARY KEY (league_id, snapshot_date)
+);
+
+CREATE VIEW IF NOT EXISTS fact_roster_historical_value AS
+SELECT c.snapshot_date, s.league_id, s.roster_id, s.player_id,
+       s.fp_value_1qb, s.fp_value_2qb, s.fp_ecr_2qb, s.fc_value_1qb, s.fc_value_2qb,
+       s.sleeper_adp_value, s.fc_trend_30day
+FROM fact_snapshot_calendar c
+JOIN fact_roster_value_scd s
+  ON s.league_id = c.league_id
+ AND s.valid_from <= c.snapshot_date
+ AND (s.valid_to IS NULL OR c.snapshot_date < s.valid_to);
+
+-- One row per transaction leg (an add or a drop of a player or a pick). No
+-- primary key: pick legs have no player_id, which PostgreSQL would reject in
+-- a PK. Loads are delete-then-insert per league-week, so re-runs stay exact.
+CREATE TABLE IF NOT EXISTS fact_transactions (
+    transaction_id     TEXT    NOT NULL,
+    league_id          TEXT    NOT NULL,
+    week               INT,
+    txn_type           TEXT,
+    status             TEXT,
+    status_updated_ms  BIGINT,
+    txn_date           TEXT,
+    roster_id          INT,
+    player_id          TEXT,
+    leg                TEXT,
+    draft_pick_season  TEXT,
+    draft_pick_round   INT
+);
+CREATE INDEX IF NOT EXISTS ix_txn_league_week ON fact_transactions(league_id, week);
+CREATE INDEX IF NOT EXISTS ix_txn_player ON fact_transactions(player_id);
+
+CREATE TABLE IF NOT EXISTS fact_weekly_player_points (
+    league_id   TEXT    NOT NULL,
+    season      TEXT,
+    week        INT     NOT NULL,
+    roster_id   INT     NOT NULL,
+    matchup_id  INT,
+    player_id   TEXT    NOT NULL,
+    points      NUMERIC,
+    is_starter  BOOLEAN,
+    PRIMARY KEY (league_id, week, roster_id, player_id)
+);
+CREATE INDEX IF NOT EXISTS ix_wpp_player ON fact_weekly_player_points(player_id);
+
+-- Per league-season, per feed: weeks <= last_week are loaded and closed.
+CREATE TABLE IF NOT EXISTS etl_watermarks (
+    league_id   TEXT NOT NULL,
+    feed        TEXT NOT NULL,
+    last_week   INT  NOT NULL,
+    is_final    BOOLEAN,
+    updated_at  TEXT,
+    PRIMARY KEY (league_id, feed)
 );
-CREATE INDEX IF NOT EXISTS ix_fact_player ON fact_roster_historical_value(player_id);
-CREATE INDEX IF NOT EXISTS ix_fact_league_date ON fact_roster_historical_value(league_id, snapshot_date);
 
 -- Format-resolution views (canonical definitions documented in schema.sql).
 -- Created here too so the Power BI CSV extracts always include them.
@@ -661,51 +981,501 @@ JOIN dim_leagues l ON l.league_id = dp.league_id;
 """
 
 
-def get_engine() -> Engine:
+SQLITE_FAST_UPSERT = os.getenv("SQLITE_FAST_UPSERT", "true").lower() == "true"
+
+
+def get_engine(url: str | None = None) -> Engine:
     """Defaults to a local SQLite file (portable, zero-config). Override with
-    DATABASE_URL for any other SQLAlchemy-supported backend."""
-    url = os.getenv("DATABASE_URL", "").strip()
+    DATABASE_URL for any other SQLAlchemy-supported backend; `url` (the
+    crawler's market warehouse) wins over both."""
+    url = (url or os.getenv("DATABASE_URL", "")).strip()
     if not url:
         DATA_DIR.mkdir(parents=True, exist_ok=True)
         url = f"sqlite:///{(DATA_DIR / 'dynasty.db').as_posix()}"
         log.info("DATABASE_URL not set — using %s", url)
-    return create_engine(url, pool_pre_ping=True)
-
-
-def upsert(engine: Engine, table: str, df: pd.DataFrame, conflict_cols: list[str]) -> None:
-    """Idempotent INSERT ... ON CONFLICT DO UPDATE via a staging table."""
+    engine = create_engine(url, pool_pre_ping=True)
+    if engine.dialect.name == "sqlite" and SQLITE_FAST_UPSERT:
+        event.listen(engine, "connect", _sqlite_pragmas)
+    return engine
+
+
+def _sqlite_pragmas(dbapi_conn, _record) -> None:
+    """WAL lets readers (exports, the market thread) run beside the writer and
+    makes a commit one sequential append; synchronous=NORMAL drops the fsync
+    per commit — still crash-safe in WAL, only the last commit can be lost on
+    power failure, and the next run redoes it idempotently."""
+    cur = dbapi_conn.cursor()
+    cur.execute("PRAGMA journal_mode = WAL")
+    cur.execute("PRAGMA synchronous = NORMAL")
+    cur.execute("PRAGMA busy_timeout = 30000")
+    cur.close()
+
+
+def upsert(engine: Engine, table: str, df: pd.DataFrame, conflict_cols: list[str],
+           conn: Connection | None = None) -> None:
+    """Idempotent INSERT ... ON CONFLICT DO UPDATE. Pass `conn` to run inside
+    the caller's transaction; otherwise the upsert commits on its own."""
     if df.empty:
         log.info("Skip %s (no rows)", table)
         return
+    if conn is None:
+        with engine.begin() as conn:
+            return upsert(engine, table, df, conflict_cols, conn)
+    if conn.dialect.name == "sqlite" and SQLITE_FAST_UPSERT:
+        _upsert_executemany(conn, table, df, conflict_cols)
+    else:
+        _upsert_staging(conn, table, df, conflict_cols)
+    log.info("Upserted %s rows into %s", len(df), table)
+
+
+def _conflict_clause(cols: list[str], conflict_cols: list[str]) -> str:
+    updates = ", ".join(f'"{c}" = EXCLUDED."{c}"' for c in cols if c not in conflict_cols)
+    conflict = ", ".join(f'"{c}"' for c in conflict_cols)
+    return f"ON CONFLICT ({conflict}) " + (f"DO UPDATE SET {updates}" if updates else "DO NOTHING")
+
+
+def _upsert_staging(conn: Connection, table: str, df: pd.DataFrame, conflict_cols: list[str]) -> None:
+    """Portable path (any backend): to_sql into a staging table, then one
+    INSERT ... SELECT ... ON CONFLICT."""
     df = df.where(pd.notna(df), None)
     staging = f"_stg_{table}"
+    df.to_sql(staging, conn, if_exists="replace", index=False)
+    cols = list(df.columns)
+    collist = ", ".join(f'"{c}"' for c in cols)
+    conn.execute(text(
+        f'INSERT INTO {table} ({collist}) SELECT {collist} FROM {staging} '
+        f'WHERE true '  # disambiguates SELECT from the upsert clause in SQLite; valid in PostgreSQL too
+        f'{_conflict_clause(cols, conflict_cols)}'
+    ))
+    conn.execute(text(f"DROP TABLE IF EXISTS {staging}"))
+
+
+def _sqlite_column(s: pd.Series) -> list:
+    """One column as sqlite3-bindable Python values: NaN/NA -> None, numpy
+    scalars -> int/float, dates -> ISO text (what the staging path stores)."""
+    vals = s.astype(object).where(s.notna(), None).tolist()
+    first = next((v for v in vals if v is not None), None)
+    if isinstance(first, datetime):
+        return [None if v is None else v.isoformat(" ") for v in vals]
+    if hasattr(first, "isoformat"):
+        return [None if v is None else v.isoformat() for v in vals]
+    return vals
+
+
+def _upsert_executemany(conn: Connection, table: str, df: pd.DataFrame, conflict_cols: list[str]) -> None:
+    """SQLite fast path: one prepared INSERT ... ON CONFLICT DO UPDATE run by
+    executemany over row tuples zipped from whole columns — no staging table,
+    no per-row pandas work. Runs on the caller's transaction."""
+    cols = list(df.columns)
+    collist = ", ".join(f'"{c}"' for c in cols)
+    sql = (f"INSERT INTO {table} ({collist}) VALUES ({', '.join('?' * len(cols))}) "
+           f"{_conflict_clause(cols, conflict_cols)}")
+    cur = conn.connection.cursor()
+    try:
+        cur.executemany(sql, zip(*(_sqlite_column(df[c]) for c in cols)))
+    finally:
+        cur.close()
+
+
+def load_frozen_seasons(engine: Engine) -> dict[str, dict]:
+    """Completed league-seasons already in the warehouse, keyed by league_id,
+    as stand-in history nodes: previous_league_id to keep walking, plus the
+    rosters from that league's latest fact snapshot (a finished season's
+    rosters never change, so this equals what Sleeper would return)."""
+    insp = inspect(engine)
+    if not insp.has_table("dim_leagues") or "is_frozen" not in {
+            c["name"] for c in insp.get_columns("dim_leagues")}:
+        return {}
+    with engine.connect() as conn:
+        leagues = conn.execute(text(
+            "SELECT league_id, previous_league_id, is_superflex, number_of_teams, ppr "
+            "FROM dim_leagues WHERE is_frozen = 1")).all()
+        # Open SCD rows are exactly the latest snapshot's rosters.
+        rows = conn.execute(text("""
+            SELECT f.league_id, f.roster_id, f.player_id
+            FROM fact_roster_value_scd f
+            JOIN dim_leagues l ON l.league_id = f.league_id AND l.is_frozen = 1
+            WHERE f.valid_to IS NULL
+            ORDER BY f.league_id, f.roster_id, f.player_id
+        """)).all() if insp.has_table("fact_roster_value_scd") else []
+    out = {lid: {"league_id": lid, "previous_league_id": prev, "_frozen": True, "rosters": [],
+                 "fc_settings": fc_settings({"is_superflex": sf, "number_of_teams": teams, "ppr": ppr})}
+           for lid, prev, sf, teams, ppr in leagues}
+    by_roster: dict[tuple[str, int], list[str]] = {}
+    for lid, rid, pid in rows:
+        by_roster.setdefault((lid, rid), []).append(pid)
+    for (lid, rid), players in by_roster.items():
+        out[lid]["rosters"].append({"roster_id": rid, "players": players})
+    return out
+
+
+def ensure_columns(engine: Engine, table: str, columns: dict[str, str]) -> None:
+    """ALTER TABLE ADD COLUMN for any of `columns` an older warehouse lacks."""
+    have = {c["name"] for c in inspect(engine).get_columns(table)}
     with engine.begin() as conn:
-        df.to_sql(staging, conn, if_exists="replace", index=False)
-        cols = list(df.columns)
-        collist = ", ".join(f'"{c}"' for c in cols)
-        updates = ", ".join(f'"{c}" = EXCLUDED."{c}"' for c in cols if c not in conflict_cols)
-        conflict = ", ".join(f'"{c}"' for c in conflict_cols)
-        action = f"DO UPDATE SET {updates}" if updates else "DO NOTHING"
-        conn.execute(text(
-            f'INSERT INTO {table} ({collist}) SELECT {collist} FROM {staging} '
-            f'WHERE true '  # disambiguates SELECT from the upsert clause in SQLite; valid in PostgreSQL too
-            f'ON CONFLICT ({conflict}) {action}'
-        ))
-        conn.execute(text(f"DROP TABLE IF EXISTS {staging}"))
-    log.info("Upserted %s rows into %s", len(df), table)
+        for col, typ in columns.items():
+            if col not in have:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {col} {typ}"))
+                log.info("Added column %s.%s", table, col)
+
+
+def sync_dim_players(engine: Engine, df: pd.DataFrame) -> None:
+    """Upsert only players that are new or whose content_hash changed, stamping
+    last_changed_at. Rows are never deleted: a player Sleeper stops listing
+    keeps its last known attributes (build_dim_players hands such a rostered
+    id over with no attributes at all, which is not a change to store)."""
+    with engine.connect() as conn:
+        known = dict(conn.execute(text("SELECT player_id, content_hash FROM dim_players")).all())
+    unlisted = df[PLAYER_HASH_COLS].drop(columns="is_rookie").isna().all(axis=1)
+    df = df[~(unlisted & df["player_id"].isin(known.keys()))]
+    prev = df["player_id"].map(known)
+    is_new = ~df["player_id"].isin(known.keys())
+    changed = df[is_new | (prev != df["content_hash"])].copy()
+    log.info("dim_players: %s new, %s changed, %s unchanged (skipped)",
+             int(is_new.sum()), len(changed) - int(is_new.sum()), len(df) - len(changed))
+    changed["last_changed_at"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    upsert(engine, "dim_players", changed, ["player_id"])
+
+
+def prepare_schema(engine: Engine) -> None:
+    migrate_fact_to_scd(engine)
+    with engine.begin() as conn:
+        for stmt in filter(None, (s.strip() for s in DDL.split(";"))):
+            conn.execute(text(stmt))
+    ensure_columns(engine, "dim_leagues", {"is_frozen": "BOOLEAN"})
+    ensure_columns(engine, "dim_players", {"content_hash": "TEXT", "last_changed_at": "TEXT"})
 
 
-def load(engine: Engine, frames: Frames) -> None:
+def load_league_frames(engine: Engine, frames: Frames) -> None:
+    """Upsert everything but dim_players (see sync_dim_players), all tables in
+    one transaction: a batch of league-seasons lands whole or not at all."""
+    with engine.begin() as conn:
+        upsert(engine, "dim_leagues", frames.dim_leagues, ["league_id"], conn)
+        upsert(engine, "dim_managers", frames.dim_managers, ["league_id", "roster_id"], conn)
+        if not frames.dim_draft_picks.empty:
+            upsert(engine, "dim_draft_picks", frames.dim_draft_picks, ["pick_id"], conn)
+        apply_fact_snapshot(engine, conn, frames.fact_roster_value)
+
+
+# --------------------------------------------------------------------------- #
+# Change-only (SCD2) roster value fact
+# --------------------------------------------------------------------------- #
+
+FACT_TABLE = "fact_roster_value_scd"
+FACT_KEY = ["league_id", "roster_id", "player_id"]
+FACT_VALUES = list(FACT_VALUE_COLS)
+
+
+def _same_values(a: pd.DataFrame, b: pd.DataFrame, suffix: str = "") -> pd.Series:
+    """Row-wise: every value column of `a` equals its `suffix`-ed twin in
+    `b`, NULL == NULL."""
+    eq = pd.Series(True, index=a.index)
+    for c in FACT_VALUES:
+        x = pd.to_numeric(a[c], errors="coerce")
+        y = pd.to_numeric(b[c + suffix], errors="coerce")
+        eq &= (x == y) | (x.isna() & y.isna())
+    return eq
+
+
+def apply_fact_snapshot(engine: Engine, conn: Connection, fact: pd.DataFrame) -> None:
+    """Fold one day's roster value snapshot (build_fact's daily grain) into
+    the SCD table, writing only what changed: a row whose ownership and
+    values match the open row is not touched. Re-running the same day is
+    exact — the comparison is against the state before that day (the row
+    open at the previous snapshot, reopened if today's values revert to it),
+    and rows opened earlier today are updated or dropped in place."""
+    if fact.empty:
+        log.info("Skip %s (no rows)", FACT_TABLE)
+        return
+    day = str(fact["snapshot_date"].iloc[0])
+    leagues = sorted(fact["league_id"].unique())
+    params = {f"l{i}": lid for i, lid in enumerate(leagues)}
+    in_list = ", ".join(f":{k}" for k in params)
+    latest = dict(conn.execute(text(
+        f"SELECT league_id, MAX(snapshot_date) FROM fact_snapshot_calendar "
+        f"WHERE league_id IN ({in_list}) GROUP BY league_id"), params).all())
+    ahead = [lid for lid in leagues if latest.get(lid) and str(latest[lid]) > day]
+    if ahead:   # history can only be appended to; never rewrite past a later day
+        log.warning("%s: %s league(s) already snapshotted after %s; skipped", FACT_TABLE, len(ahead), day)
+        fact = fact[~fact["league_id"].isin(ahead)]
+        if fact.empty:
+            return
+
+    cur = pd.read_sql_query(text(
+        f"SELECT {', '.join(FACT_KEY + ['valid_from', 'valid_to'] + FACT_VALUES)} FROM {FACT_TABLE} "
+        f"WHERE league_id IN ({in_list}) AND (valid_to IS NULL OR valid_to = :day)"),
+        conn, params={**params, "day": day})
+    cur["roster_id"] = cur["roster_id"].astype(int)
+    cur["valid_from"] = cur["valid_from"].astype(str)
+    today = cur[cur["valid_from"] == day]           # opened by an earlier run today
+    prev = cur[cur["valid_from"] < day]             # held at the previous snapshot
+    v = fact[FACT_KEY + FACT_VALUES].copy()
+    v["roster_id"] = v["roster_id"].astype(int)
+    v["player_id"] = v["player_id"].astype(str)
+
+    m = (v.assign(in_v=True)
+          .merge(today.drop(columns=["valid_to"]).assign(in_t=True), on=FACT_KEY, how="outer",
+                 suffixes=("", "_t"))
+          .merge(prev.assign(in_p=True), on=FACT_KEY, how="outer", suffixes=("", "_p")))
+    has_v, has_t, has_p = (m[c].notna() for c in ("in_v", "in_t", "in_p"))
+    p_open = has_p & m["valid_to"].isna()
+    v_eq_t = has_v & has_t & _same_values(m, m, "_t")
+    v_eq_p = has_v & has_p & _same_values(m, m, "_p")
+
+    delete_t = has_t & (~has_v | v_eq_p)
+    update_t = has_t & has_v & ~v_eq_t & ~v_eq_p
+    reopen_p = has_p & ~p_open & v_eq_p
+    close_p = p_open & (~has_v | ~v_eq_p)
+    insert = has_v & ~has_t & ~v_eq_p
+
+    def keys(mask: pd.Series, **extra) -> list[dict]:
+        return [{"l": l, "r": int(r), "p": p, **extra}
+                for l, r, p in m.loc[mask, FACT_KEY].itertuples(index=False, name=None)]
+
+    where = "league_id = :l AND roster_id = :r AND player_id = :p"
+    if delete_t.any():
+        conn.execute(text(f"DELETE FROM {FACT_TABLE} WHERE {where} AND valid_from = :d"), keys(delete_t, d=day))
+    if reopen_p.any():
+        conn.execute(text(f"UPDATE {FACT_TABLE} SET valid_to = NULL WHERE {where} AND valid_to = :d"),
+                     keys(reopen_p, d=day))
+    if close_p.any():
+        conn.execute(text(f"UPDATE {FACT_TABLE} SET valid_to = :d WHERE {where} AND valid_to IS NULL"),
+                     keys(close_p, d=day))
+    rows = m.loc[insert | update_t, FACT_KEY + FACT_VALUES].copy()
+    if len(rows):
+        rows.insert(3, "valid_from", day)
+        rows.insert(4, "valid_to", None)
+        upsert(engine, FACT_TABLE, rows, FACT_KEY + ["valid_from"], conn)
+    upsert(engine, "fact_snapshot_calendar",
+           pd.DataFrame({"league_id": sorted(v["league_id"].unique()), "snapshot_date": day}),
+           ["league_id", "snapshot_date"], conn)
+    log.info("%s: %s daily rows -> %s opened, %s rewritten, %s closed, %s unchanged",
+             FACT_TABLE, len(v), int(insert.sum()), int(update_t.sum() + delete_t.sum() + reopen_p.sum()),
+             int(close_p.sum()), int((has_v & (v_eq_t | (v_eq_p & p_open))).sum()))
+
+
+def migrate_fact_to_scd(engine: Engine) -> None:
+    """One-time: fold a daily-grain fact_roster_historical_value TABLE into
+    the SCD table + snapshot calendar, then replace it with the view. A run
+    of days continues while the key is present on each consecutive calendar
+    day of its league with identical values."""
+    insp = inspect(engine)
+    if "fact_roster_historical_value" not in insp.get_table_names():
+        return   # fresh warehouse, or already the view
+    cols = FACT_KEY + FACT_VALUES
+    daily = pd.read_sql_query(text(
+        f"SELECT snapshot_date, {', '.join(cols)} FROM fact_roster_historical_value"), engine)
+    daily["snapshot_date"] = daily["snapshot_date"].astype(str)
+    cal = daily[["league_id", "snapshot_date"]].drop_duplicates().sort_values(["league_id", "snapshot_date"])
+    cal["k"] = cal.groupby("league_id").cumcount()
+    nxt = cal.assign(k=cal["k"] - 1).rename(columns={"snapshot_date": "valid_to"})
+
+    d = daily.merge(cal, on=["league_id", "snapshot_date"]).sort_values(FACT_KEY + ["k"], ignore_index=True)
+    prior = d.shift(1)
+    starts = ((d[FACT_KEY] != prior[FACT_KEY]).any(axis=1)
+              | (d["k"] != prior["k"] + 1)
+              | ~_same_values(d, prior))
+    d["seg"] = starts.cumsum()
+    seg = d.groupby("seg").agg(valid_from=("snapshot_date", "first"), last_k=("k", "last"),
+                               **{c: (c, "first") for c in cols})
+    seg = seg.merge(nxt, left_on=["league_id", "last_k"], right_on=["league_id", "k"], how="left")
+    scd = seg[FACT_KEY + ["valid_from", "valid_to"] + FACT_VALUES]
+
     with engine.begin() as conn:
+        # The format views read the fact by name; they are recreated over the view.
+        conn.execute(text("DROP VIEW IF EXISTS v_player_market"))
+        conn.execute(text("DROP VIEW IF EXISTS v_roster_assets"))
+        conn.execute(text("DROP TABLE fact_roster_historical_value"))
         for stmt in filter(None, (s.strip() for s in DDL.split(";"))):
             conn.execute(text(stmt))
-    upsert(engine, "dim_leagues", frames.dim_leagues, ["league_id"])
-    upsert(engine, "dim_managers", frames.dim_managers, ["league_id", "roster_id"])
-    upsert(engine, "dim_players", frames.dim_players, ["player_id"])
-    if not frames.dim_draft_picks.empty:
-        upsert(engine, "dim_draft_picks", frames.dim_draft_picks, ["pick_id"])
-    upsert(engine, "fact_roster_historical_value", frames.fact_roster_value,
-           ["snapshot_date", "league_id", "roster_id", "player_id"])
+        upsert(engine, FACT_TABLE, scd, FACT_KEY + ["valid_from"], conn)
+        upsert(engine, "fact_snapshot_calendar", cal[["league_id", "snapshot_date"]],
+               ["league_id", "snapshot_date"], conn)
+    log.info("Migrated fact_roster_historical_value: %s daily rows -> %s SCD rows over %s league-days",
+             len(daily), len(scd), len(cal))
+    if engine.dialect.name == "sqlite":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.exec_driver_sql("VACUUM")
+
+
+def load(engine: Engine, frames: Frames) -> None:
+    prepare_schema(engine)
+    load_league_frames(engine, frames)
+    sync_dim_players(engine, frames.dim_players)
+
+
+# --------------------------------------------------------------------------- #
+# Weekly activity: transactions + matchup player points, incremental by week
+# --------------------------------------------------------------------------- #
+
+ACTIVITY_TABLES = {"transactions": "fact_transactions", "matchups": "fact_weekly_player_points"}
+TXN_COLS = ["transaction_id", "league_id", "week", "txn_type", "status", "status_updated_ms",
+            "txn_date", "roster_id", "player_id", "leg", "draft_pick_season", "draft_pick_round"]
+WPP_COLS = ["league_id", "season", "week", "roster_id", "matchup_id", "player_id", "points", "is_starter"]
+
+
+@dataclass(frozen=True)
+class ActivityTask:
+    league_id: str
+    feed: str           # key of ACTIVITY_TABLES
+    first_week: int
+    bounds: WeekBounds
+
+
+def plan_activity(engine: Engine, units: list[dict]) -> list[ActivityTask]:
+    """One task per (league-season, feed) with weeks past its watermark. A
+    final watermark means the season is fully loaded and costs nothing; a
+    frozen season that predates activity loading gets its league node fetched
+    (cached forever) to learn its week range."""
+    with engine.connect() as conn:
+        wm = {(lid, feed): (last, bool(final)) for lid, feed, last, final in conn.execute(text(
+            "SELECT league_id, feed, last_week, is_final FROM etl_watermarks")).all()}
+    tasks = []
+    for u in units:
+        lid = u["league_id"]
+        if all(wm.get((lid, feed), (0, False))[1] for feed in ACTIVITY_TABLES):
+            continue
+        bounds = u["weeks"]
+        if bounds is None:
+            node = http_get(f"{SLEEPER_BASE}/league/{lid}", SLEEPER_LIMITER, ttl=FOREVER)
+            if not node:
+                continue
+            bounds = league_week_bounds(node)
+        for feed in ACTIVITY_TABLES:
+            last, final = wm.get((lid, feed), (0, False))
+            if not final and (bounds.upper > last or bounds.final):
+                tasks.append(ActivityTask(lid, feed, last + 1, bounds))
+    return tasks
+
+
+def fetch_activity(task: ActivityTask) -> list[dict]:
+    weeks = range(task.first_week, task.bounds.upper + 1)
+    ttl = FOREVER if task.bounds.final else None
+    getter = get_transactions if task.feed == "transactions" else get_matchups
+    return getter(task.league_id, weeks, ttl)
+
+
+def _pairs(col: pd.Series) -> pd.Series:
+    """{key: value} cells -> one (key, value) per row, indexed by source row."""
+    return col.map(lambda d: list(d.items()) if isinstance(d, dict) else []).explode().dropna()
+
+
+def explode_transactions(rows: list[dict], league_id: str) -> pd.DataFrame:
+    """Sleeper transactions -> one row per leg. adds/drops map player -> roster;
+    each traded pick is an add for its new owner and a drop for the old one."""
+    if not rows:
+        return pd.DataFrame(columns=TXN_COLS)
+    tx = pd.DataFrame(rows).reindex(columns=["transaction_id", "type", "status", "status_updated",
+                                             "adds", "drops", "draft_picks", "_week"])
+    head = pd.DataFrame({
+        "transaction_id": tx["transaction_id"].astype(str),
+        "league_id": league_id,
+        "week": tx["_week"],
+        "txn_type": tx["type"],
+        "status": tx["status"],
+        "status_updated_ms": tx["status_updated"],
+        "txn_date": pd.to_datetime(tx["status_updated"], unit="ms", utc=True).dt.strftime("%Y-%m-%d"),
+    })
+
+    legs = []
+    for leg, col in (("add", "adds"), ("drop", "drops")):
+        pairs = _pairs(tx[col])
+        if len(pairs):
+            legs.append(pd.DataFrame(pairs.tolist(), index=pairs.index, columns=["player_id", "roster_id"])
+                          .assign(leg=leg))
+    picks = tx["draft_picks"].map(lambda v: v if isinstance(v, list) else []).explode().dropna()
+    if len(picks):
+        p = pd.DataFrame(picks.tolist(), index=picks.index).reindex(
+            columns=["season", "round", "owner_id", "previous_owner_id"])
+        for leg, owner in (("add", "owner_id"), ("drop", "previous_owner_id")):
+            legs.append(pd.DataFrame({"roster_id": p[owner], "player_id": None, "leg": leg,
+                                      "draft_pick_season": p["season"].astype(str),
+                                      "draft_pick_round": p["round"]}, index=p.index))
+    if not legs:
+        return pd.DataFrame(columns=TXN_COLS)
+    out = pd.concat(legs).join(head)
+    return out.reindex(columns=TXN_COLS).reset_index(drop=True)
+
+
+def explode_matchups(rows: list[dict], league_id: str, season: str) -> pd.DataFrame:
+    """Sleeper matchups -> one row per (week, roster, player) from players_points,
+    flagged is_starter when the player filled a starting slot."""
+    if not rows:
+        return pd.DataFrame(columns=WPP_COLS)
+    m = pd.DataFrame(rows).reindex(columns=["roster_id", "matchup_id", "players_points", "starters", "_week"])
+    pts = _pairs(m["players_points"])
+    if not len(pts):
+        return pd.DataFrame(columns=WPP_COLS)
+    out = pd.DataFrame(pts.tolist(), index=pts.index, columns=["player_id", "points"])
+    out = out.rename_axis("_row").reset_index()
+    st = m["starters"].map(lambda v: v if isinstance(v, list) else []).explode().dropna()
+    starters = pd.DataFrame({"_row": st.index, "player_id": st.to_numpy(), "is_starter": True})
+    out = out.merge(starters.drop_duplicates(), on=["_row", "player_id"], how="left")
+    out["is_starter"] = out["is_starter"].notna()
+    out = out.join(m[["roster_id", "matchup_id", "_week"]], on="_row").rename(columns={"_week": "week"})
+    out["league_id"], out["season"] = league_id, season
+    return out[WPP_COLS]
+
+
+def write_activity(engine: Engine, task: ActivityTask, df: pd.DataFrame) -> None:
+    """Replace the task's weeks and advance its watermark in one transaction."""
+    table = ACTIVITY_TABLES[task.feed]
+    b = task.bounds
+    last_week = max(task.first_week - 1, b.closed)
+    with engine.begin() as conn:
+        conn.execute(text(f"DELETE FROM {table} WHERE league_id = :lid AND week BETWEEN :lo AND :hi"),
+                     {"lid": task.league_id, "lo": task.first_week, "hi": b.upper})
+        if len(df):
+            df.to_sql(table, conn, if_exists="append", index=False, chunksize=5000)
+        conn.execute(text(
+            "INSERT INTO etl_watermarks (league_id, feed, last_week, is_final, updated_at) "
+            "VALUES (:lid, :feed, :wk, :final, :ts) "
+            "ON CONFLICT (league_id, feed) DO UPDATE SET last_week = EXCLUDED.last_week, "
+            "is_final = EXCLUDED.is_final, updated_at = EXCLUDED.updated_at"),
+            {"lid": task.league_id, "feed": task.feed, "wk": last_week, "final": b.final,
+             "ts": datetime.now(timezone.utc).isoformat(timespec="seconds")})
+
+
+def load_activity(engine: Engine, units: list[dict], workers: int | None = None) -> None:
+    """Fill fact_transactions and fact_weekly_player_points for weeks not yet
+    loaded. Fetches fan out over a bounded pool on the shared SLEEPER_LIMITER
+    (so a multi-season backfill overlaps latency without exceeding the host
+    budget); each league-season's frame is written as soon as it arrives."""
+    tasks = plan_activity(engine, units)
+    if not tasks:
+        log.info("Activity: every league-week already loaded")
+        return
+    workers = ETL_WORKERS if workers is None else workers
+    rows_by_feed = {feed: 0 for feed in ACTIVITY_TABLES}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="activity") as pool:
+        for task, rows in zip(tasks, pool.map(fetch_activity, tasks)):
+            if task.feed == "transactions":
+                df = explode_transactions(rows, task.league_id)
+            else:
+                df = explode_matchups(rows, task.league_id, task.bounds.season)
+            write_activity(engine, task, df)
+            rows_by_feed[task.feed] += len(df)
+    log.info("Activity: %s league-season feed(s) refreshed; %s transaction legs, %s player-weeks",
+             len(tasks), rows_by_feed["transactions"], rows_by_feed["matchups"])
+
+
+_RK = "league_id || '-' || roster_id AS roster_key"
+EXTRACTS = {
+    "dim_leagues": "SELECT * FROM dim_leagues",
+    "dim_players": "SELECT * FROM dim_players",
+    "dim_managers": f"SELECT *, {_RK} FROM dim_managers",
+    "dim_draft_picks": "SELECT *, league_id || '-' || current_owner_id AS roster_key FROM dim_draft_picks",
+    "fact_roster_historical_value": f"SELECT *, {_RK} FROM fact_roster_historical_value",
+    "v_player_market": f"SELECT *, {_RK} FROM v_player_market",
+    "v_roster_assets": f"SELECT *, {_RK} FROM v_roster_assets",
+}
+# Grows by one snapshot per day; in parquet mode each day is its own
+# partition. Only the bare SCD fact qualifies: v_player_market and
+# v_roster_assets join the *current* dim_players / dim_leagues /
+# dim_draft_picks (and v_roster_assets stamps every pick with the global
+# latest snapshot_date), so their past days change and they are written whole.
+PARTITIONED_EXTRACTS = ("fact_roster_historical_value",)
+EXTRACT_MANIFEST = "manifest.json"
 
 
 def export_extracts(engine: Engine, out_dir: Path) -> None:
@@ -714,17 +1484,7 @@ def export_extracts(engine: Engine, out_dir: Path) -> None:
     Power BI relationships are single-column only — your manager grain is composite.
     Power BI then connects via Get Data > Folder and loads this directory."""
     out_dir.mkdir(parents=True, exist_ok=True)
-    rk = "league_id || '-' || roster_id AS roster_key"
-    exports = {
-        "dim_leagues": "SELECT * FROM dim_leagues",
-        "dim_players": "SELECT * FROM dim_players",
-        "dim_managers": f"SELECT *, {rk} FROM dim_managers",
-        "dim_draft_picks": "SELECT *, league_id || '-' || current_owner_id AS roster_key FROM dim_draft_picks",
-        "fact_roster_historical_value": f"SELECT *, {rk} FROM fact_roster_historical_value",
-        "v_player_market": f"SELECT *, {rk} FROM v_player_market",
-        "v_roster_assets": f"SELECT *, {rk} FROM v_roster_assets",
-    }
-    for name, q in exports.items():
+    for name, q in EXTRACTS.items():
         try:
             df = pd.read_sql_query(q, engine)
             df.to_csv(out_dir / f"{name}.csv", index=False, encoding="utf-8")
@@ -734,82 +1494,325 @@ def export_extracts(engine: Engine, out_dir: Path) -> None:
     log.info("Power BI extracts written to %s", out_dir)
 
 
+def export_parquet(engine: Engine, out_dir: Path) -> None:
+    """Incremental Parquet extracts. fact_roster_historical_value is written
+    hive-style, one partition per day (<name>/snapshot_date=YYYY-MM-DD/
+    part-0.parquet, the date carried by the path rather than the file), and
+    a run writes only the days the manifest does not have yet plus the latest
+    day (a same-day rerun rewrites it). Its earlier days are immutable — the
+    SCD fold never rewrites a league's past — so its export time tracks one
+    day of data, not the whole history. Everything else, the views over the
+    current dimensions included, is rewritten whole (PARTITIONED_EXTRACTS).
+
+    manifest.json records every file with its row count and written_at, so a
+    reader (Power BI, pandas, our scripts) loads only partitions written
+    since its last read. It is replaced last and atomically; a crashed run
+    leaves the previous manifest pointing at complete files."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = out_dir / EXTRACT_MANIFEST
+    manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+    datasets: dict[str, dict] = manifest.get("datasets", {})
+    written_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    with engine.connect() as conn:
+        days = [str(d) for (d,) in conn.execute(text(
+            "SELECT DISTINCT snapshot_date FROM fact_snapshot_calendar ORDER BY snapshot_date"))]
+
+    def write(df: pd.DataFrame, rel: str) -> dict:
+        path = out_dir / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, path)
+        return {"path": rel, "rows": len(df), "written_at": written_at}
+
+    for name, q in EXTRACTS.items():
+        try:
+            if name not in PARTITIONED_EXTRACTS:
+                if "partitions" in datasets.get(name, {}):   # partitioned by an older run
+                    shutil.rmtree(out_dir / name, ignore_errors=True)
+                datasets[name] = write(pd.read_sql_query(q, engine), f"{name}.parquet")
+                log.info("Extract: %-30s %s rows -> %s.parquet", name, datasets[name]["rows"], name)
+                continue
+            entry = datasets.setdefault(name, {"partition_by": "snapshot_date", "partitions": {}})
+            parts = entry["partitions"]
+            for d in [d for d in parts if d not in days]:   # the fact no longer has that day
+                shutil.rmtree(out_dir / name / f"snapshot_date={d}", ignore_errors=True)
+                del parts[d]
+            todo = [d for d in days if d not in parts or d == days[-1]]
+            for d in todo:
+                df = pd.read_sql_query(text(f"{q} WHERE snapshot_date = :d"), engine, params={"d": d})
+                parts[d] = write(df.drop(columns="snapshot_date"),
+                                 f"{name}/snapshot_date={d}/part-0.parquet")
+            log.info("Extract: %-30s %s partition(s) written, %s unchanged",
+                     name, len(todo), len(parts) - len(todo))
+        except Exception as exc:  # a missing view shouldn't abort the whole export
+            log.warning("Extract %s skipped: %s", name, exc)
+
+    tmp = manifest_path.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"format": "parquet", "updated_at": written_at,
+                               "datasets": datasets}, indent=2))
+    os.replace(tmp, manifest_path)
+    log.info("Parquet extracts + %s written to %s", EXTRACT_MANIFEST, out_dir)
+
+
+# --------------------------------------------------------------------------- #
+# Pipelined run: extract -> transform -> load over bounded queues
+# --------------------------------------------------------------------------- #
+
+_DONE = object()
+PIPELINE_QUEUE = max(2, ETL_WORKERS)   # units in flight between two stages
+
+
+def _put(q: queue.Queue, item: Any, abort: threading.Event) -> bool:
+    """Blocking put that gives up once the pipeline is aborting."""
+    while not abort.is_set():
+        try:
+            q.put(item, timeout=0.2)
+            return True
+        except queue.Full:
+            continue
+    return False
 
-def run(dry_run: bool = False) -> None:
+
+def _get(q: queue.Queue, abort: threading.Event) -> Any:
+    while not abort.is_set():
+        try:
+            return q.get(timeout=0.2)
+        except queue.Empty:
+            continue
+    return _DONE
+
+
+class Stage(threading.Thread):
+    """One pipeline stage on its own thread: take from `inbox`, apply `fn`,
+    pass a non-None result to `outbox`. With batch=True, `fn` receives every
+    item already waiting (so a slow writer coalesces upserts instead of
+    falling further behind). The first error aborts the whole pipeline and is
+    re-raised by the caller."""
+
+    def __init__(self, name: str, fn, inbox: queue.Queue, outbox: queue.Queue | None,
+                 abort: threading.Event, batch: bool = False):
+        super().__init__(name=name, daemon=True)
+        self.fn, self.inbox, self.outbox, self.abort, self.batch = fn, inbox, outbox, abort, batch
+        self.busy_s = 0.0
+        self.items = 0
+        self.error: BaseException | None = None
+
+    def run(self) -> None:
+        try:
+            done = False
+            while not done and (item := _get(self.inbox, self.abort)) is not _DONE:
+                items = [item]
+                while self.batch:
+                    try:
+                        nxt = self.inbox.get_nowait()
+                    except queue.Empty:
+                        break
+                    if nxt is _DONE:
+                        done = True
+                        break
+                    items.append(nxt)
+                t0 = time.perf_counter()
+                result = self.fn(items if self.batch else item)
+                self.busy_s += time.perf_counter() - t0
+                self.items += len(items)
+                if self.outbox is not None and result is not None:
+                    _put(self.outbox, result, self.abort)
+        except BaseException as exc:
+            self.error = exc
+            self.abort.set()
+        finally:
+            if self.outbox is not None:
+                _put(self.outbox, _DONE, self.abort)
+
+
+def concat_frames(batch: list[Frames]) -> Frames:
+    out = Frames()
+    for name in vars(out):
+        parts = [getattr(f, name) for f in batch if not getattr(f, name).empty]
+        if parts:
+            setattr(out, name, pd.concat(parts, ignore_index=True))
+    return out
+
+
+def run(dry_run: bool = False, refresh_history: bool = False, resume: bool = False) -> None:
+    """Each league-season flows extract -> transform -> upsert as soon as it
+    arrives: the Sleeper crawl (main thread, fanned out over ETL_WORKERS),
+    the frame builder and the single SQLite writer each run on their own
+    thread with bounded queues between them. The market pulls (crosswalk, DP
+    values, FantasyCalc per settings tuple) and the player DB load run beside
+    the crawl; the transform stage first blocks on them when the first
+    league-season arrives. dim_players, activity and exports follow once every
+    league-season is loaded. With several users configured, the pass runs
+    over the union of their leagues: shared pulls and shared leagues once."""
     DATA_DIR.mkdir(parents=True, exist_ok=True)
     season = os.getenv("SLEEPER_SEASON", str(SNAPSHOT_DATE.year))
+    engine = get_engine()
+    journal = RunJournal(Path(os.getenv("ETL_JOURNAL_DB") or DATA_DIR / "etl_journal.db"), resume=resume)
 
-    user = resolve_user_id()
-    player_db = get_player_db()
-    crosswalk = fetch_crosswalk()
-    dp_values = fetch_dynastyprocess_values()
-
-    leagues = get_user_leagues(user["user_id"], season)
+    with stage("resolve_leagues") as st:
+        users = resolve_users()
+        leagues = get_leagues_for_users(users, season)
+        st.rows_read = len(leagues)
     if not leagues:
-        raise SystemExit(f"No leagues found for {user['display_name']} in {season}")
-
-    leagues_meta: list[dict] = []
-    managers: list[dict] = []
-    rosters_by_league: dict[str, list[dict]] = {}
-    all_traded_picks: list[dict] = []
-
-    for lg in leagues:
-        for node in walk_league_history(lg):  # current + prior seasons
-            meta = parse_league_settings(node)
-            leagues_meta.append(meta)
-            lid = meta["league_id"]
-
-            rosters = get_rosters(lid)
-            rosters_by_league[lid] = rosters
-
-            users = {u["user_id"]: u for u in get_league_users(lid)}
-            for r in rosters:
-                u = users.get(r.get("owner_id"), {})
-                managers.append({
-                    "roster_id": r["roster_id"],
-                    "league_id": lid,
-                    "sleeper_user_id": r.get("owner_id"),
-                    "sleeper_username": u.get("display_name"),
-                    "owner_name": (u.get("metadata") or {}).get("team_name") or u.get("display_name"),
-                })
-
-            tp = get_traded_picks(lid)
-            for t in tp:
-                t["league_id"] = lid
-            all_traded_picks.extend(tp)
+        raise SystemExit(f"No leagues found for {', '.join(u['display_name'] for u in users)} in {season}")
 
     # Market values: PRIMARY = FantasyPros ECR (DynastyProcess, both formats in one
-    # file). SECONDARY = FantasyCalc, pulled once per QB format the leagues need.
-    teams = parse_league_settings(leagues[0])["number_of_teams"] or 14
-    formats_needed = {2 if parse_league_settings(l)["is_superflex"] else 1 for l in leagues}
-    fc_by_format = {q: fetch_fantasycalc(q, teams, ppr=1) for q in sorted(formats_needed)}
-    market, picks = normalize_market_values(fc_by_format, dp_values, crosswalk, player_db)
-
-    fp_cov = market["fp_value_2qb"].notna().mean() if len(market) else 0
-    log.info("Market table: %s assets | FantasyPros (primary) coverage %.1f%%", len(market), 100 * fp_cov)
-
-    frames = build_frames(leagues_meta, managers, rosters_by_league, market, player_db, all_traded_picks)
+    # file). SECONDARY = FantasyCalc, one pull per distinct (numQbs, numTeams, ppr)
+    # across the leagues (fc_market.py), each league priced by its own.
+    metas = [parse_league_settings(l) for l in leagues]
+    matrix = pull_matrix(metas)
+    side = ThreadPoolExecutor(max_workers=5 + len(matrix), thread_name_prefix="market")
+    player_f = side.submit(get_player_db)
+    # Name+position fallback index: persisted and refreshed by diff against the store
+    names_f = side.submit(lambda: build_name_index(player_f.result()) if dry_run
+                          else refresh_name_index(engine, player_f.result()))
+    xw_f = side.submit(journal.unit, "market:crosswalk", fetch_crosswalk)
+    dp_f = side.submit(journal.unit, "market:dp_values", fetch_dynastyprocess_values)
+    fc = FantasyCalcPulls(side, lambda q, t, p: journal.unit(f"market:fc:{q}qb:{t}:{p}",
+                                                             fetch_fantasycalc, q, t, p))
+    for s in matrix:
+        fc.submit(s)
+    # Baseline per QB format: the settings most of the leagues share
+    baseline = {q: max((s for s in matrix if s[0] == q),
+                       key=lambda s: (sum(fc_settings(m) == s for m in metas), -s[1], -s[2]))
+                for q in {s[0] for s in matrix}}
+
+    def market_ready() -> pd.DataFrame:
+        fc_by_format = {q: fc.result(s) for q, s in sorted(baseline.items())}
+        market, _picks = normalize_market_values(fc_by_format, dp_f.result(), xw_f.result(),
+                                                  player_f.result(), names_f.result())
+        fp_cov = market["fp_value_2qb"].notna().mean() if len(market) else 0
+        log.info("Market table: %s assets | FantasyPros (primary) coverage %.1f%%", len(market), 100 * fp_cov)
+        return market_index(market)
+
+    mv_f = side.submit(market_ready)
+
+    if not dry_run:
+        prepare_schema(engine)
+    # Completed seasons already loaded are skipped unless --refresh-history
+    frozen = {} if refresh_history else load_frozen_seasons(engine)
+    for node in frozen.values():
+        fc.submit(node["fc_settings"])
+    rostered: set[str] = set()
+    dry_counts: dict[str, int] = {}
+    mv_by_settings: dict[Settings, pd.DataFrame] = {}   # transform thread only
+
+    def transform(unit: dict) -> Frames:
+        lid = unit["league_id"]
+        rostered.update(rostered_ids({lid: unit["rosters"]}))
+        meta = [] if unit["frozen"] else [unit["meta"]]
+        s = unit["fc_settings"] if unit["frozen"] else fc_settings(unit["meta"])
+        if s not in mv_by_settings:
+            fc.result(s)   # a history league's settings may be new to the matrix
+            pulls = {k: fc.result(k) for k in {s, *matrix}}
+            mv_by_settings[s] = league_market(mv_f.result(), pulls, s)
+        return build_league_frames(meta, unit["managers"], {lid: unit["rosters"]},
+                                   mv_by_settings[s], unit["traded_picks"])
+
+    loaded_rows = 0   # load thread only
+
+    def load_batch(batch: list[Frames]) -> None:
+        nonlocal loaded_rows
+        frames = concat_frames(batch)
+        if dry_run:
+            for name, df in vars(frames).items():
+                dry_counts[name] = dry_counts.get(name, 0) + len(df)
+        else:
+            load_league_frames(engine, frames)
+            loaded_rows += sum(len(df) for df in vars(frames).values())
+
+    abort = threading.Event()
+    q_units: queue.Queue = queue.Queue(maxsize=PIPELINE_QUEUE)
+    q_frames: queue.Queue = queue.Queue(maxsize=PIPELINE_QUEUE)
+    stages = [Stage("transform", transform, q_units, q_frames, abort),
+              Stage("load", load_batch, q_frames, None, abort, batch=True)]
+    for st in stages:
+        st.start()
+
+    units: list[dict] = []   # slim records for the activity loader
+    t0 = time.perf_counter()
+    with stage("league_pipeline") as span:
+        try:
+            for unit in iter_league_units(leagues, frozen=frozen, journal=journal):  # current + prior seasons
+                units.append({"league_id": unit["league_id"], "frozen": unit["frozen"], "weeks": unit["weeks"]})
+                if not _put(q_units, unit, abort):
+                    break
+            extract_s = time.perf_counter() - t0
+        except BaseException:
+            abort.set()
+            raise
+        finally:
+            _put(q_units, _DONE, abort)
+            for st in stages:
+                st.join()
+            side.shutdown(wait=not abort.is_set(), cancel_futures=abort.is_set())
+        for st in stages:
+            if st.error is not None:
+                raise st.error
+        span.rows_read, span.rows_written = len(units), loaded_rows
+    n_frozen = sum(u["frozen"] for u in units)
+    log.info("League-seasons: %s extracted, %s frozen (served from warehouse)", len(units) - n_frozen, n_frozen)
+    log.info("Pipeline: extract %.1f s | transform busy %.1f s | load busy %.1f s | wall %.1f s",
+             extract_s, stages[0].busy_s, stages[1].busy_s, time.perf_counter() - t0)
+    if journal.reused:
+        log.info("Journal: %s unit(s) reused from the interrupted run", journal.reused)
+
+    dim_players = build_dim_players(player_f.result(), rostered)
+    for line in http_report():
+        log.info("HTTP %s", line)
 
     if dry_run:
+        dry_counts["dim_players"] = len(dim_players)
         log.info("DRY RUN — frames built, skipping DB load")
-        for name, df in vars(frames).items():
-            log.info("  %-26s %s rows", name, len(df))
+        for name in vars(Frames()):
+            log.info("  %-26s %s rows", name, dry_counts.get(name, 0))
+        journal.finish()
         return
 
-    engine = get_engine()
-    load(engine, frames)
+    with stage("dim_players") as st:
+        sync_dim_players(engine, dim_players)
+        st.rows_read = len(dim_players)
+    pulls = fc.results()
+    with stage("market_store") as st, engine.begin() as conn:
+        st.rows_written = n_fc = store_pulls(conn, pulls)
+        refresh_current_tables(conn)
+    log.info("FantasyCalc: %s pull(s) for %s league-season(s), %s rows stored in fc_market_values",
+             len(pulls), len(units), n_fc)
+    if os.getenv("LOAD_ACTIVITY", "true").lower() == "true":
+        with stage("activity"):
+            load_activity(engine, units)
+    journal.finish()
     log.info("ETL complete for snapshot_date=%s", SNAPSHOT_DATE)
 
     if os.getenv("EXPORT_CSV", "true").lower() == "true":
-        export_extracts(engine, Path(os.getenv("EXTRACT_DIR", str(DATA_DIR / "powerbi"))))
+        out_dir = Path(os.getenv("EXTRACT_DIR", str(DATA_DIR / "powerbi")))
+        with stage("export"):
+            if os.getenv("EXTRACT_FORMAT", "csv").lower() != "parquet":
+                export_extracts(engine, out_dir)
+            elif importlib.util.find_spec("pyarrow") is None:
+                log.warning("EXTRACT_FORMAT=parquet needs pyarrow (pip install pyarrow) — writing CSV instead")
+                export_extracts(engine, out_dir)
+            else:
+                export_parquet(engine, out_dir)
 
 
 def main() -> None:
+    global ETL_WORKERS
     ap = argparse.ArgumentParser(description="Dynasty portfolio ETL")
     ap.add_argument("--dry-run", action="store_true", help="extract + transform, skip DB load")
+    ap.add_argument("--workers", type=int, default=None,
+                    help=f"concurrent league-season extraction (default ETL_WORKERS={ETL_WORKERS}; 1 = serial)")
+    ap.add_argument("--refresh-history", action="store_true",
+                    help="re-walk and re-extract completed (frozen) seasons too")
+    ap.add_argument("--resume", action="store_true",
+                    help="reuse units journaled by today's interrupted run; fetch only the rest")
     args = ap.parse_args()
+    if args.workers is not None:
+        ETL_WORKERS = max(1, args.workers)
     try:
-        run(dry_run=args.dry_run)
+        with pipeline_run("etl_pipeline"):
+            run(dry_run=args.dry_run, refresh_history=args.refresh_history, resume=args.resume)
     except KeyboardInterrupt:
         log.warning("Interrupted")
         sys.exit(130)
@@ -0,0 +1,216 @@
+"""
+fc_market.py — the FantasyCalc pull matrix, shared by etl_pipeline and
+pick_values_etl.
+
+FantasyCalc prices are settings-aware: the same player (or the same '2027
+1st') is worth different amounts in a 10-team 1QB half-PPR league and a
+14-team superflex PPR league. etl_pipeline used to pull once per QB format
+with the FIRST league's team count and ppr=1, and pick_values_etl pulled two
+hard-coded curves of its own, so most leagues were priced with someone
+else's settings and the same endpoint was hit twice per day.
+
+  - fc_settings() maps a league to the (numQbs, numTeams, ppr) pull that
+    prices it (ppr snapped to the 0 / 0.5 / 1 FantasyCalc serves);
+    pull_matrix() is the distinct set across leagues.
+  - FantasyCalcPulls fetches each tuple exactly once on a shared pool, so
+    the matrix runs concurrently and a league found later in the history
+    walk that needs a new tuple submits it once, not per league.
+  - fc_market_values keeps the latest pull per tuple (players and picks).
+    etl_pipeline writes it; pick_values_etl reads its pick curves from it
+    and only fetches tuples the ETL has not stored today.
+  - nearest() picks the stored tuple closest to a league's settings for a
+    given QB format — the price of the format the league does not play,
+    which the fact and dim_draft_picks still carry side by side.
+"""
+from __future__ import annotations
+
+import logging
+import re
+import sqlite3
+import threading
+from concurrent.futures import Executor, Future
+from datetime import date
+from typing import TYPE_CHECKING, Callable, Iterable
+
+import pandas as pd
+
+from http_client import FANTASYCALC_LIMITER, http_get
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Connection
+
+log = logging.getLogger("fc_market")
+
+FC_URL = "https://api.fantasycalc.com/values/current"
+FC_PPR_STEPS = (0.0, 0.5, 1.0)   # the reception scoring FantasyCalc prices
+
+Settings = tuple[int, int, float]   # (numQbs, numTeams, ppr)
+
+TABLE = "fc_market_values"
+
+DDL = f"""
+CREATE TABLE IF NOT EXISTS {TABLE} (
+    num_qbs         INTEGER NOT NULL,
+    num_teams       INTEGER NOT NULL,
+    ppr             REAL    NOT NULL,
+    asset_key       TEXT    NOT NULL,   -- sleeper_id, else 'mfl:<id>', else 'name:<fc_name>' (picks)
+    sleeper_id      TEXT,
+    fc_name         TEXT,
+    position        TEXT,
+    fc_value        REAL,
+    fc_trend_30day  REAL,
+    fc_adp          REAL,
+    pulled_on       TEXT    NOT NULL,
+    PRIMARY KEY (num_qbs, num_teams, ppr, asset_key)
+)
+"""
+
+_COLS = ["sleeper_id", "fc_name", "position", "fc_value", "fc_trend_30day", "fc_adp"]
+
+
+def fc_settings(league: dict) -> Settings:
+    """The pull that prices a league, from parse_league_settings() output or
+    a dim_leagues row (is_superflex, number_of_teams, ppr)."""
+    ppr = float(league.get("ppr") or 0)
+    return (2 if league.get("is_superflex") else 1,
+            int(league.get("number_of_teams") or 12),
+            min(FC_PPR_STEPS, key=lambda s: abs(s - ppr)))
+
+
+def pull_matrix(leagues: Iterable[dict]) -> list[Settings]:
+    return sorted({fc_settings(lg) for lg in leagues})
+
+
+def nearest(settings: Settings, available: Iterable[Settings], num_qbs: int) -> Settings | None:
+    """The available tuple of format `num_qbs` closest to `settings`: fewest
+    teams apart, then closest ppr. None if that format was never pulled."""
+    cands = [s for s in available if s[0] == num_qbs]
+    return min(cands, key=lambda s: (abs(s[1] - settings[1]), abs(s[2] - settings[2]), s), default=None)
+
+
+def fetch_fantasycalc(num_qbs: int, num_teams: int, ppr: float) -> pd.DataFrame:
+    """FantasyCalc current values; each record carries sleeperId for a clean join.
+    Returns players AND draft picks (picks come back with position == 'PICK')."""
+    params = {"isDynasty": "true", "numQbs": num_qbs, "numTeams": num_teams, "ppr": max(ppr, 0)}
+    data = http_get(FC_URL, FANTASYCALC_LIMITER, params=params) or []
+    rows = []
+    for rec in data:
+        p = rec.get("player", {}) or {}
+        rows.append({
+            "sleeper_id": p.get("sleeperId"),
+            "mfl_id": p.get("mflId"),
+            "fc_name": p.get("name"),
+            "position": p.get("position"),
+            "fc_value": rec.get("value"),
+            "fc_redraft_value": rec.get("redraftValue"),
+            "fc_overall_rank": rec.get("overallRank"),
+            "fc_position_rank": rec.get("positionRank"),
+            "fc_trend_30day": rec.get("trend30Day"),
+            "fc_adp": rec.get("maybeAdp"),
+        })
+    df = pd.DataFrame(rows)
+    log.info("FantasyCalc: %s assets (numQbs=%s, numTeams=%s, ppr=%s)", len(df), num_qbs, num_teams, ppr)
+    return df
+
+
+class FantasyCalcPulls:
+    """One fetch per settings tuple, run on `pool` and shared by every
+    caller that asks for the same tuple. `fetch` defaults to
+    fetch_fantasycalc (etl_pipeline wraps it in its run journal)."""
+
+    def __init__(self, pool: Executor, fetch: Callable[[int, int, float], pd.DataFrame] = fetch_fantasycalc):
+        self._pool = pool
+        self._fetch = fetch
+        self._futures: dict[Settings, Future] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, settings: Settings) -> Future:
+        with self._lock:
+            fut = self._futures.get(settings)
+            if fut is None:
+                fut = self._futures[settings] = self._pool.submit(self._fetch, *settings)
+            return fut
+
+    def result(self, settings: Settings) -> pd.DataFrame:
+        return self.submit(settings).result()
+
+    def results(self) -> dict[Settings, pd.DataFrame]:
+        with self._lock:
+            futures = dict(self._futures)
+        return {s: f.result() for s, f in sorted(futures.items())}
+
+
+def players_by_sleeper_id(fc: pd.DataFrame) -> pd.DataFrame:
+    """A pull's player rows keyed by sleeper_id (one row each; picks and
+    players FantasyCalc cannot map to Sleeper dropped)."""
+    if fc.empty:
+        return pd.DataFrame(columns=["fc_value", "fc_adp", "fc_trend_30day"])
+    players = fc[fc["position"] != "PICK"].dropna(subset=["sleeper_id"])
+    return (players.assign(sleeper_id=players["sleeper_id"].astype(str))
+                   .drop_duplicates("sleeper_id").set_index("sleeper_id"))
+
+
+def pick_curve(fc: pd.DataFrame) -> dict[tuple[str, int], int]:
+    """(year, round) -> value, from FC's round-level generic pick entries."""
+    curve: dict[tuple[str, int], int] = {}
+    if fc.empty:
+        return curve
+    for name, value in fc.loc[fc["position"] == "PICK", ["fc_name", "fc_value"]].itertuples(index=False):
+        m = re.fullmatch(r"(20\d\d) (\d)(?:st|nd|rd|th)", name or "")
+        if m and value is not None and value == value:   # round generic like '2027 2nd' (slot picks like '2026 Pick 1.01' skipped)
+            curve[(m.group(1), int(m.group(2)))] = int(value)
+    return curve
+
+
+def _asset_keys(fc: pd.DataFrame) -> pd.Series:
+    sid = fc["sleeper_id"].astype("string")
+    mfl = "mfl:" + fc["mfl_id"].astype("string") if "mfl_id" in fc else pd.Series(pd.NA, index=fc.index)
+    return sid.fillna(mfl).fillna("name:" + fc["fc_name"].astype("string")).astype(object)
+
+
+def store_pulls(conn: Connection, pulls: dict[Settings, pd.DataFrame]) -> int:
+    """Replace the stored rows of every pulled tuple (other tuples are kept,
+    so a league that left the matrix still has its last prices). An empty
+    pull (a 404 comes back as []) is not a price list: the tuple keeps its
+    stored rows."""
+    from sqlalchemy import text
+
+    conn.execute(text(DDL))
+    frames = []
+    for (q, t, p), fc in pulls.items():
+        if fc.empty:
+            continue
+        conn.execute(text(f"DELETE FROM {TABLE} WHERE num_qbs = :q AND num_teams = :t AND ppr = :p"),
+                     {"q": q, "t": t, "p": p})
+        df = fc.reindex(columns=_COLS).assign(asset_key=_asset_keys(fc), num_qbs=q, num_teams=t, ppr=p,
+                                              pulled_on=date.today().isoformat())
+        df["sleeper_id"] = df["sleeper_id"].astype("string").astype(object)
+        frames.append(df.drop_duplicates("asset_key"))
+    if not frames:
+        return 0
+    out = pd.concat(frames, ignore_index=True)
+    out.astype(object).where(out.notna(), None).to_sql(TABLE, conn, if_exists="append", index=False)
+    return len(out)
+
+
+def read_pulls(con: sqlite3.Connection, since: str | None = None) -> dict[Settings, pd.DataFrame]:
+    """The stored pulls from a sqlite3 connection, keyed by settings; only
+    those pulled on or after `since` (ISO date) when given. Empty if the ETL
+    has never written them."""
+    if not con.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                       (TABLE,)).fetchone():
+        return {}
+    df = pd.read_sql_query(f"SELECT num_qbs, num_teams, ppr, {', '.join(_COLS)} FROM {TABLE} "
+                           f"WHERE pulled_on >= ?", con, params=(since or "",))
+    return {(int(q), int(t), float(p)): g[_COLS].reset_index(drop=True)
+            for (q, t, p), g in df.groupby(["num_qbs", "num_teams", "ppr"])}
+
+
+def pull_dates(con: sqlite3.Connection) -> dict[Settings, str]:
+    """pulled_on per stored tuple (store_pulls replaces a tuple whole, so
+    there is one)."""
+    if not con.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                       (TABLE,)).fetchone():
+        return {}
+    return {(int(q), int(t), float(p)): d for q, t, p, d in con.execute(
+        f"SELECT num_qbs, num_teams, ppr, MAX(pulled_on) FROM {TABLE} GROUP BY 1, 2, 3")}
@@ -0,0 +1,633 @@
+"""
+http_client.py — the shared, defensive HTTP layer for every pipeline script.
+
+etl_pipeline.py, pick_values_etl.py, points_model.py, outcomes_etl.py,
+rebuild_production_value.py and dp_archive_etl.py all fetch from the same few
+hosts (Sleeper, FantasyCalc, GitHub/nflverse). Running several of them at once
+used to mean several independent limiters — each polite on its own, together
+over the host budget. Everything now goes through http_get() here, and every
+request spends a token from a per-host bucket that lives in SQLite, so the
+budget is shared across threads AND processes.
+
+RATE LIMITING (token bucket + AIMD):
+  - One row per host in <DATA_DIR>/ratelimit.db (override: RATE_LIMIT_DB).
+    Taking a token is a single BEGIN IMMEDIATE transaction, which SQLite
+    serializes across processes — no lock files, no daemon.
+  - The refill rate adapts. A 429, or any response carrying Retry-After,
+    halves the rate (multiplicative decrease) and parks the bucket until the
+    Retry-After deadline for every process. Each success adds back a small
+    fixed step (additive increase) up to the configured ceiling.
+  - throughput_report() says what each host actually delivered this process
+    (requests, wall span, achieved req/s, throttle events, time spent waiting).
+
+RESPONSE CACHE:
+  Most payloads barely change between runs (the DP crosswalk and values CSVs,
+  nflverse season files, prior-season rosters, finished weeks). http_get keeps
+  an on-disk copy and decides per endpoint class (CACHE_POLICY) how long it is
+  fresh; callers override with ttl=FOREVER for completed seasons/weeks. Stale
+  entries are revalidated with ETag / Last-Modified, so a re-run mostly costs
+  304s and local reads. cache_report() gives this run's hit/304/miss counts.
+
+CASSETTES (record / replay):
+  HTTP_CASSETTE_MODE=record writes every response (status, body, validators)
+  to a cassette directory while running live; =replay serves those files
+  instead of the network, after an injected delay (HTTP_REPLAY_LATENCY_MS),
+  and fails loudly on anything not recorded. The response cache is bypassed
+  in both modes so every request is recorded and every replay is the same.
+  Token buckets still apply during replay, so a replayed run keeps the live
+  request pacing. bench_etl.py drives whole pipeline runs off a cassette.
+
+STREAMING:
+  http_stream() hands back the body as text chunks and iter_json_object()
+  parses a top-level JSON object member by member, so a large map payload
+  (Sleeper's /players/nfl) never has to exist in memory as one string.
+
+Configuration (environment / .env):
+    DATA_DIR=./data
+    RATE_LIMIT_DB=                # defaults to <DATA_DIR>/ratelimit.db
+    HTTP_CACHE=true               # false = always download
+    HTTP_CACHE_DIR=               # defaults to <DATA_DIR>/http_cache
+    HTTP_CASSETTE_MODE=off        # record | replay | off
+    HTTP_CASSETTE_DIR=            # defaults to <DATA_DIR>/cassettes
+    HTTP_REPLAY_LATENCY_MS=0      # simulated round trip per replayed request
+"""
+from __future__ import annotations
+
+import codecs
+import hashlib
+import io
+import json
+import logging
+import math
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator
+
+import pandas as pd
+import requests
+from requests.structures import CaseInsensitiveDict
+
+USER_AGENT = "dynasty-portfolio-etl/1.0 (+analytics-portfolio-project)"
+
+log = logging.getLogger("http")
+
+
+# --------------------------------------------------------------------------- #
+# Cross-process adaptive token bucket
+# --------------------------------------------------------------------------- #
+
+_BUCKET_DDL = """
+CREATE TABLE IF NOT EXISTS rate_buckets (
+    key           TEXT PRIMARY KEY,   -- host budget name, e.g. 'api.sleeper.app'
+    tokens        REAL NOT NULL,
+    rate          REAL NOT NULL,      -- current (adapted) refill rate, req/s
+    updated       REAL NOT NULL,      -- epoch seconds of the last refill
+    blocked_until REAL NOT NULL DEFAULT 0   -- shared Retry-After deadline
+)
+"""
+
+
+def _env_path(var: str, default_name: str) -> Path:
+    """Resolved at first use, not import: callers load .env after importing."""
+    return Path(os.getenv(var) or Path(os.getenv("DATA_DIR", "./data")) / default_name)
+
+
+class RateLimiter:
+    """Token bucket shared by every process that opens the same RATE_LIMIT_DB.
+
+    `min_interval_s` keeps its old meaning as the CEILING: the bucket never
+    refills faster than 1 / min_interval_s, so Sleeper's default of 0.12 s is
+    still ~8 req/s at most. `burst` tokens may be spent back to back after an
+    idle spell. AIMD moves the live rate between min_rate and that ceiling."""
+
+    def __init__(self, key: str, min_interval_s: float = 0.12, *, burst: float = 2.0,
+                 min_rate: float = 0.2, db_path: Path | None = None) -> None:
+        self.key = key
+        self.max_rate = 1.0 / min_interval_s
+        self.min_rate = min(min_rate, self.max_rate)
+        self.burst = burst
+        self.increase = self.max_rate / 20      # additive step per success
+        self._db_path = db_path
+        self._ready = False
+        self._lock = threading.Lock()
+        # per-process accounting for throughput_report()
+        self.requests = 0
+        self.throttles = 0
+        self.waited_s = 0.0
+        self._first: float | None = None
+        self._last: float | None = None
+        LIMITERS.append(self)
+
+    # -- storage -------------------------------------------------------------
+    @property
+    def db_path(self) -> Path:
+        if self._db_path is None:
+            self._db_path = _env_path("RATE_LIMIT_DB", "ratelimit.db")
+        return self._db_path
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._ready:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        con = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        if not self._ready:
+            with self._lock:
+                if not self._ready:
+                    con.execute("PRAGMA journal_mode=WAL")
+                    con.execute(_BUCKET_DDL)
+                    self._ready = True
+        return con
+
+    def _txn(self, fn) -> Any:
+        """Refill the bucket, then apply fn(tokens, rate, blocked_until, now)
+        -> ((tokens, rate, blocked_until), result) in one IMMEDIATE txn."""
+        con = self._connect()
+        try:
+            con.execute("BEGIN IMMEDIATE")
+            now = time.time()
+            row = con.execute(
+                "SELECT tokens, rate, updated, blocked_until FROM rate_buckets WHERE key = ?",
+                (self.key,)).fetchone()
+            if row is None:
+                row = (self.burst, self.max_rate, now, 0.0)
+            tokens, rate, updated, blocked = row
+            # A ceiling lowered in code since the row was written wins at once.
+            rate = min(rate, self.max_rate)
+            tokens = min(self.burst, tokens + max(0.0, now - updated) * rate)
+            (tokens, rate, blocked), result = fn(tokens, rate, blocked, now)
+            con.execute(
+                "INSERT INTO rate_buckets (key, tokens, rate, updated, blocked_until) "
+                "VALUES (?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET "
+                "tokens = excluded.tokens, rate = excluded.rate, "
+                "updated = excluded.updated, blocked_until = excluded.blocked_until",
+                (self.key, tokens, rate, now, blocked))
+            con.execute("COMMIT")
+            return result
+        except BaseException:
+            if con.in_transaction:
+                con.execute("ROLLBACK")
+            raise
+        finally:
+            con.close()
+
+    # -- public API ------------------------------------------------------------
+    def wait(self) -> None:
+        """Block until this process may send one request to the host."""
+        def take(tokens, rate, blocked, now):
+            if now < blocked:
+                return (tokens, rate, blocked), blocked - now
+            if tokens >= 1.0:
+                return (tokens - 1.0, rate, blocked), 0.0
+            return (tokens, rate, blocked), (1.0 - tokens) / rate
+
+        while True:
+            delay = self._txn(take)
+            if delay <= 0:
+                break
+            # Re-check at least once a second: another process may have been
+            # throttled (or finished) meanwhile.
+            nap = min(delay, 1.0)
+            self.waited_s += nap
+            time.sleep(nap)
+        now = time.monotonic()
+        with self._lock:
+            self.requests += 1
+            self._first = self._first if self._first is not None else now
+            self._last = now
+
+    def on_success(self) -> None:
+        """Additive increase, up to the ceiling."""
+        self._txn(lambda t, r, b, now: ((t, min(self.max_rate, r + self.increase), b), None))
+
+    def on_throttle(self, retry_after_s: float | None = None) -> None:
+        """Multiplicative decrease; a Retry-After pauses every process."""
+        self.throttles += 1
+
+        def cut(tokens, rate, blocked, now):
+            until = max(blocked, now + retry_after_s) if retry_after_s else blocked
+            return (0.0, max(self.min_rate, rate / 2), until), None
+        self._txn(cut)
+
+    def current_rate(self) -> float:
+        return self._txn(lambda t, r, b, now: ((t, r, b), r))
+
+    def throughput(self) -> dict:
+        span = (self._last - self._first) if self.requests > 1 else 0.0
+        return {
+            "host": self.key,
+            "requests": self.requests,
+            "span_s": round(span, 2),
+            "achieved_rps": round((self.requests - 1) / span, 2) if span > 0 else None,
+            "ceiling_rps": round(self.max_rate, 2),
+            "throttles": self.throttles,
+            "waited_s": round(self.waited_s, 2),
+        }
+
+
+LIMITERS: list[RateLimiter] = []
+
+# One budget per host. The ceilings are the old per-process intervals.
+SLEEPER_LIMITER = RateLimiter("api.sleeper.app", 0.12)
+FANTASYCALC_LIMITER = RateLimiter("api.fantasycalc.com", 0.5)
+GITHUB_LIMITER = RateLimiter("github.com", 0.5)   # raw.githubusercontent + nflverse releases
+
+
+def throughput_report() -> list[str]:
+    """One human-readable line per host this process actually called."""
+    lines = []
+    for lim in LIMITERS:
+        t = lim.throughput()
+        if not t["requests"]:
+            continue
+        rps = f"{t['achieved_rps']:.2f} req/s" if t["achieved_rps"] else "n/a"
+        lines.append(
+            f"{t['host']}: {t['requests']} request(s) over {t['span_s']:.1f} s = {rps} "
+            f"(ceiling {t['ceiling_rps']:.2f}; throttled {t['throttles']}x; "
+            f"waited {t['waited_s']:.1f} s for tokens)")
+    return lines
+
+
+# --------------------------------------------------------------------------- #
+# Persistent response cache (TTL per endpoint class + conditional revalidation)
+# --------------------------------------------------------------------------- #
+
+FOREVER = math.inf
+HOUR = 3600.0
+
+# First match wins. ttl=None means "never cache" (the Sleeper player DB has its
+# own store in etl_pipeline). ttl=0 means "always revalidate": the stored copy
+# is only served after a 304. Callers that KNOW a payload is immutable (a
+# completed season, a finished week) pass ttl=FOREVER to http_get directly.
+CACHE_POLICY: list[tuple[re.Pattern, float | None]] = [
+    (re.compile(r"/players/nfl$"), None),
+    (re.compile(r"db_playerids\.csv$"), 24 * HOUR),          # player id crosswalk: daily
+    (re.compile(r"values-players\.csv$"), 12 * HOUR),        # DP values: ~daily scrape
+    (re.compile(r"stats_player_week_\d{4}\.csv$"), 24 * HOUR),
+    (re.compile(r"schedules/games\.csv$"), 24 * HOUR),
+    (re.compile(r"api\.fantasycalc\.com/values/current"), 1 * HOUR),
+    (re.compile(r"api\.sleeper\.app/v1/user/"), 1 * HOUR),
+    (re.compile(r"api\.sleeper\.app/v1/league/"), 0.0),
+]
+
+
+def cache_ttl(url: str) -> float | None:
+    for pat, ttl in CACHE_POLICY:
+        if pat.search(url):
+            return ttl
+    return None
+
+
+class ResponseCache:
+    """One <sha1>.body + <sha1>.json (url, validators, fetched_at) pair per
+    request under <DATA_DIR>/http_cache (override: HTTP_CACHE_DIR). Writes
+    are tmp-then-rename, so a crashed run never leaves a torn entry.
+    HTTP_CACHE=false disables it."""
+
+    def __init__(self, root: Path | None = None) -> None:
+        self._root = root
+        self._lock = threading.Lock()
+        self.stats = {"hit": 0, "revalidated": 0, "miss": 0, "bytes_saved": 0}
+
+    @property
+    def root(self) -> Path:
+        if self._root is None:
+            self._root = _env_path("HTTP_CACHE_DIR", "http_cache")
+        return self._root
+
+    @staticmethod
+    def enabled() -> bool:
+        return os.getenv("HTTP_CACHE", "true").lower() == "true" and Cassette.mode() == "off"
+
+    @staticmethod
+    def key(url: str, params: dict | None) -> str:
+        raw = url + "?" + "&".join(f"{k}={params[k]}" for k in sorted(params or {}))
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    def load(self, key: str) -> tuple[dict, str] | None:
+        meta_p, body_p = self.root / f"{key}.json", self.root / f"{key}.body"
+        try:
+            return json.loads(meta_p.read_text()), body_p.read_text(encoding="utf-8")
+        except (OSError, ValueError):
+            return None
+
+    def store(self, key: str, url: str, body: str, headers) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        meta = {"url": url, "fetched_at": time.time(),
+                "etag": headers.get("ETag"), "last_modified": headers.get("Last-Modified")}
+        for suffix, content in ((".body", body), (".json", json.dumps(meta))):
+            tmp = self.root / f"{key}{suffix}.{os.getpid()}.{threading.get_ident()}.tmp"
+            tmp.write_text(content, encoding="utf-8")
+            os.replace(tmp, self.root / f"{key}{suffix}")
+
+    def touch(self, key: str, meta: dict) -> None:
+        meta = {**meta, "fetched_at": time.time()}
+        tmp = self.root / f"{key}.json.{os.getpid()}.{threading.get_ident()}.tmp"
+        tmp.write_text(json.dumps(meta))
+        os.replace(tmp, self.root / f"{key}.json")
+
+    def count(self, outcome: str, nbytes: int = 0) -> None:
+        with self._lock:
+            self.stats[outcome] += 1
+            if outcome != "miss":
+                self.stats["bytes_saved"] += nbytes
+
+
+CACHE = ResponseCache()
+
+
+def cache_report() -> list[str]:
+    st = CACHE.stats
+    if not (st["hit"] or st["revalidated"] or st["miss"]):
+        return []
+    return [f"response cache: {st['hit']} fresh hit(s), {st['revalidated']} revalidated (304), "
+            f"{st['miss']} miss(es); {st['bytes_saved'] / 1e6:.1f} MB not re-downloaded"]
+
+
+def http_report() -> list[str]:
+    """Per-host throughput plus this run's cache outcome counts."""
+    return throughput_report() + cache_report()
+
+
+# --------------------------------------------------------------------------- #
+# Record / replay cassettes
+# --------------------------------------------------------------------------- #
+
+class Cassette:
+    """<key>.body (raw bytes) + <key>.json (url, params, status, headers) per
+    request, keyed like the response cache. Recording the same request twice
+    keeps the latest response."""
+
+    KEEP_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+    def __init__(self, root: Path | None = None) -> None:
+        self._root = root
+
+    @property
+    def root(self) -> Path:
+        if self._root is None:
+            self._root = _env_path("HTTP_CASSETTE_DIR", "cassettes")
+        return self._root
+
+    @staticmethod
+    def mode() -> str:
+        mode = os.getenv("HTTP_CASSETTE_MODE", "off").lower()
+        if mode not in ("off", "record", "replay"):
+            raise ValueError(f"HTTP_CASSETTE_MODE must be record, replay or off (got {mode!r})")
+        return mode
+
+    def record(self, url: str, params: dict | None, resp: requests.Response) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        key = ResponseCache.key(url, params)
+        meta = {"url": url, "params": params, "status": resp.status_code,
+                "encoding": resp.encoding,
+                "headers": {h: resp.headers[h] for h in self.KEEP_HEADERS if h in resp.headers}}
+        for suffix, content in ((".body", resp.content), (".json", json.dumps(meta).encode())):
+            tmp = self.root / f"{key}{suffix}.{os.getpid()}.{threading.get_ident()}.tmp"
+            tmp.write_bytes(content)
+            os.replace(tmp, self.root / f"{key}{suffix}")
+
+    def replay(self, url: str, params: dict | None) -> requests.Response:
+        key = ResponseCache.key(url, params)
+        try:
+            meta = json.loads((self.root / f"{key}.json").read_text())
+            body = (self.root / f"{key}.body").read_bytes()
+        except (OSError, ValueError):
+            raise RuntimeError(f"Not in cassette {self.root}: {url} {params or ''}") from None
+        latency_ms = float(os.getenv("HTTP_REPLAY_LATENCY_MS", "0") or 0)
+        if latency_ms > 0:
+            time.sleep(latency_ms / 1000)
+        resp = requests.Response()
+        resp.status_code = meta["status"]
+        resp.url = meta["url"]
+        resp.encoding = meta.get("encoding") or "utf-8"
+        resp.headers = CaseInsensitiveDict(meta.get("headers") or {})
+        resp._content = body
+        resp._content_consumed = True
+        return resp
+
+
+CASSETTE = Cassette()
+
+_request_lock = threading.Lock()
+_request_count = 0
+
+
+def request_count() -> int:
+    """GETs issued by this process so far (live or replayed, retries included)."""
+    return _request_count
+
+
+def _count_request() -> None:
+    global _request_count
+    with _request_lock:
+        _request_count += 1
+
+
+# --------------------------------------------------------------------------- #
+# GET with retry/backoff
+# --------------------------------------------------------------------------- #
+
+SESSION = requests.Session()
+SESSION.headers.update({"User-Agent": USER_AGENT, "Accept": "application/json"})
+
+RETRYABLE = {429, 500, 502, 503, 504}
+_UNSET = object()
+
+
+def http_get(
+    url: str,
+    limiter: RateLimiter,
+    *,
+    params: dict | None = None,
+    expect: str = "json",
+    max_retries: int = 5,
+    timeout: int = 30,
+    ttl: float | None | object = _UNSET,
+) -> Any | None:
+    """GET with exponential backoff + jitter. Returns None on a clean 404 so
+    callers can treat 'not found' as empty rather than fatal.
+
+    Cached per CACHE_POLICY unless `ttl` overrides it (FOREVER for payloads
+    the caller knows are immutable, None to bypass). A fresh entry is served
+    without touching the network or the rate budget; a stale one is
+    revalidated with If-None-Match / If-Modified-Since and reused on 304."""
+    ttl = cache_ttl(url) if ttl is _UNSET else ttl
+    use_cache = ttl is not None and CACHE.enabled()
+    key = CACHE.key(url, params) if use_cache else None
+    cached = CACHE.load(key) if use_cache else None
+    headers: dict[str, str] = {}
+    if cached:
+        meta, body = cached
+        if time.time() - meta["fetched_at"] < ttl:
+            CACHE.count("hit", len(body))
+            return _decode(body, expect)
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    resp = _get_with_retries(url, limiter, params=params, headers=headers,
+                             max_retries=max_retries, timeout=timeout)
+    if resp is None:
+        return None
+    if resp.status_code == 304 and cached:
+        CACHE.touch(key, meta)
+        CACHE.count("revalidated", len(body))
+        return _decode(body, expect)
+    if use_cache:
+        CACHE.store(key, url, resp.text, resp.headers)
+        CACHE.count("miss")
+    return resp.json() if expect == "json" else resp.text
+
+
+@contextmanager
+def http_stream(url: str, limiter: RateLimiter, *, chunk_size: int = 1 << 16,
+                max_retries: int = 5, timeout: int = 60) -> Iterator[Iterator[str] | None]:
+    """GET whose body is consumed incrementally as decoded text chunks, for
+    payloads too big to hold twice (the ~15 MB Sleeper player DB). Same
+    retry/limiter behaviour as http_get; never cached here. Yields None on 404."""
+    resp = _get_with_retries(url, limiter, max_retries=max_retries, timeout=timeout, stream=True)
+    if resp is None:
+        yield None
+        return
+    try:
+        decoder = codecs.getincrementaldecoder(resp.encoding or "utf-8")(errors="replace")
+        def chunks() -> Iterator[str]:
+            for raw in resp.iter_content(chunk_size=chunk_size):
+                yield decoder.decode(raw)
+            yield decoder.decode(b"", final=True)
+        yield chunks()
+    finally:
+        resp.close()
+
+
+_JSON = json.JSONDecoder()
+_WS = " \t\n\r"
+
+
+def iter_json_object(chunks: Iterator[str]) -> Iterator[tuple[str, Any]]:
+    """Yield (key, value) for each member of a top-level JSON object while it
+    is still arriving. Only the member being parsed is buffered, so memory is
+    bounded by the largest single value, not the payload."""
+    it = iter(chunks)
+    buf, pos, done = "", 0, False
+
+    def fill() -> bool:
+        nonlocal buf, pos, done
+        for chunk in it:
+            if chunk:
+                buf, pos = buf[pos:] + chunk, 0
+                return True
+        done = True
+        return False
+
+    def skip_ws() -> str:
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in _WS:
+                pos += 1
+            if pos < len(buf) or not fill():
+                return buf[pos] if pos < len(buf) else ""
+
+    def value() -> Any:
+        # a value ending exactly at the buffer edge may be a truncated number,
+        # so only accept it once a following character (or EOF) is in view
+        nonlocal pos
+        while True:
+            try:
+                obj, end = _JSON.raw_decode(buf, pos)
+                if end < len(buf) or done:
+                    pos = end
+                    return obj
+            except json.JSONDecodeError:
+                if done:
+                    raise
+            if not fill() and done:
+                obj, pos = _JSON.raw_decode(buf, pos)
+                return obj
+
+    if skip_ws() != "{":
+        raise ValueError("expected a JSON object")
+    pos += 1
+    if skip_ws() == "}":
+        return
+    while True:
+        skip_ws()
+        key = value()
+        if skip_ws() != ":":
+            raise ValueError(f"expected ':' after key {key!r}")
+        pos += 1
+        skip_ws()
+        yield key, value()
+        sep = skip_ws()
+        pos += 1
+        if sep == "}":
+            return
+        if sep != ",":
+            raise ValueError(f"expected ',' or '}}' after member {key!r}")
+
+
+def _get_with_retries(url: str, limiter: RateLimiter, *, params: dict | None = None,
+                      headers: dict | None = None, max_retries: int = 5, timeout: int = 30,
+                      stream: bool = False) -> requests.Response | None:
+    """The shared retry loop: returns the 200/304 response, None on 404."""
+    mode = CASSETTE.mode()
+    if mode == "replay":
+        limiter.wait()
+        _count_request()
+        resp = CASSETTE.replay(url, params)
+        return None if resp.status_code == 404 else resp
+
+    last_exc: Exception | None = None
+    for attempt in range(max_retries):
+        limiter.wait()
+        _count_request()
+        try:
+            resp = SESSION.get(url, params=params, timeout=timeout, headers=headers or None,
+                               stream=stream)
+        except requests.RequestException as exc:
+            last_exc = exc
+            _sleep_backoff(attempt)
+            continue
+
+        if mode == "record" and resp.status_code in (200, 404):
+            CASSETTE.record(url, params, resp)
+        if resp.status_code in (200, 304):
+            limiter.on_success()
+            return resp
+        if resp.status_code == 404:
+            return None
+        retry_after = resp.headers.get("Retry-After")
+        if resp.status_code == 429 or retry_after:
+            wait_s = min(60, int(retry_after)) if retry_after and retry_after.isdigit() else None
+            limiter.on_throttle(wait_s)
+        if resp.status_code in RETRYABLE:
+            if not (retry_after and retry_after.isdigit()):
+                _sleep_backoff(attempt)   # else: the bucket is parked until Retry-After
+            log.warning("Retry %s/%s on %s (HTTP %s)", attempt + 1, max_retries, url, resp.status_code)
+            continue
+        resp.raise_for_status()
+
+    raise RuntimeError(f"GET failed after {max_retries} retries: {url} ({last_exc})")
+
+
+def _decode(body: str, expect: str) -> Any:
+    return json.loads(body) if expect == "json" else body
+
+
+def http_csv(url: str, limiter: RateLimiter, *, timeout: int = 120, **read_csv_kwargs):
+    """CSV download through http_get, parsed with pandas. Unlike http_get a
+    404 raises: every CSV caller needs the file to exist."""
+    txt = http_get(url, limiter, expect="text", timeout=timeout)
+    if txt is None:
+        raise RuntimeError(f"404 Not Found: {url}")
+    return pd.read_csv(io.StringIO(txt), **read_csv_kwargs)
+
+
+def _sleep_backoff(attempt: int, base: float = 1.5, cap: float = 45.0) -> None:
+    time.sleep(min(cap, base ** attempt) + random.uniform(0, 0.75))
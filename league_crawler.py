@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+league_crawler.py — resumable, market-wide league crawl into the star schema.
+
+etl_pipeline.py loads the leagues of the configured managers. Market-wide
+questions (what do 12-team superflex rosters hold? how concentrated is the
+field's QB value?) need everyone else's leagues too, and Sleeper has no
+league directory — the only way in is the social graph. The crawler walks it
+breadth-first from seed users / leagues:
+
+    user   --/user/{id}/leagues/nfl/{season}-->  leagues
+    league --rosters + users-->                  the managers in it  --> ...
+
+and loads each dynasty league it reaches with the ETL's own extractor
+(extract_league_season), market join (league_market) and loaders.
+
+STATE (resumable, bounded memory):
+  The frontier and the visited set are one table, crawl_frontier, in
+  <DATA_DIR>/crawl_<season>.db (override: CRAWL_STATE_DB). Every user and
+  league ever discovered has a row — UNIQUE (kind, node_id) is the visited
+  set — and the 'pending' rows are the frontier, taken in (depth, seq)
+  order, i.e. BFS. Only the current batch lives in memory, so tens of
+  thousands of leagues cost the same few MB as a hundred. A league found in
+  a user's league list keeps that record as its payload until visited, so
+  it is not fetched a second time.
+
+  A batch's children and 'done' marks commit together, after the batch is in
+  the warehouse. A crash in between re-runs that batch (upserts and the
+  same-day fact snapshot are idempotent). Running the script again simply
+  continues the frontier; a node that keeps failing is parked as 'failed'
+  after MAX_ATTEMPTS.
+
+RATE BUDGET:
+  Every request spends a token from http_client's SLEEPER_LIMITER, the
+  per-host bucket in RATE_LIMIT_DB shared with any concurrent ETL run, so
+  crawler + ETL together stay inside one Sleeper budget; --workers only
+  overlaps latency. --max-requests caps one run's requests, --max-leagues
+  its loaded leagues (both checked between batches). The response cache
+  defaults to off here (HTTP_CACHE=false): a crawl reads each payload once,
+  and caching them would only grow the disk.
+
+WAREHOUSE:
+  Same DDL, upserts and change-only fact as the ETL, one transaction per
+  batch, into CRAWL_DATABASE_URL — by default <DATA_DIR>/market.db, apart
+  from dynasty.db so the API and the Step 2-4 scripts keep seeing only your
+  own leagues. FantasyCalc is pulled once per settings tuple met (fc_market)
+  and stored with the rest. Redraft and keeper leagues (settings.type != 2)
+  are traversed for their managers but not loaded, unless --all-types.
+
+Configuration (environment / .env, on top of etl_pipeline's):
+    CRAWL_STATE_DB=                 # defaults to <DATA_DIR>/crawl_<season>.db
+    CRAWL_DATABASE_URL=             # defaults to sqlite:///<DATA_DIR>/market.db
+    SLEEPER_BASE_URL=               # e.g. http://127.0.0.1:8000/v1 for a local stub server
+
+Usage:
+    python league_crawler.py --seed-user some_handle --max-leagues 5000
+    python league_crawler.py                       # continue the frontier
+    python league_crawler.py --seed-league 1048... --max-depth 4 --workers 8
+    python league_crawler.py --status
+With no seeds on an empty frontier, SLEEPER_USERNAME(S)/SLEEPER_USER_ID(S)
+seed it.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+from requests.adapters import HTTPAdapter
+
+from current_tables import refresh_current_tables
+from etl_pipeline import (DATA_DIR, SESSION, SLEEPER_BASE, SNAPSHOT_DATE, Frames, build_dim_players,
+                          build_league_frames, concat_frames, extract_league_season, fetch_crosswalk,
+                          fetch_dynastyprocess_values, get_engine, get_league_users, get_player_db,
+                          league_market, load_league_frames, market_index, normalize_market_values,
+                          prepare_schema, resolve_users, rostered_ids, sync_dim_players)
+from fc_market import FantasyCalcPulls, Settings, fc_settings, store_pulls
+from http_client import SLEEPER_LIMITER, http_get, http_report, request_count
+from name_index import refresh_name_index
+from pipeline_metrics import pipeline_run, stage
+
+log = logging.getLogger("crawler")
+
+MAX_ATTEMPTS = 3
+DYNASTY = 2       # Sleeper league settings.type: 0 redraft, 1 keeper, 2 dynasty
+# FantasyCalc baseline per QB format; league_market() re-prices every league
+# from the pull for its own settings.
+BASELINE: dict[int, Settings] = {1: (1, 12, 1.0), 2: (2, 12, 1.0)}
+
+STATE_DDL = """
+CREATE TABLE IF NOT EXISTS crawl_frontier (
+    seq           INTEGER PRIMARY KEY,     -- discovery order (BFS tiebreak)
+    kind          TEXT    NOT NULL,        -- 'user' | 'league'
+    node_id       TEXT    NOT NULL,
+    depth         INTEGER NOT NULL,        -- hops from a seed
+    state         TEXT    NOT NULL DEFAULT 'pending',   -- pending | done | skipped | failed
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    payload       TEXT,                    -- league record from a user's league list, until visited
+    discovered_at TEXT    NOT NULL,
+    visited_at    TEXT,
+    UNIQUE (kind, node_id)
+);
+CREATE INDEX IF NOT EXISTS ix_crawl_frontier_pending
+    ON crawl_frontier (depth, seq) WHERE state = 'pending';
+"""
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+@dataclass(frozen=True)
+class Node:
+    seq: int
+    kind: str
+    node_id: str
+    depth: int
+    payload: str | None
+
+
+@dataclass
+class Visit:
+    """What visiting one node produced: an extracted league-season to load
+    (leagues only), the nodes it links to, and the node's final state."""
+    children: list[tuple[str, str, str | None]] = field(default_factory=list)   # (kind, id, payload)
+    unit: dict | None = None
+    state: str = "done"
+
+
+class CrawlState:
+    """crawl_frontier (see module docstring). Used from the main thread only."""
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(STATE_DDL)
+
+    def add(self, nodes: list[tuple[str, str, int, str | None]]) -> int:
+        """INSERT OR IGNORE (kind, id, depth, payload) rows; returns how many
+        were new. Already-seen nodes keep their original depth."""
+        before = self._conn.total_changes
+        now = _now()
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO crawl_frontier (kind, node_id, depth, payload, discovered_at) "
+            "VALUES (?, ?, ?, ?, ?)", [(*n, now) for n in nodes])
+        return self._conn.total_changes - before
+
+    def next_batch(self, n: int) -> list[Node]:
+        return [Node(*r) for r in self._conn.execute(
+            "SELECT seq, kind, node_id, depth, payload FROM crawl_frontier "
+            "WHERE state = 'pending' ORDER BY depth, seq LIMIT ?", (n,))]
+
+    def commit(self, children: list[tuple[str, str, int, str | None]],
+               visited: list[tuple[str, int]], failed: list[int]) -> int:
+        """One transaction: enqueue the batch's children, close its visited
+        nodes (dropping their payloads) and count a failed attempt against the
+        rest. Returns the number of new nodes."""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            added = self.add(children)
+            now = _now()
+            self._conn.executemany(
+                "UPDATE crawl_frontier SET state = ?, payload = NULL, visited_at = ? WHERE seq = ?",
+                [(st, now, seq) for st, seq in visited])
+            self._conn.executemany(
+                "UPDATE crawl_frontier SET attempts = attempts + 1, "
+                "state = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE state END WHERE seq = ?",
+                [(MAX_ATTEMPTS, seq) for seq in failed])
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        return added
+
+    def counts(self) -> dict[tuple[str, str], int]:
+        return {(k, s): n for k, s, n in self._conn.execute(
+            "SELECT kind, state, COUNT(*) FROM crawl_frontier GROUP BY kind, state ORDER BY kind, state")}
+
+    def pending(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM crawl_frontier WHERE state = 'pending'").fetchone()[0]
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+# --------------------------------------------------------------------------- #
+# Visiting nodes (worker threads)
+# --------------------------------------------------------------------------- #
+
+def is_dynasty(league: dict) -> bool:
+    return (league.get("settings") or {}).get("type") == DYNASTY
+
+
+def visit_user(user_id: str, season: str) -> Visit:
+    leagues = http_get(f"{SLEEPER_BASE}/user/{user_id}/leagues/nfl/{season}", SLEEPER_LIMITER) or []
+    return Visit(children=[("league", lg["league_id"], json.dumps(lg)) for lg in leagues])
+
+
+def visit_league(league_id: str, payload: str | None, all_types: bool) -> Visit:
+    """Extract a dynasty league-season (its managers become children); any
+    other league only contributes its users."""
+    league = json.loads(payload) if payload else http_get(f"{SLEEPER_BASE}/league/{league_id}", SLEEPER_LIMITER)
+    if not league:
+        return Visit(state="skipped")
+    if not (all_types or is_dynasty(league)):
+        users = get_league_users(league_id)
+        return Visit(children=[("user", u["user_id"], None) for u in users if u.get("user_id")],
+                     state="skipped")
+    unit = extract_league_season(league)
+    owners = dict.fromkeys(m["sleeper_user_id"] for m in unit["managers"] if m["sleeper_user_id"])
+    return Visit(children=[("user", uid, None) for uid in owners], unit=unit)
+
+
+def visit(node: Node, season: str, all_types: bool) -> Visit | None:
+    """None when the node failed (after http_client's own retries); the batch
+    carries on and the node is retried by a later one."""
+    try:
+        if node.kind == "user":
+            return visit_user(node.node_id, season)
+        return visit_league(node.node_id, node.payload, all_types)
+    except Exception as exc:   # noqa: BLE001 - one bad node must not stop the crawl
+        log.warning("Visiting %s %s failed: %s", node.kind, node.node_id, exc)
+        return None
+
+
+# --------------------------------------------------------------------------- #
+# Crawl
+# --------------------------------------------------------------------------- #
+
+def seed(state: CrawlState, users: list[str], leagues: list[str]) -> None:
+    """Enqueue seeds at depth 0; usernames are resolved to user_ids. An empty
+    frontier with no seeds given falls back to the ETL's configured users."""
+    ids = []
+    for key in users:
+        data = http_get(f"{SLEEPER_BASE}/user/{key}", SLEEPER_LIMITER)
+        if not data:
+            raise SystemExit(f"Sleeper user {key!r} not found")
+        ids.append(data["user_id"])
+    if not ids and not leagues and not state.counts():
+        ids = [u["user_id"] for u in resolve_users()]
+    n = state.add([("user", i, 0, None) for i in ids] + [("league", i, 0, None) for i in leagues])
+    if ids or leagues:
+        log.info("Seeds: %s user(s), %s league(s) — %s new", len(ids), len(leagues), n)
+
+
+def crawl(state: CrawlState, season: str, *, workers: int = 4, batch_size: int = 200,
+          max_leagues: int | None = None, max_requests: int | None = None,
+          max_depth: int | None = None, all_types: bool = False) -> int:
+    """BFS over the frontier until it is empty or a run budget is spent.
+    Returns the number of league-seasons loaded."""
+    url = os.getenv("CRAWL_DATABASE_URL") or f"sqlite:///{(DATA_DIR / 'market.db').as_posix()}"
+    engine = get_engine(url)
+    prepare_schema(engine)
+    SESSION.mount("https://", HTTPAdapter(pool_maxsize=max(10, workers)))
+
+    # Market inputs, once per run, beside the crawl (as in etl_pipeline.run)
+    side = ThreadPoolExecutor(max_workers=8, thread_name_prefix="market")
+    player_f = side.submit(get_player_db)
+    names_f = side.submit(lambda: refresh_name_index(engine, player_f.result()))
+    xw_f = side.submit(fetch_crosswalk)
+    dp_f = side.submit(fetch_dynastyprocess_values)
+    fc = FantasyCalcPulls(side)
+    for s in BASELINE.values():
+        fc.submit(s)
+
+    def market_ready() -> pd.DataFrame:
+        fc_by_format = {q: fc.result(s) for q, s in sorted(BASELINE.items())}
+        market, _picks = normalize_market_values(fc_by_format, dp_f.result(), xw_f.result(),
+                                                 player_f.result(), names_f.result())
+        return market_index(market)
+
+    mv_f = side.submit(market_ready)
+    mv_by_settings: dict[Settings, pd.DataFrame] = {}
+    rostered: set[str] = set()
+
+    def transform(unit: dict) -> Frames:
+        s = fc_settings(unit["meta"])
+        if s not in mv_by_settings:
+            pulls = {k: fc.result(k) for k in {s, *BASELINE.values()}}
+            mv_by_settings[s] = league_market(mv_f.result(), pulls, s)
+        lid = unit["league_id"]
+        rostered.update(rostered_ids({lid: unit["rosters"]}))
+        return build_league_frames([unit["meta"]], unit["managers"], {lid: unit["rosters"]},
+                                   mv_by_settings[s], unit["traded_picks"])
+
+    loaded = visited = 0
+    start_requests = request_count()
+    t0 = time.perf_counter()
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="crawl")
+    try:
+        while True:
+            if max_leagues is not None and loaded >= max_leagues:
+                log.info("--max-leagues %s reached", max_leagues)
+                break
+            if max_requests is not None and request_count() - start_requests >= max_requests:
+                log.info("--max-requests %s reached", max_requests)
+                break
+            batch = state.next_batch(batch_size)
+            if not batch:
+                log.info("Frontier exhausted")
+                break
+            visits = list(pool.map(lambda n: visit(n, season, all_types), batch))
+            units = [v.unit for v in visits if v is not None and v.unit is not None]
+            for s in {fc_settings(u["meta"]) for u in units}:
+                fc.submit(s)   # the batch's new settings tuples pull concurrently
+            if units:
+                load_league_frames(engine, concat_frames([transform(u) for u in units]))
+            children = [(kind, cid, n.depth + 1, payload)
+                        for n, v in zip(batch, visits) if v is not None
+                        if max_depth is None or n.depth < max_depth
+                        for kind, cid, payload in v.children]
+            added = state.commit(children,
+                                 visited=[(v.state, n.seq) for n, v in zip(batch, visits) if v is not None],
+                                 failed=[n.seq for n, v in zip(batch, visits) if v is None])
+            loaded += len(units)
+            visited += len(batch)
+            elapsed = time.perf_counter() - t0
+            log.info("Batch of %s (depth %s-%s): %s league(s) loaded, %s new node(s) | "
+                     "run %s loaded, %.0f nodes/min | frontier %s",
+                     len(batch), batch[0].depth, batch[-1].depth, len(units), added,
+                     loaded, 60 * visited / elapsed if elapsed else 0, state.pending())
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+    if loaded:
+        sync_dim_players(engine, build_dim_players(player_f.result(), rostered))
+        with engine.begin() as conn:
+            store_pulls(conn, fc.results())
+            refresh_current_tables(conn)
+    side.shutdown(wait=True, cancel_futures=True)
+    for line in http_report():
+        log.info("HTTP %s", line)
+    log.info("Crawl run: %s node(s) visited, %s league-season(s) loaded for snapshot_date=%s in %.1f s",
+             visited, loaded, SNAPSHOT_DATE, time.perf_counter() - t0)
+    return loaded
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Resumable market-wide Sleeper league crawler")
+    ap.add_argument("--season", default=os.getenv("SLEEPER_SEASON", str(SNAPSHOT_DATE.year)))
+    ap.add_argument("--state", type=Path, default=None,
+                    help="frontier DB (default CRAWL_STATE_DB or <DATA_DIR>/crawl_<season>.db)")
+    ap.add_argument("--seed-user", action="append", default=[], help="username or user_id (repeatable)")
+    ap.add_argument("--seed-league", action="append", default=[], help="league_id (repeatable)")
+    ap.add_argument("--max-leagues", type=int, default=None, help="stop after loading this many this run")
+    ap.add_argument("--max-requests", type=int, default=None, help="stop after this many HTTP requests this run")
+    ap.add_argument("--max-depth", type=int, default=None, help="do not enqueue nodes deeper than this")
+    ap.add_argument("--batch", type=int, default=200, help="nodes per batch / warehouse transaction")
+    ap.add_argument("--workers", type=int, default=int(os.getenv("ETL_WORKERS", "4")))
+    ap.add_argument("--all-types", action="store_true", help="load redraft and keeper leagues too")
+    ap.add_argument("--status", action="store_true", help="print frontier counts and exit")
+    args = ap.parse_args()
+    os.environ.setdefault("HTTP_CACHE", "false")   # see RATE BUDGET; .env may still turn it on
+
+    path = args.state or Path(os.getenv("CRAWL_STATE_DB") or DATA_DIR / f"crawl_{args.season}.db")
+    state = CrawlState(path)
+    try:
+        if args.status:
+            counts = state.counts()
+            print(f"{path} (season {args.season})")
+            for (kind, st), n in counts.items():
+                print(f"  {kind:<7} {st:<8} {n:>9,}")
+            if not counts:
+                print("  empty — seed it with --seed-user / --seed-league")
+            return 0
+        with pipeline_run("league_crawler"):
+            with stage("seed"):
+                seed(state, args.seed_user, args.seed_league)
+            with stage("crawl"):
+                crawl(state, args.season, workers=max(1, args.workers), batch_size=max(1, args.batch),
+                      max_leagues=args.max_leagues, max_requests=args.max_requests,
+                      max_depth=args.max_depth, all_types=args.all_types)
+    except KeyboardInterrupt:
+        log.warning("Interrupted — the frontier is saved; re-run to continue")
+        return 130
+    finally:
+        state.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
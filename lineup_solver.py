@@ -53,6 +53,9 @@ import sys
 import numpy as np
 from scipy.optimize import linear_sum_assignment
 
+from pipeline_metrics import instrumented, stage
+from stage_profiler import profiled
+
 ELIGIBILITY = {
     "QB": {"QB"}, "RB": {"RB"}, "WR": {"WR"}, "TE": {"TE"},
     "FLEX": {"RB", "WR", "TE"},
@@ -89,6 +92,7 @@ CREATE TABLE IF NOT EXISTS roster_construction (
 # solvers
 # --------------------------------------------------------------------------- #
 
+@profiled
 def solve_hungarian(slots: list[str], players: list[dict]) -> tuple[list, float, int]:
     """Optimal assignment. Returns (assignment rows, total points, empty slots).
     Forbidden pairs are np.inf cost; dummy zero-point players pad feasibility
@@ -162,6 +166,7 @@ def league_slots(rp_json: str) -> tuple[list[str], list[str]]:
     return slots, skipped
 
 
+@instrumented("lineup_solver")
 def main() -> int:
     ap = argparse.ArgumentParser()
     ap.add_argument("--db", default="data/dynasty.db")
@@ -188,6 +193,12 @@ def main() -> int:
             "  2. python cornering_metrics.py  --db data/dynasty.db\n"
             "  3. re-run this command")
     con.executescript(DDL)
+    # Realized reads go to the view's materialized latest snapshot
+    # (current_tables.py) when the writers have built it.
+    src = args.source
+    if src == "v_player_value" and con.execute(
+            "SELECT name FROM sqlite_master WHERE name='current_player_value'").fetchone():
+        src = "current_player_value"
     if args.source == "v_player_value_projected":
         basis = (f"{args.source}.{args.points_col} (m1 projection, canonical "
                  f"currency; preseason skill ≈ ECR baseline — see Model Lab; "
@@ -204,67 +215,69 @@ def main() -> int:
         "SELECT l.league_id, l.league_name, l.roster_positions_json "
         "FROM dim_leagues l "
         f"WHERE l.season = (SELECT MAX(d2.season) FROM dim_leagues d2 "
-        f"  JOIN {args.source} v ON v.league_id = d2.league_id "
+        f"  JOIN {src} v ON v.league_id = d2.league_id "
         f"  WHERE d2.league_name = l.league_name)").fetchall()
 
     grand_gain = 0.0
-    for lid, lname, rp in leagues:
-        slots, skipped = league_slots(rp)
-        snap = con.execute(
-            f"SELECT MAX(snapshot_date) FROM {args.source} WHERE league_id=?",
-            (lid,)).fetchone()[0]
-        if snap is None:
-            print(f"{lname}: SKIPPED — no v_player_value snapshot for {lid}")
-            continue
-        con.execute("DELETE FROM roster_lineup_optimal WHERE league_id=? AND snapshot_date=?", (lid, snap))
-        con.execute("DELETE FROM roster_surplus WHERE league_id=? AND snapshot_date=?", (lid, snap))
-        con.execute("DELETE FROM roster_construction WHERE league_id=? AND snapshot_date=?", (lid, snap))
+    with stage("solve", con=con) as st:
+        st.rows_read = len(leagues)
+        for lid, lname, rp in leagues:
+            slots, skipped = league_slots(rp)
+            snap = con.execute(
+                f"SELECT MAX(snapshot_date) FROM {src} WHERE league_id=?",
+                (lid,)).fetchone()[0]
+            if snap is None:
+                print(f"{lname}: SKIPPED — no v_player_value snapshot for {lid}")
+                continue
+            con.execute("DELETE FROM roster_lineup_optimal WHERE league_id=? AND snapshot_date=?", (lid, snap))
+            con.execute("DELETE FROM roster_surplus WHERE league_id=? AND snapshot_date=?", (lid, snap))
+            con.execute("DELETE FROM roster_construction WHERE league_id=? AND snapshot_date=?", (lid, snap))
 
-        rosters = [r[0] for r in con.execute(
-            f"SELECT DISTINCT roster_id FROM {args.source} "
-            f"WHERE league_id=? AND snapshot_date=?", (lid, snap))]
-        div = 0
-        for rid in rosters:
-            players = [dict(zip(("player_id", "player_name", "position",
-                                 "points", "vorp"), row))
-                       for row in con.execute(
-                f"SELECT player_id, player_name, position, {args.points_col}, vorp "
-                f"FROM {args.source} WHERE league_id=? AND roster_id=? "
-                f"AND snapshot_date=? AND position IN ('QB','RB','WR','TE')",
-                (lid, rid, snap))]
-            lineup, osl, empty = solve_hungarian(slots, players)
-            greedy = solve_greedy(slots, players)
-            gain = osl - greedy
-            if gain > 1e-9:
-                div += 1
-            grand_gain += max(gain, 0)
+            rosters = [r[0] for r in con.execute(
+                f"SELECT DISTINCT roster_id FROM {src} "
+                f"WHERE league_id=? AND snapshot_date=?", (lid, snap))]
+            div = 0
+            for rid in rosters:
+                players = [dict(zip(("player_id", "player_name", "position",
+                                     "points", "vorp"), row))
+                           for row in con.execute(
+                    f"SELECT player_id, player_name, position, {args.points_col}, vorp "
+                    f"FROM {src} WHERE league_id=? AND roster_id=? "
+                    f"AND snapshot_date=? AND position IN ('QB','RB','WR','TE')",
+                    (lid, rid, snap))]
+                lineup, osl, empty = solve_hungarian(slots, players)
+                greedy = solve_greedy(slots, players)
+                gain = osl - greedy
+                if gain > 1e-9:
+                    div += 1
+                grand_gain += max(gain, 0)
 
-            seq: dict[str, int] = {}
-            starters = set()
-            for slot, p in lineup:
-                seq[slot] = seq.get(slot, 0) + 1
-                starters.add(p["player_id"])
+                seq: dict[str, int] = {}
+                starters = set()
+                for slot, p in lineup:
+                    seq[slot] = seq.get(slot, 0) + 1
+                    starters.add(p["player_id"])
+                    con.execute(
+                        "INSERT INTO roster_lineup_optimal VALUES (?,?,?,?,?,?,?,?,?)",
+                        (snap, lid, rid, slot, seq[slot], p["player_id"],
+                         p["player_name"], p["position"], p["points"]))
+                surplus = [p for p in players
+                           if p["player_id"] not in starters and (p["vorp"] or 0) > 0]
+                for p in surplus:
+                    con.execute("INSERT INTO roster_surplus VALUES (?,?,?,?,?,?,?,?)",
+                                (snap, lid, rid, p["player_id"], p["player_name"],
+                                 p["position"], p["points"], p["vorp"]))
                 con.execute(
-                    "INSERT INTO roster_lineup_optimal VALUES (?,?,?,?,?,?,?,?,?)",
-                    (snap, lid, rid, slot, seq[slot], p["player_id"],
-                     p["player_name"], p["position"], p["points"]))
-            surplus = [p for p in players
-                       if p["player_id"] not in starters and (p["vorp"] or 0) > 0]
-            for p in surplus:
-                con.execute("INSERT INTO roster_surplus VALUES (?,?,?,?,?,?,?,?)",
-                            (snap, lid, rid, p["player_id"], p["player_name"],
-                             p["position"], p["points"], p["vorp"]))
-            con.execute(
-                "INSERT INTO roster_construction VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)",
-                (snap, lid, rid, round(osl, 2), len(lineup), empty,
-                 ",".join(sorted(set(skipped))) or None, len(surplus),
-                 round(sum(p["vorp"] or 0 for p in surplus), 2),
-                 round(sum(p["points"] or 0 for p in surplus), 2),
-                 round(greedy, 2), round(gain, 4), basis))
-        con.commit()
-        print(f"{lname}: {len(rosters)} rosters solved "
-              f"({len(slots)} lineup slots; skipped: {sorted(set(skipped)) or 'none'}); "
-              f"greedy diverged on {div} rosters")
+                    "INSERT INTO roster_construction VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)",
+                    (snap, lid, rid, round(osl, 2), len(lineup), empty,
+                     ",".join(sorted(set(skipped))) or None, len(surplus),
+                     round(sum(p["vorp"] or 0 for p in surplus), 2),
+                     round(sum(p["points"] or 0 for p in surplus), 2),
+                     round(greedy, 2), round(gain, 4), basis))
+            con.commit()
+            print(f"{lname}: {len(rosters)} rosters solved "
+                  f"({len(slots)} lineup slots; skipped: {sorted(set(skipped)) or 'none'}); "
+                  f"greedy diverged on {div} rosters")
     print(f"total Hungarian gain over greedy across all rosters: "
           f"{grand_gain:.2f} pts/wk")
     con.close()
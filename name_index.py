@@ -0,0 +1,141 @@
+"""
+name_index.py — the shared normalized-name identity index.
+
+Crosswalk joins are by id (fantasypros_id, merge_name); name matching is only
+the fallback for rows the crosswalk cannot place — brand-new rookies the
+DynastyProcess file has not caught up with, and pre-2020 archive rows with no
+usable merge_name. Both fallbacks used to normalize names their own way:
+etl_pipeline ran a per-record Python function (NFKD + three regexes) over the
+whole Sleeper player DB on every run to build a throwaway dict, and
+dp_archive_etl had a second, slightly different regex chain.
+
+This module is the one name-matching normalizer and the one index (the
+archive's derivation of DynastyProcess's merge_name stays in dp_archive_etl:
+that is DP's key, with DP's end-anchored suffix rule, not a matching key):
+
+  - norm_names() is the normalizer, as vectorized pandas .str operations:
+    strip accents, lowercase, drop generational suffixes and punctuation,
+    collapse whitespace ("Kenneth Walker III" -> "kenneth walker").
+  - player_name_index(player_id, full_name, position, norm_name) lives in the
+    warehouse. refresh_name_index() diffs it against the player store and
+    normalizes only players that are new or whose name/position changed, so a
+    warm run touches a handful of rows instead of ~11k.
+  - name_lookup() collapses the index to one sleeper_id per
+    (norm_name, position) — the numerically lowest player_id, with n_ids so
+    callers that must not guess (the archive join) can keep only unambiguous
+    keys — and match_names() applies it to a batch of (name, position) pairs.
+"""
+from __future__ import annotations
+
+import logging
+import sqlite3
+from typing import TYPE_CHECKING
+
+import pandas as pd
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Engine
+    from player_store import PlayerStore
+
+log = logging.getLogger("name_index")
+
+TABLE = "player_name_index"
+
+DDL = f"""
+CREATE TABLE IF NOT EXISTS {TABLE} (
+    player_id  TEXT PRIMARY KEY,
+    full_name  TEXT,
+    position   TEXT,
+    norm_name  TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_pni_name_pos ON {TABLE} (norm_name, position)
+"""
+
+_SUFFIXES = r"\b(?:jr|sr|ii|iii|iv|v)\b"
+_SOURCE_COLS = ["full_name", "position"]
+
+
+def norm_names(names: pd.Series) -> pd.Series:
+    """Normalized matching key per name; "" for missing names."""
+    s = names.astype("string").fillna("")
+    return (s.str.normalize("NFKD")
+             .str.replace(r"[^\x00-\x7f]", "", regex=True)   # accents, after decomposition
+             .str.lower()
+             .str.replace(_SUFFIXES, "", regex=True)
+             .str.replace(r"[^a-z ]", "", regex=True)
+             .str.replace(r"\s+", " ", regex=True)
+             .str.strip())
+
+
+def build_name_index(store: PlayerStore) -> pd.DataFrame:
+    """The full index computed from the store, not persisted (dry runs)."""
+    src = store.frame(cols=_SOURCE_COLS).reset_index()
+    src["norm_name"] = norm_names(src["full_name"])
+    return src[["player_id", "full_name", "position", "norm_name"]]
+
+
+def refresh_name_index(engine: Engine, store: PlayerStore) -> pd.DataFrame:
+    """Bring the warehouse index in line with the player store, normalizing
+    only new/changed players, and return the whole index."""
+    from sqlalchemy import text
+
+    with engine.begin() as conn:
+        for stmt in filter(None, (s.strip() for s in DDL.split(";"))):
+            conn.execute(text(stmt))
+        have = pd.read_sql_query(text(f"SELECT player_id, full_name, position, norm_name FROM {TABLE}"),
+                                 conn)
+    src = store.frame(cols=_SOURCE_COLS).reset_index()
+
+    cur = src.merge(have, on="player_id", how="left", suffixes=("", "_old"), indicator=True)
+    same = pd.Series(True, index=cur.index)
+    for c in _SOURCE_COLS:
+        a, b = cur[c], cur[f"{c}_old"]
+        same &= (a == b).fillna(False) | (a.isna() & b.isna())
+    stale = cur[~same | (cur["_merge"] == "left_only")][["player_id", *_SOURCE_COLS]].copy()
+    gone = have.loc[~have["player_id"].isin(src["player_id"]), "player_id"]
+
+    if len(stale) or len(gone):
+        stale["norm_name"] = norm_names(stale["full_name"])
+        drop = [{"pid": p} for p in (*stale["player_id"], *gone)]
+        with engine.begin() as conn:
+            conn.execute(text(f"DELETE FROM {TABLE} WHERE player_id = :pid"), drop)
+            stale.astype(object).where(stale.notna(), None).to_sql(
+                TABLE, conn, if_exists="append", index=False)
+    log.info("%s: %s added/changed, %s removed, %s unchanged",
+             TABLE, len(stale), len(gone), len(src) - len(stale))
+
+    keep = have[~have["player_id"].isin(stale["player_id"]) & have["player_id"].isin(src["player_id"])]
+    return pd.concat([keep, stale], ignore_index=True)
+
+
+def read_name_index(con: sqlite3.Connection) -> pd.DataFrame:
+    """The persisted index from a sqlite3 connection; empty if never built
+    (the table is written by etl_pipeline)."""
+    if not con.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                       (TABLE,)).fetchone():
+        return pd.DataFrame(columns=["player_id", "full_name", "position", "norm_name"])
+    return pd.read_sql_query(f"SELECT player_id, full_name, position, norm_name FROM {TABLE}", con)
+
+
+def name_lookup(index: pd.DataFrame) -> pd.DataFrame:
+    """One row per (norm_name, position): sleeper_id = numerically lowest
+    player_id carrying that key (ids are TEXT; non-numeric ones such as team
+    defenses sort after), n_ids = how many do."""
+    ok = index[(index["norm_name"].fillna("") != "") & index["position"].notna()]
+    ok = ok.assign(_num=pd.to_numeric(ok["player_id"], errors="coerce")).sort_values(
+        ["_num", "player_id"], na_position="last", kind="stable")
+    return (ok.groupby(["norm_name", "position"], sort=False)["player_id"]
+              .agg(sleeper_id="first", n_ids="size").reset_index())
+
+
+def match_names(names: pd.Series, positions: pd.Series, lookup: pd.DataFrame,
+                unique_only: bool = False) -> pd.Series:
+    """sleeper_id for each (name, position) pair, aligned to `names`; NaN
+    where there is no match (or, with unique_only, an ambiguous one)."""
+    if unique_only:
+        lookup = lookup[lookup["n_ids"] == 1]
+    keys = pd.DataFrame({"norm_name": norm_names(names).to_numpy(),
+                         "position": positions.astype(object).to_numpy()})
+    hit = keys.merge(lookup[["norm_name", "position", "sleeper_id"]],
+                     on=["norm_name", "position"], how="left")
+    return pd.Series(hit["sleeper_id"].to_numpy(), index=names.index, dtype=object)
@@ -47,6 +47,11 @@ import sys
 import numpy as np
 import pandas as pd
 
+from http_client import GITHUB_LIMITER, http_csv, http_report
+from pipeline_metrics import instrumented, stage
+from stage_profiler import profiled
+from warehouse_keys import executescript
+
 STATS_URL = ("https://github.com/nflverse/nflverse-data/releases/download/"
              "stats_player/stats_player_week_{season}.csv")
 SCHED_URL = ("https://github.com/nflverse/nflverse-data/releases/download/"
@@ -162,6 +167,7 @@ def canonical_configs(con: sqlite3.Connection) -> pd.DataFrame:
     return latest
 
 
+@profiled
 def score_config(weekly: pd.DataFrame, config: dict) -> tuple[pd.Series, list]:
     """Vectorized scoring of all player-weeks under one config.
     Returns (points, unmapped_nonzero_keys)."""
@@ -186,7 +192,7 @@ def score_config(weekly: pd.DataFrame, config: dict) -> tuple[pd.Series, list]:
 def load_weekly(seasons: list[int]) -> pd.DataFrame:
     frames = []
     for s in seasons:
-        df = pd.read_csv(STATS_URL.format(season=s), low_memory=False)
+        df = http_csv(STATS_URL.format(season=s), GITHUB_LIMITER, low_memory=False)
         df = df[(df.season_type == "REG") & (df.position.isin(POSITIONS))]
         frames.append(df)
         print(f"  {s}: {len(df)} REG offense player-weeks")
@@ -196,7 +202,8 @@ def load_weekly(seasons: list[int]) -> pd.DataFrame:
 
 
 def build_calendar(con: sqlite3.Connection, seasons: list[int]) -> None:
-    g = pd.read_csv(SCHED_URL, usecols=["season", "week", "game_type", "gameday"])
+    g = http_csv(SCHED_URL, GITHUB_LIMITER,
+                 usecols=["season", "week", "game_type", "gameday"])
     g = g[(g.game_type == "REG") & (g.season.isin(seasons))]
     cal = (g.groupby(["season", "week"])
             .gameday.agg(first_game_date="min", last_game_date="max")
@@ -265,6 +272,7 @@ def validate_against_points_model(con: sqlite3.Connection) -> None:
           .to_string(index=False))
 
 
+@instrumented("outcomes_etl")
 def main() -> int:
     ap = argparse.ArgumentParser()
     ap.add_argument("--db", default="data/dynasty.db")
@@ -275,10 +283,13 @@ def main() -> int:
     seasons = list(range(args.seasons[0], args.seasons[1] + 1))
 
     con = sqlite3.connect(args.db)
-    con.executescript(DDL)
+    executescript(con, DDL)   # tolerates facts keyed by warehouse_keys.py
 
-    build_calendar(con, seasons)
-    weekly = load_weekly(seasons)
+    with stage("calendar", con=con):
+        build_calendar(con, seasons)
+    with stage("weekly_stats") as st:
+        weekly = load_weekly(seasons)
+        st.rows_read = len(weekly)
 
     # identity: nflverse player_id IS gsis_id -> crosswalk -> sleeper_id
     xw = pd.read_sql_query(
@@ -294,82 +305,41 @@ def main() -> int:
           f"{rel[matched].sum() / max(rel.sum(), 1):.1%} of total yardage")
     weekly = weekly[matched]
 
-    configs = canonical_configs(con)
-    con.execute("DELETE FROM outcomes")
-    for _, lg in configs.iterrows():
-        cfg = json.loads(lg.scoring_settings_json)
-        pts, unmapped = score_config(weekly, cfg)
-        out = pd.DataFrame({
-            "league_id": lg.league_id, "sleeper_id": weekly.sleeper_id,
-            "season": weekly.season, "week": weekly.week,
-            "pts": pts.round(2), "active": 1,
-        }).drop_duplicates(["sleeper_id", "season", "week"])
-        out.to_sql("outcomes", con, if_exists="append", index=False)
-        con.execute(
-            "INSERT OR REPLACE INTO outcomes_provenance VALUES "
-            "(?,?,?,?,?,?,?,datetime('now'))",
-            (lg.league_id, lg.league_name, int(lg.is_canonical),
-             int(lg.is_best_ball), int(lg.season),
-             lg.scoring_settings_json, json.dumps(sorted(unmapped))))
-        flag = " [CANONICAL]" if lg.is_canonical else \
-               (" [best ball]" if lg.is_best_ball else "")
-        print(f"  {lg.league_name}{flag}: {len(out)} rows; "
-              f"unmapped nonzero keys: {sorted(unmapped) or 'none'}")
-    con.commit()
+    with stage("score", con=con) as st:
+        st.rows_read = len(weekly)
+        configs = canonical_configs(con)
+        con.execute("DELETE FROM outcomes")
+        for _, lg in configs.iterrows():
+            cfg = json.loads(lg.scoring_settings_json)
+            pts, unmapped = score_config(weekly, cfg)
+            out = pd.DataFrame({
+                "league_id": lg.league_id, "sleeper_id": weekly.sleeper_id,
+                "season": weekly.season, "week": weekly.week,
+                "pts": pts.round(2), "active": 1,
+            }).drop_duplicates(["sleeper_id", "season", "week"])
+            out.to_sql("outcomes", con, if_exists="append", index=False)
+            con.execute(
+                "INSERT OR REPLACE INTO outcomes_provenance VALUES "
+                "(?,?,?,?,?,?,?,datetime('now'))",
+                (lg.league_id, lg.league_name, int(lg.is_canonical),
+                 int(lg.is_best_ball), int(lg.season),
+                 lg.scoring_settings_json, json.dumps(sorted(unmapped))))
+            flag = " [CANONICAL]" if lg.is_canonical else \
+                   (" [best ball]" if lg.is_best_ball else "")
+            print(f"  {lg.league_name}{flag}: {len(out)} rows; "
+                  f"unmapped nonzero keys: {sorted(unmapped) or 'none'}")
+        con.commit()
 
     if args.seed_fc:
-        seed_fc_from_warehouse(con)
-    validate_against_points_model(con)
+        with stage("seed_fc", con=con):
+            seed_fc_from_warehouse(con)
+    with stage("validate"):
+        validate_against_points_model(con)
+    for line in http_report():
+        print(f"http {line}")
     con.close()
     return 0
 
 
 if __name__ == "__main__":
     sys.exit(main())
-
-Traceback (most recent call last):
-  File "C:\Users\delro\AppData\Roaming\Python\Python314\site-packages\pandas\io\sql.py", line 2702, in execute
-    cur.execute(sql, *args)
-    ~~~~~~~~~~~^^^^^^^^^^^^
-sqlite3.OperationalError: no such table: nflverse_weekly
-
-The above exception was the direct cause of the following exception:
-
-Traceback (most recent call last):
-  File "C:\Users\delro\OneDrive\Documents\myanalysis\dynasty-portfolio\etl\backtest_baselines.py", line 297, in <module>
-    sys.exit(main())
-             ~~~~^^
-  File "C:\Users\delro\OneDrive\Documents\myanalysis\dynasty-portfolio\etl\backtest_baselines.py", line 206, in main
-    curve = train_b1_curve(con, train, league_id, cache)
-  File "C:\Users\delro\OneDrive\Documents\myanalysis\dynasty-portfolio\etl\backtest_baselines.py", line 128, in train_b1_curve   
-    f = cache.setdefault((s, ao), features_with_rank(con, ao, s))
-                                  ~~~~~~~~~~~~~~~~~~^^^^^^^^^^^^
-  File "C:\Users\delro\OneDrive\Documents\myanalysis\dynasty-portfolio\etl\backtest_baselines.py", line 109, in features_with_rank
-    f = build_features(con, as_of=as_of, season=season, horizon="ros")
-  File "C:\Users\delro\OneDrive\Documents\myanalysis\dynasty-portfolio\etl\build_features.py", line 133, in build_features       
-    prod = pd.read_sql_query(
-        """
-    ...<6 lines>...
-        con,
-    )
-  File "C:\Users\delro\AppData\Roaming\Python\Python314\site-packages\pandas\io\sql.py", line 497, in read_sql_query
-    return pandas_sql.read_query(
-           ~~~~~~~~~~~~~~~~~~~~~^
-        sql,
-        ^^^^
-    ...<6 lines>...
-        dtype_backend=dtype_backend,
-        ^^^^^^^^^^^^^^^^^^^^^^^^^^^^
-    )
-    ^
-  File "C:\Users\delro\AppData\Roaming\Python\Python314\site-packages\pandas\io\sql.py", line 2766, in read_query
-    cursor = self.execute(sql, params)
-  File "C:\Users\delro\AppData\Roaming\Python\Python314\site-packages\pandas\io\sql.py", line 2714, in execute
-    raise ex from exc
-pandas.errors.DatabaseError: Execution failed on sql '
-        SELECT w.player_id AS sleeper_id, w.season, w.week,
-               w.pts_league AS pts
-        FROM nflverse_weekly w
-        JOIN _vis_weeks v ON v.season = w.season AND v.week = w.week
-        ORDER BY w.player_id, w.season, w.week
-        ': no such table: nflverse_weekly
@@ -13,10 +13,12 @@ generics our schema needs ('2026 1st', '2027 2nd', ...). Our picks carry
 own market average across slots — not a fudge.
 
 SETTINGS: the schema stores exactly two value columns (1qb / 2qb) and
-v_roster_assets selects by dim_leagues.is_superflex. So:
-  pick_value_2qb <- FC numQbs=2, numTeams=14 (the canonical Drew settings)
-  pick_value_1qb <- FC numQbs=1, numTeams=12
-Documented limitation: non-canonical league sizes inherit these two curves.
+v_roster_assets selects by dim_leagues.is_superflex. Each league's picks are
+priced from the FC pull matching its own (numQbs, numTeams, ppr) — see
+fc_market.py — for its own format, and from the nearest pull of the other
+format for the other column. Curves come from fc_market_values, which the
+ETL stores every run; tuples it has not stored today (--max-age-days) are
+fetched live, so a standalone run never prices from a stale curve.
 
 HONESTY RULES:
   - A pick's value is speculative until the rookie exists. The UI-facing flag
@@ -31,43 +33,28 @@ HONESTY RULES:
 
 Idempotent: re-runs refresh values in place (stamped with valued_at).
 
-Run:  python pick_values_etl.py --db data/dynasty.db
+Run:  python pick_values_etl.py --db data/dynasty.db   (after etl_pipeline.py)
 New columns: dim_draft_picks.valued_at (added if absent). No new tables.
 """
 from __future__ import annotations
 
 import argparse
-import re
 import sqlite3
 import sys
-from datetime import date
+from datetime import date, timedelta
 
-import requests
+from fc_market import fc_settings, fetch_fantasycalc, nearest, pick_curve, pull_dates, read_pulls
+from http_client import http_report
 
-FC_URL = "https://api.fantasycalc.com/values/current"
 ORDINAL = {1: "1st", 2: "2nd", 3: "3rd", 4: "4th", 5: "5th"}
-HEADERS = {"User-Agent": "dynasty-portfolio pick ETL"}
-
-
-def fetch_fc_pick_curve(num_qbs: int, num_teams: int) -> dict[tuple[str, int], int]:
-    """(year, round) -> value, from FC's round-level generic pick entries."""
-    r = requests.get(FC_URL, headers=HEADERS, timeout=30, params={
-        "isDynasty": "true", "numQbs": num_qbs, "numTeams": num_teams, "ppr": 1})
-    r.raise_for_status()
-    curve: dict[tuple[str, int], int] = {}
-    for d in r.json():
-        p = d.get("player", {})
-        if p.get("position") != "PICK":
-            continue
-        m = re.fullmatch(r"(20\d\d) (\d)(?:st|nd|rd|th)", p.get("name", ""))
-        if m:  # round generic like '2027 2nd' (slot picks like '2026 Pick 1.01' skipped)
-            curve[(m.group(1), int(m.group(2)))] = int(d["value"])
-    return curve
 
 
 def main() -> int:
     ap = argparse.ArgumentParser()
     ap.add_argument("--db", default="data/dynasty.db")
+    ap.add_argument("--max-age-days", type=int, default=0,
+                    help="reuse stored FC curves pulled at most this many days ago "
+                         "(default 0: today's only)")
     args = ap.parse_args()
     con = sqlite3.connect(args.db)
 
@@ -75,19 +62,44 @@ def main() -> int:
     if "valued_at" not in cols:
         con.execute("ALTER TABLE dim_draft_picks ADD COLUMN valued_at TEXT")
 
-    c2 = fetch_fc_pick_curve(num_qbs=2, num_teams=14)
-    c1 = fetch_fc_pick_curve(num_qbs=1, num_teams=12)
-    print(f"FC curve coverage: 2QB {len(c2)} (year,round) pairs, 1QB {len(c1)}")
-    yr_now = str(date.today().year)
+    settings = {lid: fc_settings({"is_superflex": sf, "number_of_teams": teams, "ppr": ppr})
+                for lid, sf, teams, ppr in con.execute(
+                    "SELECT league_id, is_superflex, number_of_teams, ppr FROM dim_leagues")}
+    today = date.today()
+    pulls = read_pulls(con, since=(today - timedelta(days=args.max_age_days)).isoformat())
+    stored_on = pull_dates(con)
+    need = set(settings.values())
+    for q in (1, 2):   # both columns stay priced: a format no league plays gets one pull
+        if need and not any(s[0] == q for s in need | pulls.keys()):
+            need.add((q, *min(need)[1:]))
+    missing = sorted(need - pulls.keys())
+    for s in missing:
+        pulls[s] = fetch_fantasycalc(*s)
+    curves = {s: pick_curve(fc) for s, fc in pulls.items()}
+    print(f"FC curves: {len(need)} settings needed, {len(need) - len(missing)} from "
+          f"fc_market_values, {len(missing)} fetched")
+    for s in sorted(need):
+        age = ("fetched" if s in missing
+               else f"stored {(today - date.fromisoformat(stored_on[s])).days} day(s) ago")
+        print(f"  numQbs={s[0]} numTeams={s[1]} ppr={s[2]}: {len(curves[s])} (year,round) pairs, {age}")
+    for line in http_report():
+        print(f"  http {line}")
+    yr_now = str(today.year)
 
     picks = con.execute(
-        "SELECT pick_id, year, round FROM dim_draft_picks").fetchall()
+        "SELECT pick_id, league_id, year, round FROM dim_draft_picks").fetchall()
     updated, future_unpriced, past = 0, [], 0
-    for pid, year, rnd in picks:
+    for pid, lid, year, rnd in picks:
         if str(year) < yr_now:
             past += 1            # already drafted; no current market price
             continue
-        v2, v1 = c2.get((str(year), rnd)), c1.get((str(year), rnd))
+        s = settings[lid] if lid in settings else min(need or curves, default=None)
+        if s is None:            # no league settings and no stored curve at all
+            future_unpriced.append((year, rnd))
+            continue
+        s2, s1 = (s if s[0] == q else nearest(s, curves, q) for q in (2, 1))
+        v2 = curves[s2].get((str(year), rnd)) if s2 else None
+        v1 = curves[s1].get((str(year), rnd)) if s1 else None
         if v2 is None and v1 is None:
             future_unpriced.append((year, rnd))
             continue
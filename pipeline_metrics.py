@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+pipeline_metrics.py — per-stage timing and resource spans for every pipeline
+script.
+
+Each script prints its own progress, but nothing recorded how long a stage
+took, how much it moved or how many requests it made, so a slow day could
+not be told from a slow stage. Scripts now wrap their main() in a run and
+their phases in stages:
+
+    @instrumented("outcomes_etl")
+    def main() -> int:
+        ...
+        with stage("score", con=con) as s:
+            s.rows_read = len(weekly)
+            ...
+
+Every stage becomes one pipeline_stage_metrics row and every run one
+pipeline_runs row:
+
+  wall_s        perf_counter span
+  cpu_s         process CPU time over the span (all threads, so a stage that
+                fans out can show cpu_s > wall_s)
+  peak_rss_mb   the process's peak RSS so far, read at span end — a
+                high-water mark, so the stage that first raises it is the one
+                that allocated (None where the platform lacks `resource`)
+  rows_read     set by the caller where it knows them
+  rows_written  set by the caller, else the sqlite3 connection's
+                total_changes over the span when `con` is given
+  requests      http_client.request_count() over the span (cache hits are
+                free, so this is real traffic)
+
+Rows go to <DATA_DIR>/pipeline_metrics.db (override: PIPELINE_METRICS_DB),
+not the warehouse: the scripts hold long write transactions on dynasty.db,
+DATABASE_URL may not be SQLite, and a failed run must still leave its spans.
+Each span is committed as it closes. PIPELINE_METRICS=false turns recording
+off; stage() outside a run (a function imported by another script)
+records nothing.
+
+DYNASTY_PROFILE=<stage or script> also profiles those stages / runs
+(stage_profiler.py); unset, neither function touches the profiler.
+
+Report:
+    python pipeline_metrics.py                     # latest run per script vs its history
+    python pipeline_metrics.py --script etl_pipeline --runs 20
+A stage is flagged when its wall time exceeds --threshold (default 1.5x) of
+its median over the previous runs.
+"""
+from __future__ import annotations
+
+import argparse
+import functools
+import json
+import os
+import sqlite3
+import statistics
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Iterator
+
+from http_client import request_count
+from stage_profiler import TARGETS as PROFILE_TARGETS, profile
+
+try:
+    import resource
+except ImportError:   # Windows
+    resource = None
+
+DDL = """
+CREATE TABLE IF NOT EXISTS pipeline_runs (
+    run_id       INTEGER PRIMARY KEY,
+    script       TEXT    NOT NULL,
+    argv         TEXT,
+    started_at   TEXT    NOT NULL,
+    finished_at  TEXT,
+    status       TEXT    NOT NULL,        -- running | complete | failed
+    wall_s       REAL,
+    cpu_s        REAL,
+    peak_rss_mb  REAL,
+    rows_read    INTEGER,
+    rows_written INTEGER,
+    requests     INTEGER,
+    error        TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_pipeline_runs_script ON pipeline_runs (script, run_id);
+CREATE TABLE IF NOT EXISTS pipeline_stage_metrics (
+    run_id       INTEGER NOT NULL,
+    seq          INTEGER NOT NULL,        -- order the stages closed in
+    stage        TEXT    NOT NULL,
+    started_at   TEXT    NOT NULL,
+    status       TEXT    NOT NULL,        -- ok | failed
+    wall_s       REAL    NOT NULL,
+    cpu_s        REAL    NOT NULL,
+    peak_rss_mb  REAL,
+    rows_read    INTEGER,
+    rows_written INTEGER,
+    requests     INTEGER NOT NULL,
+    PRIMARY KEY (run_id, seq)
+);
+"""
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def peak_rss_mb() -> float | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1 << 20 if sys.platform == "darwin" else 1 << 10), 1)   # bytes on macOS, KiB elsewhere
+
+
+def metrics_db() -> Path:
+    return Path(os.getenv("PIPELINE_METRICS_DB") or Path(os.getenv("DATA_DIR", "./data")) / "pipeline_metrics.db")
+
+
+def enabled() -> bool:
+    return os.getenv("PIPELINE_METRICS", "true").lower() == "true"
+
+
+class Span:
+    """One timed stage. Callers fill rows_read / rows_written; the rest is
+    measured on exit."""
+
+    def __init__(self, name: str, con: sqlite3.Connection | None = None):
+        self.name = name
+        self.rows_read: int | None = None
+        self.rows_written: int | None = None
+        self._con = con
+        self.started_at = _now()
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        self._requests = request_count()
+        self._changes = con.total_changes if con is not None else 0
+
+    def close(self, ok: bool) -> tuple:
+        if self.rows_written is None and self._con is not None:
+            self.rows_written = self._con.total_changes - self._changes
+        return (self.name, self.started_at, "ok" if ok else "failed",
+                round(time.perf_counter() - self._wall, 4), round(time.process_time() - self._cpu, 4),
+                peak_rss_mb(), self.rows_read, self.rows_written, request_count() - self._requests)
+
+
+class PipelineRun:
+    """A pipeline_runs row and the stages recorded under it."""
+
+    def __init__(self, script: str, path: Path | None = None):
+        self.script = script
+        self.path = path or metrics_db()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._rows_read = self._rows_written = 0
+        self._total = Span(script)
+        with self._connect() as con:
+            con.executescript(DDL)
+            self.run_id = con.execute(
+                "INSERT INTO pipeline_runs (script, argv, started_at, status) VALUES (?, ?, ?, 'running')",
+                (script, json.dumps(sys.argv[1:]), self._total.started_at)).lastrowid
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        con = sqlite3.connect(self.path, timeout=30)
+        try:
+            with con:   # commit, or roll back on error
+                yield con
+        finally:
+            con.close()
+
+    def record(self, span: Span, ok: bool) -> None:
+        row = span.close(ok)
+        with self._lock:
+            self._seq += 1
+            self._rows_read += span.rows_read or 0
+            self._rows_written += span.rows_written or 0
+            with self._connect() as con:
+                con.execute("INSERT INTO pipeline_stage_metrics (run_id, seq, stage, started_at, status, wall_s, "
+                            "cpu_s, peak_rss_mb, rows_read, rows_written, requests) "
+                            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", (self.run_id, self._seq, *row))
+
+    def finish(self, error: BaseException | None = None) -> None:
+        _, _, _, wall, cpu, rss, _, _, requests = self._total.close(error is None)
+        with self._connect() as con:
+            con.execute("UPDATE pipeline_runs SET finished_at = ?, status = ?, wall_s = ?, cpu_s = ?, "
+                        "peak_rss_mb = ?, rows_read = ?, rows_written = ?, requests = ?, error = ? "
+                        "WHERE run_id = ?",
+                        (_now(), "complete" if error is None else "failed", wall, cpu, rss,
+                         self._rows_read, self._rows_written, requests,
+                         None if error is None else f"{type(error).__name__}: {error}"[:500], self.run_id))
+
+
+_ACTIVE: PipelineRun | None = None
+
+
+def _failed(exc: BaseException) -> bool:
+    """SystemExit(0) / sys.exit() without a message is a normal finish."""
+    return not (isinstance(exc, SystemExit) and exc.code in (None, 0))
+
+
+@contextmanager
+def pipeline_run(script: str) -> Iterator[PipelineRun | None]:
+    """Record a run of `script`; stage() calls inside it attach to it."""
+    global _ACTIVE
+    hook = profile(script) if PROFILE_TARGETS else nullcontext()
+    if not enabled() or _ACTIVE is not None:   # nested scripts record under the outer run
+        with hook:
+            yield _ACTIVE
+        return
+    _ACTIVE = run = PipelineRun(script)
+    try:
+        with hook:
+            yield run
+    except BaseException as exc:
+        run.finish(exc if _failed(exc) else None)
+        raise
+    else:
+        run.finish()
+    finally:
+        _ACTIVE = None
+
+
+@contextmanager
+def stage(name: str, con: sqlite3.Connection | None = None) -> Iterator[Span]:
+    """Time one stage of the active run. `con` (sqlite3) lets rows_written
+    default to the rows it changed during the stage."""
+    run = _ACTIVE
+    span = Span(name, con)
+    hook = profile(name, f"{run.script}.{name}" if run else name) if PROFILE_TARGETS else nullcontext()
+    if run is None:
+        with hook:
+            yield span
+        return
+    try:
+        with hook:
+            yield span
+    except BaseException as exc:
+        run.record(span, ok=not _failed(exc))
+        raise
+    run.record(span, ok=True)
+
+
+def instrumented(script: str) -> Callable:
+    """Decorator: run the wrapped main() inside pipeline_run(script)."""
+    def wrap(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            with pipeline_run(script):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+# --------------------------------------------------------------------------- #
+# Report
+# --------------------------------------------------------------------------- #
+
+def report(con: sqlite3.Connection, script: str | None, runs: int, threshold: float) -> list[str]:
+    """The latest complete run of each script, stage by stage, against the
+    median of its previous `runs` complete runs."""
+    lines = []
+    scripts = [script] if script else [r[0] for r in con.execute(
+        "SELECT DISTINCT script FROM pipeline_runs ORDER BY script")]
+    for sc in scripts:
+        ids = [r[0] for r in con.execute(
+            "SELECT run_id FROM pipeline_runs WHERE script = ? AND status = 'complete' "
+            "ORDER BY run_id DESC LIMIT ?", (sc, runs + 1))]
+        if not ids:
+            continue
+        latest, history = ids[0], ids[1:]
+        wall, started, req, rss = con.execute(
+            "SELECT wall_s, started_at, requests, peak_rss_mb FROM pipeline_runs WHERE run_id = ?",
+            (latest,)).fetchone()
+        lines.append(f"{sc}: run {latest} at {started} — {wall:.1f} s, {req} request(s), "
+                     f"peak RSS {rss if rss is not None else '?'} MB  (vs {len(history)} earlier run(s))")
+        past: dict[str, list[float]] = {}
+        if history:
+            marks = ",".join("?" * len(history))
+            for st, w in con.execute(f"SELECT stage, SUM(wall_s) FROM pipeline_stage_metrics "
+                                     f"WHERE run_id IN ({marks}) GROUP BY run_id, stage", history):
+                past.setdefault(st, []).append(w)
+        for st, w, cpu, rr, rw, rq in con.execute(
+                "SELECT stage, SUM(wall_s), SUM(cpu_s), SUM(rows_read), SUM(rows_written), SUM(requests) "
+                "FROM pipeline_stage_metrics WHERE run_id = ? GROUP BY stage ORDER BY MIN(seq)", (latest,)):
+            med = statistics.median(past[st]) if st in past else None
+            vs = "" if med is None else f"  median {med:8.2f} s"
+            flag = "  << REGRESSION" if med and w > threshold * med and w - med > 0.5 else ""
+            rows = f"{rr or 0:>9,} read {rw or 0:>9,} written"
+            lines.append(f"  {st:<24} {w:8.2f} s  cpu {cpu:8.2f} s  {rows}  {rq:>6} req{vs}{flag}")
+    return lines
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Stage timings of recent pipeline runs")
+    ap.add_argument("--db", type=Path, default=None, help="default PIPELINE_METRICS_DB or <DATA_DIR>/pipeline_metrics.db")
+    ap.add_argument("--script", default=None, help="one script only (e.g. etl_pipeline)")
+    ap.add_argument("--runs", type=int, default=10, help="earlier complete runs to compare against")
+    ap.add_argument("--threshold", type=float, default=1.5, help="flag stages slower than this x their median")
+    args = ap.parse_args()
+    path = args.db or metrics_db()
+    if not path.exists():
+        print(f"{path} does not exist yet — run a pipeline script first.")
+        return 1
+    con = sqlite3.connect(path)
+    lines = report(con, args.script, args.runs, args.threshold)
+    print("\n".join(lines) if lines else "No complete runs recorded.")
+    con.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""
+player_store.py — compact on-disk copy of the Sleeper player DB.
+
+Sleeper's /players/nfl is one ~15 MB JSON object keyed by player_id, with ~60
+fields per player of which the pipeline reads five. The old path downloaded it
+whole, parsed it into a dict, re-serialized it through pandas to a JSON cache,
+and on every warm start parsed that file back into a dict of dicts — several
+copies of the payload resident at once, all to answer lookups like
+"position of player 4046".
+
+This keeps only what we use, in a single SQLite table keyed by player_id:
+
+  - PlayerStore.replace() consumes (player_id, record) pairs as they are
+    parsed off the wire (http_client.iter_json_object over http_stream), so
+    the payload is never held in memory as a whole; rows go in batches inside
+    one transaction, so a reader never sees a half-refreshed table.
+  - Lookups are point queries (get), a full scan (items), or one
+    vectorized fetch for a set of ids (frame) — what build_frames and the
+    market enrichment want.
+  - fetched_at lives in store_meta, so the TTL check is one row read instead
+    of a file stat plus a full parse.
+"""
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+import pandas as pd
+
+FIELDS = ("full_name", "position", "team", "age", "years_exp", "status")
+
+_DDL = """
+CREATE TABLE IF NOT EXISTS players (
+    player_id   TEXT PRIMARY KEY,
+    full_name   TEXT,
+    position    TEXT,
+    team        TEXT,
+    age         NUMERIC,
+    years_exp   INTEGER,
+    status      TEXT
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS store_meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_BATCH = 2000
+_MAX_PARAMS = 900   # stay under SQLITE_MAX_VARIABLE_NUMBER on old builds
+
+
+class PlayerStore:
+    """Player lookups backed by SQLite. Safe to share across threads."""
+
+    def __init__(self, path: Path | str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript(_DDL)
+        self._lock = threading.Lock()
+
+    # ---- freshness ----
+    def fetched_at(self) -> float | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM store_meta WHERE key = 'fetched_at'").fetchone()
+        return float(row[0]) if row else None
+
+    def age_hours(self) -> float | None:
+        ts = self.fetched_at()
+        return None if ts is None else (time.time() - ts) / 3600
+
+    # ---- refresh ----
+    def replace(self, records: Iterable[tuple[str, dict]], fetched_at: float | None = None) -> int:
+        """Swap the table contents for `records` in one transaction."""
+        n = 0
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM players")
+            batch: list[tuple] = []
+            for pid, rec in records:
+                rec = rec or {}
+                batch.append((str(pid), *(rec.get(c) for c in FIELDS)))
+                if len(batch) >= _BATCH:
+                    n += self._insert(batch)
+                    batch = []
+            n += self._insert(batch)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO store_meta VALUES ('fetched_at', ?)",
+                (repr(fetched_at if fetched_at is not None else time.time()),),
+            )
+        return n
+
+    def _insert(self, batch: list[tuple]) -> int:
+        self._conn.executemany(
+            f"INSERT OR REPLACE INTO players VALUES ({','.join('?' * (len(FIELDS) + 1))})", batch)
+        return len(batch)
+
+    # ---- lookups ----
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM players").fetchone()[0]
+
+    def get(self, player_id: str, default: Any = None) -> dict | Any:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(FIELDS)} FROM players WHERE player_id = ?",
+                (str(player_id),)).fetchone()
+        return dict(zip(FIELDS, row)) if row else default
+
+    def items(self) -> Iterator[tuple[str, dict]]:
+        """(player_id, record) pairs; rows are fetched as slim tuples."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT player_id, {', '.join(FIELDS)} FROM players").fetchall()
+        for pid, *vals in rows:
+            yield pid, dict(zip(FIELDS, vals))
+
+    def frame(self, ids: Iterable[str] | None = None,
+              cols: Iterable[str] = FIELDS) -> pd.DataFrame:
+        """Records as a DataFrame indexed by player_id. With `ids`, the result
+        follows their order and has all-NaN rows for ids the store lacks."""
+        cols = [c for c in cols if c in FIELDS]
+        select = f"SELECT player_id, {', '.join(cols)} FROM players"
+        with self._lock:
+            if ids is None:
+                df = pd.read_sql_query(select, self._conn)
+            else:
+                ids = [str(i) for i in ids]
+                uniq = list(dict.fromkeys(ids))
+                parts = [
+                    pd.read_sql_query(
+                        f"{select} WHERE player_id IN ({','.join('?' * len(chunk))})",
+                        self._conn, params=chunk)
+                    for chunk in (uniq[i:i + _MAX_PARAMS] for i in range(0, len(uniq), _MAX_PARAMS))
+                ]
+                df = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=["player_id", *cols])
+        df = df.set_index("player_id")
+        return df if ids is None else df.reindex(ids)
+
+    def close(self) -> None:
+        self._conn.close()
@@ -19,7 +19,8 @@ Pipeline:
   4. aggregate to PPG; derive positional replacement level from roster slots
   5. VORP = PPG - replacement_PPG; scale to a comparable value currency
   6. map nflverse gsis_id -> sleeper_id via the DynastyProcess crosswalk
-  7. write player_production_value + the 3-source view v_player_value
+  7. write player_production_value + the 3-source view v_player_value, and
+     refresh its materialized latest snapshot (current_player_value)
 
 Run (after etl_pipeline.py):
     python points_model.py                  # uses latest completed season
@@ -30,7 +31,6 @@ No new dependencies (nflverse is read as CSV via pandas).
 
 from __future__ import annotations
 
-import io
 import json
 import logging
 import os
@@ -38,10 +38,12 @@ import sys
 from pathlib import Path
 
 import pandas as pd
-import requests
 from sqlalchemy import create_engine, text
 from sqlalchemy.engine import Engine
 
+from current_tables import refresh_current_tables
+from http_client import GITHUB_LIMITER, http_csv, http_report
+
 try:
     from dotenv import load_dotenv, find_dotenv
     # Windows editors/PowerShell often save .env as UTF-16 or with a BOM, which
@@ -66,8 +68,36 @@ DATA_DIR = Path(os.getenv("DATA_DIR", "./data"))
 NFLVERSE = "https://github.com/nflverse/nflverse-data/releases/download/stats_player/stats_player_week_{season}.csv"
 CROSSWALK = "https://raw.githubusercontent.com/dynastyprocess/data/master/files/db_playerids.csv"
 MIN_GAMES = int(os.getenv("POINTS_MIN_GAMES", "6"))   # qualifier for replacement ranking
-SESSION = requests.Session()
-SESSION.headers.update({"User-Agent": "dynasty-points-model/1.0"})
+
+PRODUCTION_DDL = """
+CREATE TABLE IF NOT EXISTS player_production_value (
+    season          INTEGER NOT NULL,
+    league_id       TEXT    NOT NULL,
+    player_id       TEXT    NOT NULL,
+    position        TEXT,
+    games           INTEGER,
+    ppg             NUMERIC,
+    replacement_ppg NUMERIC,
+    vorp            NUMERIC,
+    vbd_value       NUMERIC,
+    PRIMARY KEY (season, league_id, player_id)
+)"""
+# cornering_metrics ranks each (league, position) pool by ppg; the key leads
+# with season, so without this every rank is a full scan.
+PRODUCTION_INDEX = """
+CREATE INDEX IF NOT EXISTS ix_ppv_league_pos ON player_production_value (league_id, position, ppg)"""
+
+# Three-source view: expert (FP), market (FC), production (VBD), side by side.
+VALUE_VIEW = """
+CREATE VIEW v_player_value AS
+SELECT pm.snapshot_date, pm.league_id, pm.roster_id, pm.player_id,
+       pm.player_name, pm.position, pm.age,
+       pm.fp_market_value, pm.fc_market_value, pm.arb_delta_fp_minus_fc,
+       pv.ppg, pv.vorp, pv.vbd_value
+FROM v_player_market pm
+LEFT JOIN player_production_value pv
+  ON pv.league_id = pm.league_id AND pv.player_id = pm.player_id
+ AND pv.season = (SELECT MAX(season) FROM player_production_value)"""
 
 # Sleeper scoring key -> nflverse weekly stat column (per-unit scoring)
 SCORING_MAP = {
@@ -104,8 +134,7 @@ def target_season(leagues: pd.DataFrame) -> int:
 
 
 def fetch_weekly(season: int) -> pd.DataFrame:
-    txt = SESSION.get(NFLVERSE.format(season=season), timeout=60).text
-    raw = pd.read_csv(io.StringIO(txt), low_memory=False)
+    raw = http_csv(NFLVERSE.format(season=season), GITHUB_LIMITER, low_memory=False)
     pos = "position" if "position" in raw.columns else "position_group"
     name = "player_display_name" if "player_display_name" in raw.columns else "player_name"
     pid = "player_id" if "player_id" in raw.columns else "gsis_id"
@@ -123,8 +152,7 @@ def fetch_weekly(season: int) -> pd.DataFrame:
 
 
 def fetch_bridge() -> pd.DataFrame:
-    txt = SESSION.get(CROSSWALK, timeout=60).text
-    xw = pd.read_csv(io.StringIO(txt), dtype=str)
+    xw = http_csv(CROSSWALK, GITHUB_LIMITER, dtype=str)
     return xw[["gsis_id", "sleeper_id"]].dropna().drop_duplicates("gsis_id")
 
 
@@ -214,35 +242,17 @@ def run() -> None:
     log.info("Computed VBD for %s player-league rows", len(out))
 
     with engine.begin() as conn:
-        conn.execute(text("""
-            CREATE TABLE IF NOT EXISTS player_production_value (
-                season          INTEGER NOT NULL,
-                league_id       TEXT    NOT NULL,
-                player_id       TEXT    NOT NULL,
-                position        TEXT,
-                games           INTEGER,
-                ppg             NUMERIC,
-                replacement_ppg NUMERIC,
-                vorp            NUMERIC,
-                vbd_value       NUMERIC,
-                PRIMARY KEY (season, league_id, player_id)
-            )"""))
+        conn.execute(text(PRODUCTION_DDL))
+        conn.execute(text(PRODUCTION_INDEX))
         conn.execute(text("DELETE FROM player_production_value WHERE season = :s"), {"s": season})
         out.to_sql("player_production_value", conn, if_exists="append", index=False)
 
-        # Three-source view: expert (FP), market (FC), production (VBD), side by side.
         conn.execute(text("DROP VIEW IF EXISTS v_player_value"))
-        conn.execute(text("""
-            CREATE VIEW v_player_value AS
-            SELECT pm.snapshot_date, pm.league_id, pm.roster_id, pm.player_id,
-                   pm.player_name, pm.position, pm.age,
-                   pm.fp_market_value, pm.fc_market_value, pm.arb_delta_fp_minus_fc,
-                   pv.ppg, pv.vorp, pv.vbd_value
-            FROM v_player_market pm
-            LEFT JOIN player_production_value pv
-              ON pv.league_id = pm.league_id AND pv.player_id = pm.player_id
-             AND pv.season = (SELECT MAX(season) FROM player_production_value)"""))
+        conn.execute(text(VALUE_VIEW))
+        refresh_current_tables(conn)
     log.info("Wrote player_production_value + v_player_value for season %s", season)
+    for line in http_report():
+        log.info("HTTP %s", line)
 
 
 if __name__ == "__main__":
@@ -85,15 +85,13 @@ def recover_replacement_ranks(con) -> dict[tuple[str, str], int]:
     replacement_ppg = ppg - vorp; K = its rank in the rostered pool."""
     ks: dict[tuple[str, str], int] = {}
     leagues = [r[0] for r in con.execute(
-        "SELECT DISTINCT league_id FROM v_player_value")]
+        "SELECT DISTINCT league_id FROM current_player_value")]
     for lid in leagues:
         for pos in ("QB", "RB", "WR", "TE"):
             rows = con.execute(
-                "SELECT ppg, vorp FROM v_player_value "
+                "SELECT ppg, vorp FROM current_player_value "
                 "WHERE league_id=? AND position=? AND ppg IS NOT NULL "
-                "AND snapshot_date=(SELECT MAX(snapshot_date) "
-                "  FROM v_player_value WHERE league_id=?) "
-                "ORDER BY ppg DESC", (lid, pos, lid)).fetchall()
+                "ORDER BY ppg DESC", (lid, pos)).fetchall()
             repl = next((round(p - v, 4) for p, v in rows if v and v > 0), None)
             if repl is not None:
                 ks[(lid, pos)] = sum(1 for p, _ in rows if p > repl) + 1
@@ -145,13 +143,11 @@ def main() -> int:
     # not be swept in by a global-latest filter.
     rostered = pd.read_sql_query(
         "SELECT v.league_id, v.roster_id, v.player_id, v.player_name, v.position "
-        "FROM v_player_value v "
+        "FROM current_player_value v "
         "JOIN dim_leagues l ON l.league_id = v.league_id "
         "WHERE l.season = (SELECT MAX(d2.season) FROM dim_leagues d2 "
-        "    JOIN v_player_value vv ON vv.league_id = d2.league_id "
-        "    WHERE d2.league_name = l.league_name) "
-        "AND v.snapshot_date = (SELECT MAX(snapshot_date) "
-        "    FROM v_player_value WHERE league_id = v.league_id)", con)
+        "    JOIN current_player_value vv ON vv.league_id = d2.league_id "
+        "    WHERE d2.league_name = l.league_name)", con)
     proj = rostered.merge(
         f[["sleeper_id", "b1_rate", "ppg_proj"]],
         left_on="player_id", right_on="sleeper_id", how="left")
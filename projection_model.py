@@ -43,6 +43,7 @@ from build_features import build_features  # noqa: F401  (schema handshake)
 from backtest_baselines import (DDL, GRID_WEEKS, TEST_SEASONS, as_of_grid,
                                 b1_predict, features_with_rank, log_predictions,
                                 realized, train_b1_curve)
+from pipeline_metrics import instrumented, stage
 
 if getattr(_bf, "SCHEMA_VERSION", 1) < 2:
     sys.exit("Stale build_features.py (pre-v2) — replace it with the latest.")
@@ -134,6 +135,7 @@ def make_pairs(con, seasons, league_id, curve, cache) -> list[pd.DataFrame]:
     return out
 
 
+@instrumented("projection_model")
 def main() -> int:
     ap = argparse.ArgumentParser()
     ap.add_argument("--db", default="data/dynasty.db")
@@ -151,49 +153,50 @@ def main() -> int:
     cols = ["b1_rate"] + PROD_FEATURES + ["has_history"]
 
     for S in TEST_SEASONS:
-        train_seasons = list(range(2019, S))
-        curve = train_b1_curve(con, train_seasons, league_id, cache)
-        pairs = make_pairs(con, train_seasons, league_id, curve, cache)
-        df, med = assemble_xy(pairs, None)
-        # inner split: last train season is validation for lambda
-        val_season = max(train_seasons)
-        df["szn"] = df.as_of.str.slice(0, 4).astype(int)
-        tr, va = df[df.szn < val_season], df[df.szn >= val_season]
-        if tr.empty:                      # S=2020: only one train season
-            tr, va = va, va.iloc[0:0]
-        models = fit_per_position(tr, va)
-        con.execute("INSERT OR REPLACE INTO model_runs "
-                    "(model_id, train_window, grid) VALUES (?,?,?)",
-                    (MODEL_ID, f"seasons<{S}", str(GRID_WEEKS)))
-
-        test_pairs = make_pairs(con, [S], league_id, curve, cache)
-        tf, _ = assemble_xy(test_pairs, med)   # TRAIN medians — no leakage
-        frames = []
-        for pos, g in tf.groupby("position"):
-            if pos not in models:
-                continue
-            r, lam = models[pos]
-            g = g.copy()
-            g["m1_rate"] = r.predict(g[cols].to_numpy(float))
-            g["yhat_total"] = g.m1_rate * g.weeks_remaining
-            g["yhat_ppg"] = np.nan
-            frames.append(g)
-            coefs.append(pd.Series(r.beta, index=cols, name=(S, pos, lam)))
-        tf = pd.concat(frames, ignore_index=True)
-        for ao, g in tf.groupby("as_of"):
-            log_predictions(con, MODEL_ID, ao,
-                            g[["sleeper_id", "yhat_total", "yhat_ppg"]])
-        tf["ae_m1"] = (tf.yhat_total - tf.real_total).abs()
-        tf["ae_b1"] = (tf.b1_total - tf.real_total).abs()
-        pooled.append(tf)
-        for pos, g in tf.groupby("position"):
-            skill = 1 - g.ae_m1.mean() / g.ae_b1.mean()
-            eval_rows += [
-                (MODEL_ID, S, "ros", pos, "mae_total",
-                 float(g.ae_m1.mean()), len(g)),
-                (MODEL_ID, S, "ros", pos, "skill_vs_b1", float(skill), len(g))]
-        print(f"{S}: n={len(tf)}, skill_vs_B1="
-              f"{1 - tf.ae_m1.mean() / tf.ae_b1.mean():+.3f}")
+        with stage(f"season_{S}", con=con):
+            train_seasons = list(range(2019, S))
+            curve = train_b1_curve(con, train_seasons, league_id, cache)
+            pairs = make_pairs(con, train_seasons, league_id, curve, cache)
+            df, med = assemble_xy(pairs, None)
+            # inner split: last train season is validation for lambda
+            val_season = max(train_seasons)
+            df["szn"] = df.as_of.str.slice(0, 4).astype(int)
+            tr, va = df[df.szn < val_season], df[df.szn >= val_season]
+            if tr.empty:                      # S=2020: only one train season
+                tr, va = va, va.iloc[0:0]
+            models = fit_per_position(tr, va)
+            con.execute("INSERT OR REPLACE INTO model_runs "
+                        "(model_id, train_window, grid) VALUES (?,?,?)",
+                        (MODEL_ID, f"seasons<{S}", str(GRID_WEEKS)))
+
+            test_pairs = make_pairs(con, [S], league_id, curve, cache)
+            tf, _ = assemble_xy(test_pairs, med)   # TRAIN medians — no leakage
+            frames = []
+            for pos, g in tf.groupby("position"):
+                if pos not in models:
+                    continue
+                r, lam = models[pos]
+                g = g.copy()
+                g["m1_rate"] = r.predict(g[cols].to_numpy(float))
+                g["yhat_total"] = g.m1_rate * g.weeks_remaining
+                g["yhat_ppg"] = np.nan
+                frames.append(g)
+                coefs.append(pd.Series(r.beta, index=cols, name=(S, pos, lam)))
+            tf = pd.concat(frames, ignore_index=True)
+            for ao, g in tf.groupby("as_of"):
+                log_predictions(con, MODEL_ID, ao,
+                                g[["sleeper_id", "yhat_total", "yhat_ppg"]])
+            tf["ae_m1"] = (tf.yhat_total - tf.real_total).abs()
+            tf["ae_b1"] = (tf.b1_total - tf.real_total).abs()
+            pooled.append(tf)
+            for pos, g in tf.groupby("position"):
+                skill = 1 - g.ae_m1.mean() / g.ae_b1.mean()
+                eval_rows += [
+                    (MODEL_ID, S, "ros", pos, "mae_total",
+                     float(g.ae_m1.mean()), len(g)),
+                    (MODEL_ID, S, "ros", pos, "skill_vs_b1", float(skill), len(g))]
+            print(f"{S}: n={len(tf)}, skill_vs_B1="
+                  f"{1 - tf.ae_m1.mean() / tf.ae_b1.mean():+.3f}")
 
     con.executemany("INSERT OR REPLACE INTO evaluations VALUES (?,?,?,?,?,?,?)",
                     eval_rows)
@@ -223,10 +226,11 @@ def main() -> int:
                  for pid, g in allf.groupby("sleeper_id")}
     pids = list(by_player)
     skills = []
-    for _ in range(1000):
-        take = rng.choice(len(pids), size=len(pids), replace=True)
-        arr = np.concatenate([by_player[pids[i]] for i in take])
-        skills.append(1 - arr[:, 0].mean() / arr[:, 1].mean())
+    with stage("bootstrap"):
+        for _ in range(1000):
+            take = rng.choice(len(pids), size=len(pids), replace=True)
+            arr = np.concatenate([by_player[pids[i]] for i in take])
+            skills.append(1 - arr[:, 0].mean() / arr[:, 1].mean())
     lo, hi = np.percentile(skills, [2.5, 97.5])
     print(f"player-block bootstrap 95% CI: [{lo:.3f}, {hi:.3f}]")
 
@@ -0,0 +1,571 @@
+#!/usr/bin/env python3
+"""
+query_plans.py — EXPLAIN QUERY PLAN regression suite for the warehouse SQL.
+
+WHY: the hot reads live in three places — the Analytics.js routes, the views
+in schema.sql, and the statements inside cornering_metrics.py,
+project_production.py and lineup_solver.py — and nothing checked that any of
+them still seeks on an index. A new view, a reordered primary key or a
+function wrapped around a column turns a league-scoped read into a full scan
+of a fact table, which costs nothing on a 4-league dynasty.db and everything
+at 500 leagues. This plans every registered query (QUERIES) against a
+warehouse and fails when one scans a fact table:
+
+  SCAN <fact>                       full table (or full index) pass
+  ... AUTOMATIC [PARTIAL] INDEX     SQLite builds a throwaway index over the
+                                    whole table on every execution
+
+SEARCH lines, SCANs of dimensions / CTEs / subqueries, and the fact tables a
+query reads whole on purpose (Query.scans, e.g. every league's bars) pass.
+Aliases are resolved through the query and the views it reads, so `SCAN p`
+is reported as the table `p` stands for.
+
+For each offending table it recommends an index: the table's equality
+columns from the query's predicates (an AUTOMATIC index names them itself),
+then one range / MIN / MAX / ORDER BY column. The candidate is created inside
+a transaction, the query re-planned, and the transaction rolled back, so every
+recommendation is reported as verified (the scan goes away) or not. --expert
+also asks the sqlite3 shell's .expert mode, where one is on PATH.
+
+Tables written by the three scripts are created as empty TEMP tables when
+the warehouse has never run them (a fresh synthetic warehouse), so their
+queries still plan; their latencies are marked as such. The suite only reads:
+the registry holds SELECTs, and the warehouse file is not modified.
+
+Latency is the best of --repeats runs per query. With --scale it builds each
+synth_warehouse.SCALES preset (reused from --workdir when present), so the
+same queries are timed at several sizes; no ANALYZE is run, matching the
+stat-less planner the pipeline itself gets. A plan can seek everywhere and
+still degrade (a correlated MAX re-expanding a view per row), so queries
+whose latency from the first warehouse to the last grows more than twice as
+fast as the fact rows they read are listed too — a warning, not a failure.
+
+Usage:
+    python query_plans.py                                  # xs synthetic warehouse
+    python query_plans.py --scale xs s m --workdir /tmp/qp --json plans.json
+    python query_plans.py --db data/dynasty.db --expert     # the real warehouse
+Exit status is 1 when any query scans a fact table.
+"""
+from __future__ import annotations
+
+import argparse
+import ast
+import json
+import re
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+
+from bench_etl import ANALYTICS_QUERIES, time_queries
+from warehouse_keys import BENCH_QUERIES
+
+HERE = Path(__file__).resolve().parent
+
+# Tables that grow with leagues x snapshot days / seasons / as-of dates. A
+# league- or date-scoped read of any of them must seek.
+FACT_TABLES = frozenset({
+    "fact_roster_value_scd", "fact_snapshot_calendar", "fact_transactions",
+    "fact_weekly_player_points", "fc_values_snapshots", "dp_values_history",
+    "outcomes", "predictions", "player_production_value", "player_projected_value",
+    "current_player_market", "current_player_value",
+    "positional_cornering", "positional_cornering_league",
+    "roster_lineup_optimal", "roster_surplus", "roster_construction",
+})
+
+# Scripts whose output tables the registered queries read (DDL constant).
+SCRIPT_DDL = ("cornering_metrics.py", "project_production.py", "lineup_solver.py")
+
+
+@dataclass(frozen=True)
+class Query:
+    source: str                   # where the statement lives
+    sql: str
+    scans: tuple[str, ...] = ()   # fact tables it reads whole by design
+
+
+# The scripts' reads, verbatim apart from `?` -> named parameters.
+# lineup_solver's {src} is current_player_value (its default, realized path).
+SCRIPT_QUERIES = {
+    "cornering.fixed_bars": Query("cornering_metrics.py", """
+        SELECT DISTINCT league_id, position, replacement_ppg
+        FROM player_production_value WHERE position IN ('QB','RB','WR','TE')""",
+        scans=("player_production_value",)),
+    "cornering.bar_rank": Query("cornering_metrics.py", """
+        SELECT COUNT(*) + 1 FROM player_production_value
+        WHERE league_id=:league AND position=:pos AND ppg > :bar"""),
+    "cornering.canonical_bar": Query("cornering_metrics.py", """
+        SELECT ppg FROM player_production_value
+        WHERE league_id=:canonical AND position=:pos ORDER BY ppg DESC
+        LIMIT 1 OFFSET :k"""),
+    "cornering.bar_season": Query("cornering_metrics.py", """
+        SELECT MAX(season) FROM player_production_value"""),
+    "cornering.leagues": Query("cornering_metrics.py", """
+        SELECT l.league_id FROM dim_leagues l WHERE l.season =
+        (SELECT MAX(d2.season) FROM dim_leagues d2 JOIN current_player_value v
+         ON v.league_id=d2.league_id WHERE d2.league_name=l.league_name)"""),
+    "cornering.realized_players": Query("cornering_metrics.py", """
+        SELECT roster_id, ppg FROM current_player_value
+        WHERE league_id=:league AND position=:pos AND ppg IS NOT NULL"""),
+    "cornering.projected_as_of": Query("cornering_metrics.py", """
+        SELECT MAX(as_of_date) FROM player_projected_value WHERE league_id=:league"""),
+    "cornering.projected_players": Query("cornering_metrics.py", """
+        SELECT roster_id, ppg_proj FROM player_projected_value
+        WHERE league_id=:league AND position=:pos AND as_of_date=:as_of
+        AND ppg_proj IS NOT NULL"""),
+    "cornering.unprojected": Query("cornering_metrics.py", """
+        SELECT COUNT(*) FROM player_projected_value
+        WHERE league_id=:league AND position=:pos AND as_of_date=:as_of
+        AND ppg_proj IS NULL"""),
+    "cornering.share_check": Query("cornering_metrics.py", """
+        SELECT basis, league_id, position, ROUND(SUM(vona_share), 6) s
+        FROM positional_cornering WHERE as_of_date=:as_of AND vona_share IS NOT NULL
+        GROUP BY basis, league_id, position
+        HAVING ABS(s - 1.0) > 1e-5"""),
+    "project.leagues": Query("project_production.py", """
+        SELECT DISTINCT league_id FROM current_player_value""",
+        scans=("current_player_value",)),
+    "project.replacement_pool": Query("project_production.py", """
+        SELECT ppg, vorp FROM current_player_value
+        WHERE league_id=:league AND position=:pos AND ppg IS NOT NULL
+        ORDER BY ppg DESC"""),
+    "project.rostered": Query("project_production.py", """
+        SELECT v.league_id, v.roster_id, v.player_id, v.player_name, v.position
+        FROM current_player_value v
+        JOIN dim_leagues l ON l.league_id = v.league_id
+        WHERE l.season = (SELECT MAX(d2.season) FROM dim_leagues d2
+            JOIN current_player_value vv ON vv.league_id = d2.league_id
+            WHERE d2.league_name = l.league_name)""",
+        scans=("current_player_value",)),
+    "project.rows_written": Query("project_production.py", """
+        SELECT COUNT(*) FROM player_projected_value WHERE as_of_date=:as_of"""),
+    "project.check_leagues": Query("project_production.py", """
+        SELECT DISTINCT p.league_id, l.league_name
+        FROM player_projected_value p JOIN dim_leagues l
+        ON l.league_id=p.league_id WHERE p.as_of_date=:as_of"""),
+    "project.check_total": Query("project_production.py", """
+        SELECT SUM(vbd_proj) FROM player_projected_value
+        WHERE league_id=:league AND as_of_date=:as_of"""),
+    "project.check_shares": Query("project_production.py", """
+        SELECT SUM(s) FROM (SELECT CAST(SUM(vbd_proj) AS REAL)/:total AS s
+        FROM player_projected_value WHERE league_id=:league AND as_of_date=:as_of
+        GROUP BY roster_id)"""),
+    "lineup.leagues": Query("lineup_solver.py", """
+        SELECT l.league_id, l.league_name, l.roster_positions_json
+        FROM dim_leagues l
+        WHERE l.season = (SELECT MAX(d2.season) FROM dim_leagues d2
+          JOIN current_player_value v ON v.league_id = d2.league_id
+          WHERE d2.league_name = l.league_name)"""),
+    "lineup.snapshot": Query("lineup_solver.py", """
+        SELECT MAX(snapshot_date) FROM current_player_value WHERE league_id=:league"""),
+    "lineup.rosters": Query("lineup_solver.py", """
+        SELECT DISTINCT roster_id FROM current_player_value
+        WHERE league_id=:league AND snapshot_date=:snap"""),
+    "lineup.players": Query("lineup_solver.py", """
+        SELECT player_id, player_name, position, ppg, vorp
+        FROM current_player_value WHERE league_id=:league AND roster_id=:roster
+        AND snapshot_date=:snap AND position IN ('QB','RB','WR','TE')"""),
+}
+
+# schema.sql / points_model views, read the way their consumers read them.
+VIEW_QUERIES = {
+    "view.historical_value": Query("schema.sql", """
+        SELECT * FROM fact_roster_historical_value
+        WHERE league_id = :league AND roster_id = :roster
+          AND snapshot_date = (SELECT MAX(snapshot_date) FROM fact_snapshot_calendar
+                               WHERE league_id = :league)"""),
+    "view.player_value": Query("points_model.py", """
+        SELECT * FROM v_player_value
+        WHERE league_id = :league
+          AND snapshot_date = (SELECT MAX(snapshot_date) FROM fact_snapshot_calendar
+                               WHERE league_id = :league)"""),
+}
+
+QUERIES: dict[str, Query] = {
+    **{f"api.{n}": Query("Analytics.js", sql) for n, sql in ANALYTICS_QUERIES.items()},
+    **{f"view.{n}": Query("warehouse_keys.BENCH_QUERIES", sql) for n, sql in BENCH_QUERIES.items()},
+    **VIEW_QUERIES,
+    **SCRIPT_QUERIES,
+}
+
+_SCAN = re.compile(r"^SCAN (\S+)(?: USING (?:COVERING )?INDEX (\S+))?")
+_AUTO = re.compile(r"^(?:SEARCH|SCAN) (\S+) USING AUTOMATIC (?:PARTIAL )?(?:COVERING )?INDEX(?: \((.*)\))?")
+_FROM = re.compile(r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", re.I)
+_NOT_ALIAS = {"on", "where", "join", "left", "inner", "cross", "natural", "outer", "group", "order",
+              "limit", "using", "union", "having", "window", "as"}
+
+
+# --------------------------------------------------------------------------- #
+# Warehouse setup
+# --------------------------------------------------------------------------- #
+
+def module_constant(script: str, name: str) -> str:
+    """A module-level string constant, read without importing the script
+    (lineup_solver needs scipy, project_production the whole model stack)."""
+    tree = ast.parse((HERE / script).read_text(encoding="utf-8"))
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(isinstance(t, ast.Name) and t.id == name for t in node.targets):
+            return ast.literal_eval(node.value)
+    raise KeyError(f"{script} has no constant {name}")
+
+
+def attach_script_tables(con: sqlite3.Connection) -> list[str]:
+    """Create, as empty TEMP tables, the script output tables this warehouse
+    does not have yet, with the script's indexes on them; returns their names."""
+    made: list[str] = []
+    for script in SCRIPT_DDL:
+        ddl = module_constant(script, "DDL")
+        for m in re.finditer(r"CREATE TABLE IF NOT EXISTS (\w+)\s*\(.*?\);", ddl, re.S):
+            if not con.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (m.group(1),)).fetchone():
+                con.execute(m.group(0).replace("CREATE TABLE", "CREATE TEMP TABLE", 1))
+                made.append(m.group(1))
+        for m in re.finditer(r"CREATE INDEX IF NOT EXISTS \w+ ON (\w+)\s*\(.*?\);", ddl, re.S):
+            if m.group(1) in made:   # an index on a temp table is created in temp
+                con.execute(m.group(0))
+    return made
+
+
+def _one(con: sqlite3.Connection, sql: str, params: tuple = (), default=None):
+    try:
+        row = con.execute(sql, params).fetchone()
+    except sqlite3.OperationalError:   # table not built in this warehouse
+        return default
+    return default if row is None or row[0] is None else row[0]
+
+
+def parameters(con: sqlite3.Connection) -> dict:
+    """Bind values that hit real rows: the league with the most current
+    rows, its first roster, latest snapshot and as-of date."""
+    league = _one(con, "SELECT league_id FROM current_player_market GROUP BY league_id "
+                       "ORDER BY COUNT(*) DESC LIMIT 1") or _one(con, "SELECT league_id FROM dim_leagues")
+    canonical = _one(con, "SELECT league_id FROM outcomes_provenance WHERE is_canonical = 1", default=league)
+    as_of = _one(con, "SELECT MAX(as_of_date) FROM player_projected_value", default=str(date.today()))
+    return {
+        "league": league,
+        "roster": _one(con, "SELECT MIN(roster_id) FROM current_player_market WHERE league_id = ?",
+                       (league,), default=1),
+        "canonical": canonical,
+        "outcomes_league": canonical,
+        "season": _one(con, "SELECT MAX(season) FROM outcomes WHERE league_id = ?", (canonical,)),
+        "pos": "RB",
+        "bar": _one(con, "SELECT MAX(replacement_ppg) FROM player_production_value "
+                         "WHERE league_id = ? AND position = 'RB'", (league,), default=10.0),
+        "k": 24,
+        "as_of": as_of,
+        "snap": _one(con, "SELECT MAX(snapshot_date) FROM fact_snapshot_calendar WHERE league_id = ?",
+                     (league,)),
+        "total": _one(con, "SELECT SUM(vbd_proj) FROM player_projected_value "
+                           "WHERE league_id = ? AND as_of_date = ?", (league, as_of), default=1),
+    }
+
+
+# --------------------------------------------------------------------------- #
+# Plans
+# --------------------------------------------------------------------------- #
+
+def explain(con: sqlite3.Connection, sql: str, params: dict) -> list[str]:
+    """EXPLAIN QUERY PLAN as indented detail lines."""
+    depth: dict[int, int] = {0: -1}
+    lines = []
+    for node, parent, _, detail in con.execute("EXPLAIN QUERY PLAN " + sql, params):
+        depth[node] = depth.get(parent, -1) + 1
+        lines.append("  " * depth[node] + detail)
+    return lines
+
+
+def aliases(sql: str) -> dict[str, set[str]]:
+    """alias (or bare table name) -> the tables it names in `sql`."""
+    out: dict[str, set[str]] = {}
+    for table, alias in _FROM.findall(sql):
+        out.setdefault(table, set()).add(table)
+        if alias and alias.lower() not in _NOT_ALIAS:
+            out.setdefault(alias, set()).add(table)
+    return out
+
+
+def view_sql(con: sqlite3.Connection, sql: str, seen: set[str] | None = None) -> str:
+    """The definitions of every view `sql` reads, transitively."""
+    seen = set() if seen is None else seen
+    out = []
+    for name in aliases(sql):
+        if name in seen:
+            continue
+        seen.add(name)
+        row = con.execute("SELECT sql FROM sqlite_master WHERE type = 'view' AND name = ? UNION ALL "
+                          "SELECT sql FROM sqlite_temp_master WHERE type = 'view' AND name = ?",
+                          (name, name)).fetchone()
+        if row:
+            out += [row[0], view_sql(con, row[0], seen)]
+    return "\n".join(out)
+
+
+class Planner:
+    """Plans one warehouse's queries and checks them for fact scans."""
+
+    def __init__(self, con: sqlite3.Connection):
+        self.con = con
+        self.params = parameters(con)
+        self._index_table = {}
+        for schema in ("sqlite_master", "sqlite_temp_master"):
+            self._index_table.update(con.execute(f"SELECT name, tbl_name FROM {schema} WHERE type = 'index'"))
+
+    def tables(self, q: Query) -> dict[str, set[str]]:
+        """Name resolution for plan lines: the query's own aliases win over
+        the same alias inside a view it reads."""
+        inner = aliases(view_sql(self.con, q.sql))
+        return {**inner, **aliases(q.sql)}
+
+    def violations(self, q: Query, plan: list[str]) -> list[dict]:
+        names = self.tables(q)
+        out = []
+        for line in plan:
+            detail = line.strip()
+            auto, scan = _AUTO.match(detail), _SCAN.match(detail)
+            if auto:
+                name, index, cols = auto.group(1), None, re.findall(r"(\w+)[=<>]", auto.group(2) or "")
+            elif scan:
+                name, index, cols = scan.group(1), scan.group(2), None
+            else:
+                continue
+            hit = {self._index_table[index]} if index in self._index_table else names.get(name, set())
+            for table in sorted(hit & FACT_TABLES - set(q.scans)):
+                out.append({"table": table, "alias": name, "detail": detail, "columns": cols})
+        return out
+
+    def columns(self, table: str) -> list[str]:
+        return [r[1] for r in self.con.execute(f'PRAGMA table_info("{table}")')]
+
+    def candidate(self, q: Query, v: dict) -> list[str]:
+        """Index columns for a flagged table: its equality columns in the
+        query's predicates, then one range / MIN / MAX / ORDER BY column."""
+        cols = set(self.columns(v["table"]))
+        if v["columns"]:   # an automatic index lists what it wanted
+            return [c for c in dict.fromkeys(v["columns"]) if c in cols]
+        text = q.sql + "\n" + view_sql(self.con, q.sql)
+        quals = [rf"\b{re.escape(v['alias'])}\."]
+        if v["alias"] == v["table"]:
+            quals.append(r"(?<![\w.])")   # unqualified columns of an unaliased table
+        eq, tail = [], []
+        for p in quals:
+            eq += re.findall(rf"{p}(\w+)\s*(?:(?<![<>!])=|\bIN\b)", text, re.I)
+            eq += re.findall(rf"(?<![<>!])=\s*{p}(\w+)", text, re.I)
+            tail += re.findall(rf"{p}(\w+)\s*(?:[<>]|\bBETWEEN\b)", text, re.I)
+            tail += re.findall(rf"[<>]=?\s*{p}(\w+)", text, re.I)
+            tail += re.findall(rf"\b(?:MAX|MIN)\(\s*{p}(\w+)\s*\)", text, re.I)
+            tail += re.findall(rf"\bORDER BY\s+{p}(\w+)", text, re.I)
+        eq = [c for c in dict.fromkeys(eq) if c in cols]
+        tail = [c for c in tail if c in cols and c not in eq]
+        return eq + tail[:1]
+
+    def recommend(self, q: Query, v: dict) -> dict | None:
+        cols = self.candidate(q, v)
+        if not cols:
+            return None
+        table = v["table"]
+        for index, in self.con.execute(f'SELECT name FROM pragma_index_list("{table}")'):
+            have = [r[2] for r in self.con.execute(f'PRAGMA index_info("{index}")')]
+            if have[:len(cols)] == cols:
+                return {"table": table, "columns": cols, "existing": index, "verified": False,
+                        "ddl": None}
+        ddl = f"CREATE INDEX IF NOT EXISTS ix_{table}_{'_'.join(cols)} ON {table} ({', '.join(cols)})"
+        self.con.execute("BEGIN")   # rolled back: even an empty commit would bump the file's change counter
+        try:
+            self.con.execute(ddl)
+            after = explain(self.con, q.sql, self.params)
+            fixed = not any(w["table"] == table for w in self.violations(q, after))
+        finally:
+            self.con.execute("ROLLBACK")
+        return {"table": table, "columns": cols, "existing": None, "verified": fixed, "ddl": ddl}
+
+
+def expert(db: Path, sql: str) -> list[str]:
+    """CREATE INDEX suggestions from the sqlite3 shell's .expert mode."""
+    shell = shutil.which("sqlite3")
+    if shell is None:
+        return []
+    try:
+        out = subprocess.run([shell, str(db)], input=f".expert\n{sql.strip()};\n", capture_output=True,
+                             text=True, timeout=120).stdout
+    except (OSError, subprocess.SubprocessError):
+        return []
+    return [line.strip() for line in out.splitlines() if line.startswith("CREATE INDEX")]
+
+
+# --------------------------------------------------------------------------- #
+# Suite
+# --------------------------------------------------------------------------- #
+
+def check_warehouse(db: Path, repeats: int, use_expert: bool = False) -> dict:
+    """Plan, check and time every registered query against `db`."""
+    con = sqlite3.connect(db, isolation_level=None)   # autocommit: the index trial opens its own transaction
+    empty = attach_script_tables(con)
+    planner = Planner(con)
+    rows = {t: con.execute(f'SELECT COUNT(*) FROM "{t}"').fetchone()[0] for t in sorted(FACT_TABLES)
+            if con.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (t,)).fetchone()}
+    queries: dict[str, dict] = {}
+    for name, q in QUERIES.items():
+        entry: dict = {"source": q.source}
+        try:
+            entry["plan"] = explain(con, q.sql, planner.params)
+        except sqlite3.OperationalError as exc:   # e.g. v_player_value before points_model ran
+            queries[name] = {**entry, "error": str(exc)}
+            continue
+        entry["violations"] = planner.violations(q, entry["plan"])
+        entry["recommend"] = [r for r in (planner.recommend(q, v) for v in entry["violations"]) if r]
+        if use_expert and entry["violations"] and not set(planner.tables(q)) & set(empty):
+            entry["expert"] = expert(db, q.sql)
+        entry["empty_tables"] = sorted(set(aliases(q.sql)) & set(empty))
+        entry["reads"] = sorted(set().union(*planner.tables(q).values()) & FACT_TABLES)
+        entry["fact_rows"] = sum(rows.get(t, 0) for t in entry["reads"])
+        queries[name] = entry
+    ms = time_queries(con, {n: QUERIES[n].sql for n, e in queries.items() if "error" not in e},
+                      planner.params, repeats)
+    for name, v in ms.items():
+        queries[name]["ms"] = v
+    con.close()
+    return {"db": str(db), "db_mb": round(db.stat().st_size / 1e6, 1), "rows": rows,
+            "empty_tables": empty, "params": planner.params, "queries": queries}
+
+
+def report(label: str, result: dict, verbose: bool) -> int:
+    """Print one warehouse's findings; returns the number of violations."""
+    big = sorted(result["rows"].items(), key=lambda kv: -kv[1])[:3]
+    print(f"{label}: {result['db']} ({result['db_mb']:,.1f} MB; "
+          + ", ".join(f"{t} {n:,}" for t, n in big) + ")")
+    if result["empty_tables"]:
+        print(f"  empty (script never ran here): {', '.join(result['empty_tables'])}")
+    n_bad = 0
+    for name, e in result["queries"].items():
+        if "error" in e:
+            print(f"  SKIP {name:<34} {e['error']}")
+            continue
+        bad = e["violations"]
+        n_bad += len(bad)
+        if not bad and not verbose:
+            continue
+        print(f"  {'FAIL' if bad else 'ok  '} {name:<34} [{e['source']}]")
+        for line in e["plan"]:
+            print(f"         {line}")
+        for r in e["recommend"]:
+            if r["existing"]:
+                print(f"       existing index {r['existing']} covers ({', '.join(r['columns'])}) "
+                      f"but is not used — check column types / expressions")
+            else:
+                print(f"       recommend: {r['ddl']};  -- {'verified' if r['verified'] else 'NOT verified'}")
+        for ddl in e.get("expert", []):
+            print(f"       .expert:   {ddl}")
+    checked = sum("error" not in e for e in result["queries"].values())
+    print(f"  {checked} queries planned, {n_bad} fact-table scan(s)")
+    return n_bad
+
+
+def latency_table(results: list[tuple[str, dict]]) -> list[str]:
+    labels = [lbl for lbl, _ in results]
+    lines = [f"{'latency ms (best of N)':<38}" + "".join(f"{lbl:>12}" for lbl in labels)]
+    for name in QUERIES:
+        cells = []
+        for _, r in results:
+            e = r["queries"].get(name, {})
+            ms = e.get("ms")
+            cells.append("-" if ms is None else f"{ms:.2f}{'*' if e.get('empty_tables') else ''}")
+        lines.append(f"{name:<38}" + "".join(f"{c:>12}" for c in cells))
+    lines.append("* reads a script table that is empty in that warehouse")
+    return lines
+
+
+def superlinear(results: list[tuple[str, dict]]) -> list[str]:
+    """Queries whose latency, first warehouse to last, outgrew their fact
+    rows by more than 2x."""
+    if len(results) < 2:
+        return []
+    (_, first), (_, last) = results[0], results[-1]
+    out = []
+    for name in QUERIES:
+        a, b = first["queries"].get(name, {}), last["queries"].get(name, {})
+        if a.get("ms") is None or b.get("ms") is None or not a.get("fact_rows") or b["ms"] < 1:
+            continue
+        t, r = b["ms"] / max(a["ms"], 0.01), b["fact_rows"] / a["fact_rows"]
+        if t > 2 * max(r, 1):
+            out.append(f"  {name:<34} {a['ms']:.2f} -> {b['ms']:.2f} ms (x{t:,.0f}) "
+                       f"while {'+'.join(b['reads'])} grew x{r:,.1f}")
+    return out
+
+
+def recommendations(results: list[tuple[str, dict]]) -> dict[str, list[str]]:
+    """Distinct verified CREATE INDEX statements -> the queries that need them."""
+    out: dict[str, list[str]] = {}
+    for _, r in results:
+        for name, e in r["queries"].items():
+            for rec in e.get("recommend", []):
+                if rec["ddl"] and rec["verified"] and name not in out.setdefault(rec["ddl"], []):
+                    out[rec["ddl"]].append(name)
+    return out
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="EXPLAIN QUERY PLAN regression suite for the warehouse SQL")
+    ap.add_argument("--db", nargs="+", type=Path, default=[], help="existing warehouse(s) to check")
+    ap.add_argument("--scale", nargs="+", default=None,
+                    help="synth_warehouse.SCALES presets to build and check (default xs when no --db)")
+    ap.add_argument("--workdir", type=Path, help="where the synthetic warehouses live (default: a temp dir)")
+    ap.add_argument("--rebuild", action="store_true", help="regenerate synthetic warehouses already in --workdir")
+    ap.add_argument("--repeats", type=int, default=5, help="latency: best of N")
+    ap.add_argument("--expert", action="store_true", help="also ask the sqlite3 shell's .expert for indexes")
+    ap.add_argument("--verbose", action="store_true", help="print every plan, not only failing ones")
+    ap.add_argument("--json", help="also write plans, findings and latencies here")
+    args = ap.parse_args()
+
+    targets: list[tuple[str, Path]] = [(p.stem, p) for p in args.db]
+    missing = [p for _, p in targets if not p.exists()]
+    if missing:
+        print(f"No such warehouse: {', '.join(map(str, missing))}")
+        return 1
+    scales = args.scale if args.scale is not None else ([] if args.db else ["xs"])
+    if scales:
+        from synth_warehouse import SCALES, generate
+
+        unknown = sorted(set(scales) - set(SCALES))
+        if unknown:
+            print(f"Unknown scale(s) {unknown}; presets: {', '.join(SCALES)}")
+            return 1
+        work = (args.workdir or Path(tempfile.mkdtemp(prefix="query_plans_"))).resolve()
+        work.mkdir(parents=True, exist_ok=True)
+        for name in scales:
+            db = work / f"synth_{name}.db"
+            if db.exists() and args.rebuild:
+                db.unlink()
+            if not db.exists():
+                print(f"building synthetic warehouse {name} -> {db}")
+                generate(db, SCALES[name])
+            targets.append((name, db))
+
+    results = []
+    n_bad = 0
+    for label, db in targets:
+        result = check_warehouse(db, args.repeats, args.expert)
+        n_bad += report(label, result, args.verbose)
+        results.append((label, result))
+    print()
+    print("\n".join(latency_table(results)))
+    slow = superlinear(results)
+    if slow:
+        print(f"\nsuperlinear latency, {results[0][0]} -> {results[-1][0]}:")
+        print("\n".join(slow))
+    recs = recommendations(results)
+    if recs:
+        print("\nrecommended indexes (each verified to remove the scan):")
+        for ddl, names in recs.items():
+            print(f"  {ddl};\n      -- {', '.join(names)}")
+    if args.json:
+        Path(args.json).write_text(json.dumps({"sqlite": sqlite3.sqlite_version, "warehouses": dict(results),
+                                               "recommended": recs}, indent=2, default=str))
+    print(f"\n{'FAIL' if n_bad else 'OK'}: {n_bad} fact-table scan(s) across {len(results)} warehouse(s)")
+    return 1 if n_bad else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
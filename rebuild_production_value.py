@@ -27,6 +27,7 @@ WHAT CHANGES BESIDES REG-ONLY (disclosed, not silent):
     seasons, so this matters for their historical league rows.
 
 Legacy table is preserved as player_production_value_legacy.
+current_player_value is refreshed afterwards (current_tables.py).
 
 ALSO PATCH YOUR points_model.py at the nflverse read (the actual root fix):
     df = df[df["season_type"] == "REG"]
@@ -42,7 +43,10 @@ import sys
 
 import numpy as np
 import pandas as pd
+from sqlalchemy import create_engine
 
+from current_tables import refresh_current_tables
+from http_client import GITHUB_LIMITER, http_csv
 from outcomes_etl import STATS_URL, POSITIONS, score_config
 
 
@@ -78,15 +82,17 @@ def main() -> int:
                  f"dp_archive_etl.py. This script does NOT require the "
                  f"outcomes tables.")
 
-    # backup once; re-runs keep the original legacy snapshot
+    # backup once; re-runs keep the original legacy snapshot. A copy, not a
+    # rename: the live table stays in place until the swap below commits.
     if "player_production_value_legacy" not in have:
-        con.execute("ALTER TABLE player_production_value "
-                    "RENAME TO player_production_value_legacy")
+        con.execute("CREATE TABLE player_production_value_legacy AS "
+                    "SELECT * FROM player_production_value")
         con.commit()
     ks = infer_replacement_ranks(con)
 
     # REG-only weekly stats, crosswalked to sleeper ids — THE fix
-    weekly = pd.read_csv(STATS_URL.format(season=args.season), low_memory=False)
+    weekly = http_csv(STATS_URL.format(season=args.season), GITHUB_LIMITER,
+                      low_memory=False)
     weekly = weekly[(weekly.season_type == "REG")
                     & (weekly.position.isin(POSITIONS))].copy()
     weekly["is_te"] = (weekly.position == "TE").astype(float)
@@ -99,14 +105,8 @@ def main() -> int:
     leagues = pd.read_sql_query(
         "SELECT league_id, league_name, scoring_settings_json "
         "FROM dim_leagues", con)
-    con.execute("DROP TABLE IF EXISTS player_production_value")
-    con.execute("""CREATE TABLE player_production_value (
-        season INTEGER, league_id TEXT, player_id TEXT, position TEXT,
-        games INTEGER, ppg REAL, replacement_ppg REAL, vorp REAL,
-        vbd_value INTEGER,
-        PRIMARY KEY (season, league_id, player_id))""")
-
-    deltas = []
+
+    deltas, frames = [], []
     for _, lg in leagues.iterrows():
         cfg = json.loads(lg.scoring_settings_json)
         pts, _ = score_config(weekly, cfg)
@@ -138,11 +138,41 @@ def main() -> int:
                             if mx > 0 else 0)
         out["season"] = args.season
         out["league_id"] = lg.league_id
-        out[["season", "league_id", "player_id", "position", "games", "ppg",
-             "replacement_ppg", "vorp", "vbd_value"]].to_sql(
-            "player_production_value", con, if_exists="append", index=False)
+        frames.append(out[["season", "league_id", "player_id", "position", "games",
+                           "ppg", "replacement_ppg", "vorp", "vbd_value"]])
+
+    # One transaction for drop/create/fill: sqlite3 autocommits DDL outside
+    # an explicit BEGIN (and pandas' to_sql commits per call), and a failure
+    # halfway must not leave the warehouse without the table. The index name
+    # is points_model.PRODUCTION_INDEX's; backups made by the old rename
+    # carry it on the legacy table, so it is dropped by name first.
+    rows = pd.concat(frames, ignore_index=True)
+    con.execute("BEGIN IMMEDIATE")
+    try:
+        con.execute("DROP INDEX IF EXISTS ix_ppv_league_pos")
+        con.execute("DROP TABLE IF EXISTS player_production_value")
+        con.execute("""CREATE TABLE player_production_value (
+            season INTEGER, league_id TEXT, player_id TEXT, position TEXT,
+            games INTEGER, ppg REAL, replacement_ppg REAL, vorp REAL,
+            vbd_value INTEGER,
+            PRIMARY KEY (season, league_id, player_id))""")
+        con.execute("CREATE INDEX IF NOT EXISTS ix_ppv_league_pos ON "
+                    "player_production_value (league_id, position, ppg)")
+        con.executemany(
+            "INSERT INTO player_production_value VALUES (?,?,?,?,?,?,?,?,?)",
+            rows.astype(object).itertuples(index=False, name=None))
+    except BaseException:
+        con.rollback()
+        raise
     con.commit()
 
+    # current_player_value materializes v_player_value over this table; the
+    # API, cornering, lineup and project read it, not the view.
+    engine = create_engine(f"sqlite:///{args.db}")
+    with engine.begin() as conn:
+        refresh_current_tables(conn)
+    engine.dispose()
+
     # ---- delta report ---------------------------------------------------------
     # Drew league_id straight from dim_leagues: this report must not depend
     # on the outcomes tables (a later build step).
@@ -4,7 +4,8 @@
 --         extracts emitted by the ETL (Power BI has no native SQLite connector).
 --
 -- STAR SCHEMA
---   Fact_Roster_Historical_Value  (central fact)
+--   Fact_Roster_Historical_Value  (central fact; stored change-only as
+--                                  fact_roster_value_scd, served by a view)
 --     grain: one row per  snapshot_date × league_id × roster_id × player_id
 --   Dim_Leagues, Dim_Managers, Dim_Players, Dim_Draft_Picks  (conformed dims)
 --   Fact_Transactions             (second fact: powers Tab 3 transaction ROI)
@@ -12,8 +13,9 @@
 --
 -- SNAPSHOT DESIGN
 --   Market-value history cannot be downloaded (no free KTC/FC archive), so the
---   value fact is a SNAPSHOT fact: each ETL run appends today's values keyed by
---   snapshot_date and upserts idempotently. History accrues forward. Roster and
+--   value fact is a SNAPSHOT fact: each ETL run records today's values keyed by
+--   snapshot_date, idempotently, writing only rows that changed since the
+--   previous snapshot. History accrues forward. Roster and
 --   transaction history, by contrast, are fully backfilled from Sleeper.
 --
 -- USAGE
@@ -46,6 +48,7 @@ CREATE TABLE IF NOT EXISTS dim_leagues (
     te_premium_value    REAL,            -- per-reception TE bonus (0 if standard)
     ppr                 REAL,
     previous_league_id  TEXT,            -- self-reference: prior season's league
+    is_frozen           INTEGER CHECK (is_frozen IN (0, 1)),  -- completed + loaded: not re-extracted
     loaded_at           TEXT DEFAULT (datetime('now'))
 );
 
@@ -69,7 +72,9 @@ CREATE TABLE IF NOT EXISTS dim_players (
     years_exp    INTEGER,
     is_rookie    INTEGER CHECK (is_rookie IN (0, 1)),
     draft_year   INTEGER,                 -- nullable; populated if available
-    loaded_at    TEXT DEFAULT (datetime('now'))
+    loaded_at    TEXT DEFAULT (datetime('now')),
+    content_hash    TEXT,                 -- digest of the attributes above; skip-if-unchanged
+    last_changed_at TEXT                  -- UTC time the ETL last saw those attributes change
 );
 
 CREATE TABLE IF NOT EXISTS dim_draft_picks (
@@ -93,11 +98,16 @@ CREATE TABLE IF NOT EXISTS dim_draft_picks (
 -- FACTS
 -- ----------------------------------------------------------------------------
 
-CREATE TABLE IF NOT EXISTS fact_roster_historical_value (
-    snapshot_date      TEXT    NOT NULL,  -- ISO 'YYYY-MM-DD' (SQLite has no DATE type)
+-- Stored change-only (SCD2): one row per (league, roster, player) per stretch
+-- of snapshots over which ownership and every value stayed the same. A day
+-- on which nothing moved writes nothing. valid_to = first snapshot_date the
+-- row no longer held (NULL = current). The daily grain below is a view.
+CREATE TABLE IF NOT EXISTS fact_roster_value_scd (
     league_id          TEXT    NOT NULL,
     roster_id          INTEGER NOT NULL,
     player_id          TEXT    NOT NULL,
+    valid_from         TEXT    NOT NULL,  -- ISO 'YYYY-MM-DD' (SQLite has no DATE type)
+    valid_to           TEXT,              -- exclusive; NULL while current
     -- PRIMARY market source: FantasyPros ECR via DynastyProcess
     fp_value_1qb       REAL,
     fp_value_2qb       REAL,              -- Superflex value
@@ -107,17 +117,36 @@ CREATE TABLE IF NOT EXISTS fact_roster_historical_value (
     fc_value_2qb       REAL,
     sleeper_adp_value  REAL,
     fc_trend_30day     REAL,              -- 30-day movement; cheap momentum signal
-    loaded_at          TEXT DEFAULT (datetime('now')),
-    PRIMARY KEY (snapshot_date, league_id, roster_id, player_id),
+    PRIMARY KEY (league_id, roster_id, player_id, valid_from),
     FOREIGN KEY (league_id)            REFERENCES dim_leagues(league_id),
     FOREIGN KEY (player_id)            REFERENCES dim_players(player_id),
     FOREIGN KEY (league_id, roster_id) REFERENCES dim_managers(league_id, roster_id)
 );
 
+-- Snapshot calendar: the days each league was loaded. The view expands SCD
+-- ranges onto these days only, so a league skipped on a day has no rows that day.
+CREATE TABLE IF NOT EXISTS fact_snapshot_calendar (
+    league_id      TEXT NOT NULL,
+    snapshot_date  TEXT NOT NULL,
+    PRIMARY KEY (league_id, snapshot_date),
+    FOREIGN KEY (league_id) REFERENCES dim_leagues(league_id)
+);
+
+-- Compatibility view at the original grain (snapshot_date × league × roster ×
+-- player); v_player_market, v_roster_assets and the API read it unchanged.
+CREATE VIEW IF NOT EXISTS fact_roster_historical_value AS
+SELECT c.snapshot_date, s.league_id, s.roster_id, s.player_id,
+       s.fp_value_1qb, s.fp_value_2qb, s.fp_ecr_2qb, s.fc_value_1qb, s.fc_value_2qb,
+       s.sleeper_adp_value, s.fc_trend_30day
+FROM fact_snapshot_calendar c
+JOIN fact_roster_value_scd s
+  ON s.league_id = c.league_id
+ AND s.valid_from <= c.snapshot_date
+ AND (s.valid_to IS NULL OR c.snapshot_date < s.valid_to);
+
 -- Second fact for Tab 3 (transaction ROI / waterfall). One row per transaction
--- "leg" (a single add or drop). Populating this is a small ETL addition that
--- loops get_transactions() across weeks and explodes adds/drops — say the word
--- and I'll wire it into Phase 1.
+-- "leg" (a single add or drop). Loaded by etl_pipeline.load_activity(), which
+-- only fetches weeks past each league's etl_watermarks row.
 CREATE TABLE IF NOT EXISTS fact_transactions (
     transaction_id     TEXT    NOT NULL,
     league_id          TEXT    NOT NULL,
@@ -136,15 +165,70 @@ CREATE TABLE IF NOT EXISTS fact_transactions (
     FOREIGN KEY (league_id) REFERENCES dim_leagues(league_id)
 );
 
+-- Weekly player points per league roster, from Sleeper matchups/{week}
+-- players_points (already scored under the league's own settings).
+CREATE TABLE IF NOT EXISTS fact_weekly_player_points (
+    league_id   TEXT    NOT NULL,
+    season      TEXT,
+    week        INTEGER NOT NULL,
+    roster_id   INTEGER NOT NULL,
+    matchup_id  INTEGER,
+    player_id   TEXT    NOT NULL,
+    points      REAL,
+    is_starter  INTEGER CHECK (is_starter IN (0, 1)),
+    PRIMARY KEY (league_id, week, roster_id, player_id),
+    FOREIGN KEY (league_id) REFERENCES dim_leagues(league_id)
+);
+
+-- Incremental-load bookkeeping: per league-season and feed ('transactions',
+-- 'matchups'), weeks <= last_week are loaded and closed; is_final = 1 once a
+-- completed season is fully loaded (never fetched again).
+CREATE TABLE IF NOT EXISTS etl_watermarks (
+    league_id   TEXT    NOT NULL,
+    feed        TEXT    NOT NULL,
+    last_week   INTEGER NOT NULL,
+    is_final    INTEGER CHECK (is_final IN (0, 1)),
+    updated_at  TEXT,
+    PRIMARY KEY (league_id, feed)
+);
+
+-- Name+position identity index over the Sleeper player DB (name_index.py).
+-- Fallback for crosswalk joins (fresh rookies, pre-fp_id archive rows); the
+-- ETL re-normalizes only players whose name/position changed.
+CREATE TABLE IF NOT EXISTS player_name_index (
+    player_id  TEXT PRIMARY KEY,
+    full_name  TEXT,
+    position   TEXT,
+    norm_name  TEXT                      -- accents/punctuation/suffixes stripped
+);
+
+-- Latest FantasyCalc pull per (numQbs, numTeams, ppr) settings tuple
+-- (fc_market.py). The ETL pulls each distinct tuple across the leagues once
+-- and stores it here; pick_values_etl.py reads its pick curves from it.
+CREATE TABLE IF NOT EXISTS fc_market_values (
+    num_qbs         INTEGER NOT NULL,
+    num_teams       INTEGER NOT NULL,
+    ppr             REAL    NOT NULL,    -- snapped to 0 / 0.5 / 1
+    asset_key       TEXT    NOT NULL,    -- sleeper_id, else 'mfl:<id>', else 'name:<fc_name>' (picks)
+    sleeper_id      TEXT,
+    fc_name         TEXT,
+    position        TEXT,                -- 'PICK' for draft picks
+    fc_value        REAL,
+    fc_trend_30day  REAL,
+    fc_adp          REAL,
+    pulled_on       TEXT    NOT NULL,
+    PRIMARY KEY (num_qbs, num_teams, ppr, asset_key)
+);
+
 -- ----------------------------------------------------------------------------
 -- INDICES  (shaped for the way Tableau will filter/join)
 -- ----------------------------------------------------------------------------
-CREATE INDEX IF NOT EXISTS ix_fact_league_date ON fact_roster_historical_value(league_id, snapshot_date);
-CREATE INDEX IF NOT EXISTS ix_fact_player      ON fact_roster_historical_value(player_id);
-CREATE INDEX IF NOT EXISTS ix_fact_date        ON fact_roster_historical_value(snapshot_date);
+CREATE INDEX IF NOT EXISTS ix_scd_league_from  ON fact_roster_value_scd(league_id, valid_from);
+CREATE INDEX IF NOT EXISTS ix_scd_player       ON fact_roster_value_scd(player_id);
 CREATE INDEX IF NOT EXISTS ix_txn_league_date  ON fact_transactions(league_id, txn_date);
 CREATE INDEX IF NOT EXISTS ix_txn_player       ON fact_transactions(player_id);
 CREATE INDEX IF NOT EXISTS ix_picks_owner      ON dim_draft_picks(league_id, current_owner_id);
+CREATE INDEX IF NOT EXISTS ix_pni_name_pos     ON player_name_index(norm_name, position);
 
 -- ----------------------------------------------------------------------------
 -- HELPER VIEWS
@@ -211,3 +295,14 @@ SELECT
     CASE WHEN l.is_superflex = 1 THEN dp.pick_value_2qb ELSE dp.pick_value_1qb END AS fp_market_value
 FROM dim_draft_picks dp
 JOIN dim_leagues l ON l.league_id = dp.league_id;
+
+-- ----------------------------------------------------------------------------
+-- Materialized latest snapshot (current_tables.py). Not declared here: the
+-- writers rebuild them from the views above as CREATE TABLE ... AS SELECT and
+-- swap them in atomically after every load.
+--   current_player_market  = v_player_market rows at each league's latest
+--                            fact_snapshot_calendar date
+--   current_player_value   = the same cut of v_player_value (points_model.py)
+-- Both indexed on (league_id, roster_id); the API's latest-snapshot reads
+-- query these instead of MAX(snapshot_date) over the views.
+-- ----------------------------------------------------------------------------
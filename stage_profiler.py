@@ -0,0 +1,317 @@
+"""
+stage_profiler.py — opt-in profiles of named pipeline stages.
+
+WHY: pipeline_metrics says which stage got slow, never why; the only other
+evidence of a slow run is log timestamps. Setting DYNASTY_PROFILE profiles
+just the named stages of an ordinary run, so the profile is of the real
+workload and the rest of the run pays nothing:
+
+    DYNASTY_PROFILE=train_b1_curve python backtest_baselines.py
+    DYNASTY_PROFILE=solve_hungarian,outcomes_etl.score python build_order.py
+    DYNASTY_PROFILE=build_features DYNASTY_PROFILE_MODE=sample python projection_model.py
+
+Targets (comma-separated) match any of:
+  pipeline_metrics stages   by name or as script.stage (`score` is in more
+                            than one script; `outcomes_etl.score` is not)
+  whole runs                by script name (`etl_pipeline`)
+  hot functions             those decorated @profiled: build_features,
+                            train_b1_curve, solve_hungarian, score_config
+The variable is inherited, so it also reaches the scripts build_order.py and
+bench_etl.py start.
+
+DYNASTY_PROFILE_MODE:
+  cprofile (default)  deterministic (cProfile): exact call counts and
+                      self / cumulative time per function. cProfile keeps
+                      caller -> callee edges, not stacks, so the flamegraph
+                      stacks are rebuilt from the edges and a function
+                      reached along several paths has its time split between
+                      them in proportion to each path's share.
+  sample              a background thread reads the profiled thread's stack
+                      every DYNASTY_PROFILE_INTERVAL ms (default 5): exact
+                      stacks, statistical times, and far less slowdown on
+                      call-heavy stages.
+
+Every entry of a target in a process adds to one profile (solve_hungarian
+runs once per roster). At exit each profile is written to
+DYNASTY_PROFILE_DIR (default <DATA_DIR>/profiles) as
+  <target>-<stamp>-<pid>.folded   collapsed stacks, "a;b;c weight" per line
+                                  (microseconds or samples) — flamegraph.pl,
+                                  inferno, speedscope
+  <target>-<stamp>-<pid>.txt      top DYNASTY_PROFILE_TOP (default 25)
+                                  functions by self and by inclusive time
+  <target>-<stamp>-<pid>.pstats   cprofile mode: raw stats for pstats/snakeviz
+and the head of the summary goes to stderr.
+
+Off is free: targets are read once at import (set the variable before the
+script starts), @profiled hands back the undecorated function, and
+pipeline_metrics skips its hook on an empty TARGETS. A target entered while
+the thread is already inside one (nested targets) runs under the outer
+profile — cProfile allows one active profiler per thread — and in cprofile
+mode a target already being profiled on another thread runs unprofiled.
+"""
+from __future__ import annotations
+
+import atexit
+import cProfile
+import functools
+import os
+import pstats
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterator
+
+TARGETS = frozenset(t.strip() for t in os.getenv("DYNASTY_PROFILE", "").split(",") if t.strip())
+MODE = os.getenv("DYNASTY_PROFILE_MODE", "cprofile").strip().lower()
+INTERVAL_S = float(os.getenv("DYNASTY_PROFILE_INTERVAL", "5")) / 1000
+TOP = int(os.getenv("DYNASTY_PROFILE_TOP", "25"))
+MIN_SHARE = 0.0005   # cprofile stacks below this share of the total are dropped
+
+_local = threading.local()
+_profiles: dict[str, "_Profile"] = {}
+_registry_lock = threading.Lock()
+
+
+def profile_dir() -> Path:
+    return Path(os.getenv("DYNASTY_PROFILE_DIR") or Path(os.getenv("DATA_DIR", "./data")) / "profiles")
+
+
+def _label(filename: str, line: int, name: str) -> str:
+    """One flamegraph frame: no ';' (the stack separator). Builtins have
+    no file (cProfile reports them as ('~', 0))."""
+    label = name if filename == "~" else f"{name} ({Path(filename).name}:{line})"
+    return label.replace(";", ",")
+
+
+# --------------------------------------------------------------------------- #
+# Profilers
+# --------------------------------------------------------------------------- #
+
+class _Profile(ABC):
+    """One target's profile, accumulated over every entry in the process."""
+
+    def __init__(self, target: str):
+        self.target = target
+        self.calls = 0
+        self.skipped = 0
+        self.wall_s = 0.0
+
+    @abstractmethod
+    def start(self) -> bool:
+        """Begin one entry on the calling thread; False if it can't be profiled."""
+
+    @abstractmethod
+    def stop(self) -> None:
+        """End the calling thread's entry."""
+
+    @abstractmethod
+    def folded(self) -> list[str]:
+        """Collapsed stacks, one "a;b;c weight" line each."""
+
+    @abstractmethod
+    def hotspots(self) -> list[str]:
+        """The summary tables, blank-line separated."""
+
+    def write(self, out: Path) -> list[Path]:
+        out.mkdir(parents=True, exist_ok=True)
+        stem = f"{self.target}-{datetime.now():%Y%m%dT%H%M%S}-{os.getpid()}"   # targets may contain '.'
+        folded, txt = out / f"{stem}.folded", out / f"{stem}.txt"
+        folded.write_text("\n".join(self.folded()) + "\n", encoding="utf-8")
+        head = (f"{self.target}: {self.calls} call(s), {self.wall_s:.3f} s wall, mode {MODE}"
+                + (f", {self.skipped} concurrent call(s) unprofiled" if self.skipped else ""))
+        txt.write_text("\n".join([head, *self.hotspots()]) + "\n", encoding="utf-8")
+        return [folded, txt]
+
+
+class _CProfile(_Profile):
+    def __init__(self, target: str):
+        super().__init__(target)
+        self.prof = cProfile.Profile()
+        self.lock = threading.Lock()
+
+    def start(self) -> bool:
+        if not self.lock.acquire(blocking=False):
+            return False   # one thread at a time per cProfile object
+        self.prof.enable()
+        return True
+
+    def stop(self) -> None:
+        self.prof.disable()
+        self.lock.release()
+
+    def _stats(self) -> dict:
+        stats = pstats.Stats(self.prof).stats
+        return {f: v for f, v in stats.items() if not f[2].startswith("<method 'disable' of")}
+
+    def folded(self) -> list[str]:
+        stats = self._stats()
+        callees: dict[tuple, dict[tuple, float]] = {}
+        for func, (_, _, _, _, callers) in stats.items():
+            for caller, edge in callers.items():
+                callees.setdefault(caller, {})[func] = edge[3]
+        roots = [f for f, v in stats.items() if not set(v[4]) & set(stats)]
+        total = sum(stats[f][3] for f in roots) or 1.0
+        weights: Counter = Counter()
+
+        def walk(func: tuple, ct: float, path: tuple[str, ...], on_path: frozenset) -> None:
+            _, _, tt, func_ct, _ = stats[func]
+            share = ct / func_ct if func_ct else 0.0
+            path = path + (_label(*func),)
+            weights[";".join(path)] += tt * share
+            if len(path) >= 128:
+                return
+            for callee, edge_ct in callees.get(func, {}).items():
+                sub = edge_ct * share
+                if callee in stats and callee not in on_path and sub >= total * MIN_SHARE:
+                    walk(callee, sub, path, on_path | {callee})
+
+        for root in roots:
+            walk(root, stats[root][3], (), frozenset({root}))
+        return [f"{stack} {round(w * 1e6)}" for stack, w in weights.items() if round(w * 1e6) > 0]
+
+    def hotspots(self) -> list[str]:
+        stats = self._stats()
+        rows = [(tt, ct, nc, _label(*f)) for f, (_, nc, tt, ct, _) in stats.items()]
+        out = []
+        for title, key in (("self time", 0), ("inclusive time", 1)):
+            out += ["", f"top {TOP} by {title}:", f"{'self s':>10} {'incl s':>10} {'calls':>10}  function"]
+            out += [f"{tt:>10.3f} {ct:>10.3f} {nc:>10,}  {label}"
+                    for tt, ct, nc, label in sorted(rows, key=lambda r: -r[key])[:TOP]]
+        return out
+
+    def write(self, out: Path) -> list[Path]:
+        paths = super().write(out)
+        raw = paths[0].parent / (paths[0].name[:-len(".folded")] + ".pstats")
+        self.prof.dump_stats(raw)
+        return paths + [raw]
+
+
+class _Sampler(_Profile):
+    def __init__(self, target: str):
+        super().__init__(target)
+        self.stacks: Counter = Counter()
+        self.threads: Counter = Counter()   # thread id -> open entries
+        self.lock = threading.Lock()
+        self.thread: threading.Thread | None = None
+
+    def start(self) -> bool:
+        with self.lock:
+            self.threads[threading.get_ident()] += 1
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name=f"profile-{self.target}", daemon=True)
+                self.thread.start()
+        return True
+
+    def stop(self) -> None:
+        with self.lock:
+            self.threads[threading.get_ident()] -= 1
+            self.threads += Counter()   # drop threads with no open entry
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(INTERVAL_S)
+            with self.lock:
+                idents = list(self.threads)
+            frames = sys._current_frames()
+            for ident in idents:
+                frame, stack = frames.get(ident), []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(_label(code.co_filename, code.co_firstlineno, code.co_name))
+                    frame = frame.f_back
+                if stack:
+                    self.stacks[tuple(reversed(stack))] += 1
+
+    def folded(self) -> list[str]:
+        return [f"{';'.join(stack)} {n}" for stack, n in self.stacks.items()]
+
+    def hotspots(self) -> list[str]:
+        total = sum(self.stacks.values())
+        own: Counter = Counter()
+        incl: Counter = Counter()
+        for stack, n in self.stacks.items():
+            own[stack[-1]] += n
+            for label in set(stack):
+                incl[label] += n
+        out = [f"{total:,} samples every {INTERVAL_S * 1000:g} ms"]
+        for title, counts in (("self samples", own), ("inclusive samples", incl)):
+            out += ["", f"top {TOP} by {title}:", f"{'samples':>10} {'share':>7}  function"]
+            out += [f"{n:>10,} {n / (total or 1):>7.1%}  {label}" for label, n in counts.most_common(TOP)]
+        return out
+
+
+# --------------------------------------------------------------------------- #
+# Hooks
+# --------------------------------------------------------------------------- #
+
+def _get(target: str) -> _Profile:
+    with _registry_lock:
+        if target not in _profiles:
+            _profiles[target] = (_Sampler if MODE == "sample" else _CProfile)(target)
+        return _profiles[target]
+
+
+@contextmanager
+def profile(*names: str) -> Iterator[None]:
+    """Profile the block under the first of `names` that is a target; a
+    plain pass-through otherwise."""
+    target = next((n for n in names if n in TARGETS), None)
+    if target is None or getattr(_local, "active", False):
+        yield
+        return
+    prof = _get(target)
+    if not prof.start():
+        prof.skipped += 1
+        yield
+        return
+    _local.active = True
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        prof.stop()
+        prof.wall_s += time.perf_counter() - t0
+        prof.calls += 1
+        _local.active = False
+
+
+def profiled(fn: Callable) -> Callable:
+    """Decorator: profile `fn` under its own name when that name is a
+    target; returns `fn` itself when it is not."""
+    if fn.__name__ not in TARGETS:
+        return fn
+
+    @functools.wraps(fn)
+    def inner(*args, **kwargs):
+        with profile(fn.__name__):
+            return fn(*args, **kwargs)
+    return inner
+
+
+def write_profiles() -> list[Path]:
+    """Write every profile taken so far and start afresh (runs at exit)."""
+    with _registry_lock:
+        profiles = list(_profiles.values())
+        _profiles.clear()
+    written = []
+    for prof in profiles:
+        if not prof.calls:
+            continue
+        paths = prof.write(profile_dir())
+        written += paths
+        lines = prof.hotspots()
+        first = lines.index("")   # the self-time table: title, header, rows
+        print(f"profile {prof.target}: {prof.calls} call(s), {prof.wall_s:.2f} s -> "
+              f"{paths[0].parent / paths[0].name[:-len('.folded')]}.{{{','.join(p.suffix[1:] for p in paths)}}}",
+              file=sys.stderr)
+        print("\n".join(f"  {line}" for line in lines[:first + 3 + TOP] if line), file=sys.stderr)
+    return written
+
+
+if TARGETS:
+    atexit.register(write_profiles)
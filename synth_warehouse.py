@@ -0,0 +1,497 @@
+#!/usr/bin/env python3
+"""
+synth_warehouse.py — a schema-valid synthetic warehouse of any size.
+
+WHY: the only warehouse there is to test against is dynasty.db — 4 leagues,
+a few months of snapshots. It says nothing about how build_features, the
+backtests, lineup_solver, cornering_metrics or the views behave at 500
+leagues and three years of daily snapshots, and the crawler's market
+warehouse is too young to tell either. This builds that warehouse offline,
+deterministically (same Scale + seed -> same bytes in every table), through
+the scripts' own DDL so nothing drifts from the real schema:
+
+  etl_pipeline      dim_leagues / dim_managers / dim_players / dim_draft_picks,
+                    fact_roster_value_scd + fact_snapshot_calendar and the
+                    views over them (leagues go through parse_league_settings)
+  fc_market         fc_market_values, one pull per distinct league setting
+  dp_archive_etl    dp_values_history (weekly ECR snapshots), id_crosswalk,
+                    dp_load_manifest
+  outcomes_etl      nfl_week_calendar, outcomes, outcomes_provenance,
+                    fc_values_snapshots (weekly, over the snapshot days only)
+  points_model      player_production_value + v_player_value
+  current_tables    current_player_market / current_player_value
+
+Sizes (Scale; every one is a CLI flag):
+  leagues, teams, roster    league count, rosters per league, players per roster
+  days                      daily snapshots ending at `end`, per league
+  churn                     per-day probability a rostered player's values move
+                            (each move is a new SCD row, so SCD rows ≈
+                            slots * (1 + churn * days))
+  seasons                   completed seasons of outcomes, ending the season
+                            before `end` (the backtests expect 2019-2025)
+  scored_leagues            leagues outcomes_etl scores (league 0 canonical) —
+                            outcomes rows grow leagues x seasons x weeks x
+                            players, so only this many carry them
+  dp_weeks                  weekly dp_values_history snapshots back from `end`
+                            (default: back to the first season's preseason)
+  players                   player pool size
+
+The data is shaped, not realistic: each player has a talent that drifts by
+season, weekly points are noisy draws around it, ranks and values follow
+talent and age, and leagues score and price it through their own settings.
+That is enough for every downstream script to do its full amount of work.
+
+Usage:
+    python synth_warehouse.py --scale m --out /tmp/synth_m.db
+    python synth_warehouse.py --leagues 500 --days 1095 --out /tmp/big.db --force
+bench_etl.py --warehouse-scaling builds the SCALES presets and times the
+pipeline and the API SQL on each.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import sqlite3
+import sys
+import time
+from dataclasses import asdict, dataclass, replace
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+import etl_pipeline as etl
+from current_tables import refresh_current_tables
+from dp_archive_etl import DDL as DP_DDL
+from fc_market import DDL as FC_DDL, TABLE as FC_TABLE, fc_settings, pull_matrix
+from outcomes_etl import DDL as OUTCOMES_DDL
+from pipeline_metrics import instrumented, stage
+from points_model import MIN_GAMES, PRODUCTION_DDL, PRODUCTION_INDEX, VALUE_VIEW, starters_per_position
+
+
+@dataclass(frozen=True)
+class Scale:
+    leagues: int = 4
+    teams: int = 12
+    roster: int = 25
+    days: int = 90
+    churn: float = 0.03
+    seasons: int = 7
+    scored_leagues: int = 4
+    dp_weeks: int | None = None
+    players: int = 2000
+    seed: int = 7
+    end: str = "2026-06-01"
+
+
+SCALES = {
+    "xs": Scale(leagues=4, days=30),
+    "s": Scale(leagues=25, days=180),
+    "m": Scale(leagues=100, days=365),
+    "l": Scale(leagues=500, days=1095),
+}
+
+POSITIONS = np.array(["QB", "RB", "WR", "TE", "K"])
+POSITION_MIX = [0.14, 0.26, 0.36, 0.14, 0.10]
+BASE_PPG = {"QB": 14.0, "RB": 8.5, "WR": 8.5, "TE": 6.0, "K": 7.0}
+NFL_TEAMS = ("ARI ATL BAL BUF CAR CHI CIN CLE DAL DEN DET GB HOU IND JAX KC "
+             "LAC LAR LV MIA MIN NE NO NYG NYJ PHI PIT SEA SF TB TEN WAS").split()
+LINEUP = ["QB", "RB", "RB", "WR", "WR", "WR", "TE", "FLEX", "FLEX"]
+ORDINAL = {1: "1st", 2: "2nd", 3: "3rd", 4: "4th"}
+CHUNK = 20   # leagues per fact batch — bounds memory at any league count
+
+
+def last_season(end: date) -> int:
+    """The last completed NFL season at `end` (a season ends in February)."""
+    return end.year - 1 if end.month < 9 else end.year
+
+
+def week_calendar(season: int) -> list[tuple[int, int, str, str]]:
+    """(season, week, first_game_date, last_game_date): Thursday kickoff after
+    Labor Day, Thursday-to-Monday weeks, 17 weeks through 2020 and 18 after."""
+    sep1 = date(season, 9, 1)
+    kickoff = sep1 + timedelta(days=(0 - sep1.weekday()) % 7 + 3)
+    return [(season, w, str(kickoff + timedelta(weeks=w - 1)), str(kickoff + timedelta(weeks=w - 1, days=4)))
+            for w in range(1, (17 if season <= 2020 else 18) + 1)]
+
+
+def _insert(con: sqlite3.Connection, table: str, df: pd.DataFrame) -> int:
+    if df.empty:
+        return 0
+    rows = df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+    con.executemany(f"INSERT INTO {table} ({', '.join(df.columns)}) VALUES ({', '.join('?' * df.shape[1])})",
+                    rows)
+    return len(df)
+
+
+# --------------------------------------------------------------------------- #
+# Players: one pool shared by every league
+# --------------------------------------------------------------------------- #
+
+def player_pool(scale: Scale, rng: np.random.Generator) -> pd.DataFrame:
+    n, end = scale.players, date.fromisoformat(scale.end)
+    last = last_season(end)
+    pos = rng.choice(POSITIONS, n, p=POSITION_MIX)
+    draft_year = rng.integers(last - 14, last + 2, n)   # last + 1 = incoming rookies
+    age = np.clip(21 + (end.year - draft_year) + rng.integers(-1, 2, n), 20, 40)
+    talent = np.array([BASE_PPG[p] for p in pos]) * np.exp(rng.normal(0, 0.45, n))
+    score = talent * np.clip(1 + 0.04 * (27 - age), 0.3, 1.4)
+    v1 = np.round(10000 * (score / score.max()) ** 1.5)
+    v1[pos == "K"] = np.round(v1[pos == "K"] * 0.05)
+    v2 = np.minimum(np.round(v1 * np.where(pos == "QB", 1.6, 1.0)), 10000)
+    ids = (1000 + np.arange(n)).astype(str)
+    df = pd.DataFrame({
+        "player_id": ids,
+        "player_name": [f"Player {i}" for i in ids],
+        "position": pos,
+        "age": age,
+        "nfl_team": rng.choice(NFL_TEAMS, n),
+        "years_exp": np.maximum(end.year - draft_year - 1, 0),
+        "is_rookie": draft_year > last,
+        "draft_year": draft_year,
+        "career": rng.integers(3, 15, n),
+        "talent": talent,
+        "value_1qb": v1,
+        "value_2qb": v2,
+        "ecr_2qb": pd.Series(v2).rank(ascending=False, method="first").to_numpy(),
+        "fc_missing": rng.random(n) < 0.05,   # FantasyCalc does not price everyone
+        "fp_id": (10000 + np.arange(n)).astype(str),
+    })
+    return df
+
+
+def season_talent(pool: pd.DataFrame, seasons: list[int], rng: np.random.Generator) -> np.ndarray:
+    """(season, player) talent: a multiplicative random walk from the pool's
+    baseline, NaN where the player was not in the league that season."""
+    walk = np.exp(np.cumsum(rng.normal(0, 0.18, (len(seasons), len(pool))), axis=0))
+    t = pool["talent"].to_numpy() * walk
+    yrs = np.array(seasons)[:, None]
+    dy, career = pool["draft_year"].to_numpy(), pool["career"].to_numpy()
+    t[(yrs < dy) | (yrs >= dy + career)] = np.nan
+    return t
+
+
+def write_players(con: sqlite3.Connection, pool: pd.DataFrame, end: date) -> None:
+    dim = pool[etl.PLAYER_HASH_COLS].copy()
+    dim.insert(0, "player_id", pool["player_id"])
+    dim["content_hash"] = etl.content_hash(dim, etl.PLAYER_HASH_COLS)
+    dim["last_changed_at"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    _insert(con, "dim_players", dim)
+    birth = [str(end - timedelta(days=int(a * 365.25))) for a in pool["age"]]
+    _insert(con, "id_crosswalk", pd.DataFrame({
+        "sleeper_id": pool["player_id"], "gsis_id": "00-00" + pool["player_id"],
+        "fp_id": pool["fp_id"], "merge_name": "player" + pool["player_id"],
+        "position": pool["position"], "birthdate": birth}))
+
+
+# --------------------------------------------------------------------------- #
+# Leagues: dims, snapshot calendar and the SCD roster value fact
+# --------------------------------------------------------------------------- #
+
+def league_meta(i: int, scale: Scale, rng: np.random.Generator) -> dict:
+    """A Sleeper-shaped league run through etl_pipeline.parse_league_settings,
+    so dim_leagues is exactly what the ETL would write."""
+    superflex = i % 2 == 0
+    rp = LINEUP + (["SUPER_FLEX"] if superflex else [])
+    rp += ["BN"] * max(scale.roster - len(rp), 0)
+    scoring = {"pass_td": 4.0, "pass_yd": 0.04, "rush_yd": 0.1, "rush_td": 6.0, "rec_yd": 0.1, "rec_td": 6.0,
+               "rec": float(rng.choice([1.0, 1.0, 0.5])), "bonus_rec_te": float(rng.choice([0.0, 0.0, 0.5]))}
+    return etl.parse_league_settings({
+        "league_id": str(900_000_000_000_000_000 + i), "name": f"Synthetic League {i:04d}",
+        "season": str(date.fromisoformat(scale.end).year), "total_rosters": scale.teams,
+        "roster_positions": rp, "scoring_settings": scoring, "status": "in_season"})
+
+
+def scoring_multiplier(meta: dict) -> dict[str, float]:
+    """Position -> points multiplier of a league's settings over the pool's
+    baseline (reception scoring and TE premium)."""
+    rec = 1 + 0.12 * (meta["ppr"] - 0.5)
+    return {"QB": 1.0, "RB": rec, "WR": rec, "TE": rec + 0.15 * meta["te_premium_value"], "K": 1.0}
+
+
+def write_league_dims(con: sqlite3.Connection, metas: list[dict], scale: Scale) -> None:
+    _insert(con, "dim_leagues", pd.DataFrame(metas))
+    rid = np.arange(1, scale.teams + 1)
+    for m in metas:
+        lid, i = m["league_id"], int(m["league_id"]) - 900_000_000_000_000_000
+        _insert(con, "dim_managers", pd.DataFrame({
+            "roster_id": rid, "league_id": lid,
+            "sleeper_user_id": [str(700_000_000_000_000_000 + i * 100 + r) for r in rid],
+            "sleeper_username": [f"user_{i}_{r}" for r in rid],
+            "owner_name": [f"Owner {i}.{r}" for r in rid]}))
+        first = int(m["season"])
+        picks = [(y, rnd, r) for y in range(first, first + 3) for rnd in range(1, 5) for r in rid]
+        v = np.array([8000 / rnd ** 1.6 for _, rnd, _ in picks])
+        _insert(con, "dim_draft_picks", pd.DataFrame({
+            "pick_id": [f"{y}-R{rnd}-orig{r}-{lid}" for y, rnd, r in picks], "league_id": lid,
+            "year": [str(y) for y, _, _ in picks], "round": [rnd for _, rnd, _ in picks],
+            "original_owner_id": [r for _, _, r in picks], "current_owner_id": [r for _, _, r in picks],
+            "previous_owner_id": None, "pick_value_1qb": np.round(v * 0.8), "pick_value_2qb": np.round(v),
+            "pick_value_tier": [f"{y} {ORDINAL[rnd]}" for y, rnd, _ in picks]}))
+
+
+def roster_fact(metas: list[dict], pool: pd.DataFrame, dates: list[str], scale: Scale,
+                rng: np.random.Generator) -> pd.DataFrame:
+    """SCD rows for a batch of leagues. Ownership is fixed over the window;
+    each slot's values move on a Binomial(days - 1, churn) set of days, and
+    every move closes the previous row (valid_to = the move's date)."""
+    n_days, slots = len(dates), scale.teams * scale.roster
+    weight = pool["value_2qb"].to_numpy() + 50
+    frames = []
+    for m in metas:
+        players = rng.choice(len(pool), slots, replace=False, p=weight / weight.sum())
+        moves = rng.binomial(n_days - 1, scale.churn, slots)
+        keys = np.unique(np.concatenate([
+            np.arange(slots) * n_days,
+            np.repeat(np.arange(slots), moves) * n_days + rng.integers(1, n_days, moves.sum())]))
+        slot, day = keys // n_days, keys % n_days
+        last = np.r_[slot[1:] != slot[:-1], True]
+        to_day = np.where(last, -1, np.r_[day[1:], 0])
+        p = pool.iloc[players[slot]]
+        drift = np.exp(rng.normal(0, 0.06, len(keys)))
+        fc_drift = drift * np.exp(rng.normal(0, 0.1, len(keys)))
+        fc_null = p["fc_missing"].to_numpy()
+        d = np.array(dates, dtype=object)
+        frames.append(pd.DataFrame({
+            "league_id": m["league_id"],
+            "roster_id": slot // scale.roster + 1,
+            "player_id": p["player_id"].to_numpy(),
+            "valid_from": d[day],
+            "valid_to": np.where(to_day < 0, None, d[to_day]),
+            "fp_value_1qb": np.round(p["value_1qb"].to_numpy() * drift),
+            "fp_value_2qb": np.round(p["value_2qb"].to_numpy() * drift),
+            "fp_ecr_2qb": np.round(p["ecr_2qb"].to_numpy() / drift, 1),
+            "fc_value_1qb": np.where(fc_null, np.nan, np.round(p["value_1qb"].to_numpy() * fc_drift)),
+            "fc_value_2qb": np.where(fc_null, np.nan, np.round(p["value_2qb"].to_numpy() * fc_drift)),
+            "sleeper_adp_value": np.where(fc_null, np.nan, np.round(p["ecr_2qb"].to_numpy() / fc_drift, 1)),
+            "fc_trend_30day": np.where(fc_null, np.nan, np.round(rng.normal(0, 150, len(keys)))),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+# --------------------------------------------------------------------------- #
+# History: DP archive, week calendar, outcomes, FC snapshots, production
+# --------------------------------------------------------------------------- #
+
+def dp_history(con: sqlite3.Connection, pool: pd.DataFrame, talent: np.ndarray, seasons: list[int],
+               scale: Scale, rng: np.random.Generator) -> int:
+    """Weekly ECR snapshots. A snapshot ranks the players in the league for
+    its upcoming season (talent of that season, noised) — so ranks carry the
+    signal the B1 curve is trained on."""
+    end = date.fromisoformat(scale.end)
+    weeks = scale.dp_weeks
+    if weeks is None:
+        weeks = (end - date(seasons[0], 4, 1)).days // 7 + 1
+    pos = pool["position"].to_numpy()
+    n = 0
+    for k in range(weeks - 1, -1, -1):
+        kd = end - timedelta(weeks=k)
+        s = kd.year if kd.month >= 3 else kd.year - 1
+        t = talent[min(max(s - seasons[0], 0), len(seasons) - 1)]
+        age = pool["age"].to_numpy() - (end - kd).days / 365.25
+        score = np.where(np.isnan(t), pool["talent"].to_numpy() * 0.6, t) * np.exp(rng.normal(0, 0.15, len(t)))
+        score *= np.clip(1 + 0.04 * (27 - age), 0.3, 1.4)
+        listed = (pool["draft_year"].to_numpy() <= s + 1) & (pool["draft_year"] + pool["career"] > s).to_numpy()
+        df = pool.loc[listed, ["fp_id", "player_id", "player_name", "position", "nfl_team", "draft_year"]].copy()
+        df["score"], df["age"] = score[listed], np.round(age[listed], 1)
+        sf = df["score"] * np.where(pos[listed] == "QB", 1.6, 1.0)
+        df["ecr_1qb"] = df["score"].rank(ascending=False, method="first")
+        df["ecr_2qb"] = sf.rank(ascending=False, method="first")
+        df["ecr_pos"] = df.groupby("position")["score"].rank(ascending=False, method="first")
+        sha = hashlib.sha1(str(kd).encode()).hexdigest()
+        n += _insert(con, "dp_values_history", pd.DataFrame({
+            "knowledge_date": str(kd), "player_key": df["fp_id"], "commit_sha": sha, "fp_id": df["fp_id"],
+            "merge_name": "player" + df["player_id"], "sleeper_id": df["player_id"], "player": df["player_name"],
+            "pos": df["position"], "team": df["nfl_team"], "age": df["age"], "draft_year": df["draft_year"],
+            "ecr_1qb": df["ecr_1qb"], "ecr_2qb": df["ecr_2qb"], "ecr_pos": df["ecr_pos"],
+            "value_1qb": np.round(10500 * np.exp(-0.0235 * (df["ecr_1qb"] - 1))),
+            "value_2qb": np.round(10500 * np.exp(-0.0235 * (df["ecr_2qb"] - 1)))}))
+        con.execute("INSERT INTO dp_load_manifest VALUES (?, ?)", (sha, str(kd)))
+    return n
+
+
+def weekly_points(pool: pd.DataFrame, talent: np.ndarray, seasons: list[int],
+                  rng: np.random.Generator) -> pd.DataFrame:
+    """Baseline (sleeper_id, season, week, pts) before league scoring: draws
+    around the season's talent for the weeks a player suited up."""
+    frames = []
+    fantasy = pool["position"].isin(["QB", "RB", "WR", "TE"]).to_numpy()
+    for si, s in enumerate(seasons):
+        t = talent[si]
+        idx = np.flatnonzero(~np.isnan(t) & fantasy)
+        weeks = len(week_calendar(s))
+        played = rng.random((weeks, len(idx))) < 0.85
+        pts = np.clip(rng.normal(t[idx], 0.45 * t[idx], (weeks, len(idx))), 0, None)
+        w, j = np.nonzero(played)
+        frames.append(pd.DataFrame({"sleeper_id": pool["player_id"].to_numpy()[idx[j]], "season": s,
+                                    "week": w + 1, "pts": pts[w, j]}))
+    return pd.concat(frames, ignore_index=True)
+
+
+def write_outcomes(con: sqlite3.Connection, metas: list[dict], weekly: pd.DataFrame,
+                   pool: pd.DataFrame) -> int:
+    pos = weekly["sleeper_id"].map(pool.set_index("player_id")["position"])
+    n = 0
+    for i, m in enumerate(metas):
+        mult = pos.map(scoring_multiplier(m))
+        n += _insert(con, "outcomes", pd.DataFrame({
+            "league_id": m["league_id"], "sleeper_id": weekly["sleeper_id"], "season": weekly["season"],
+            "week": weekly["week"], "pts": (weekly["pts"] * mult).round(2), "active": 1}))
+        con.execute("INSERT INTO outcomes_provenance VALUES (?,?,?,?,?,?,?,datetime('now'))",
+                    (m["league_id"], m["league_name"], int(i == 0), 0, int(m["season"]),
+                     m["scoring_settings_json"], "[]"))
+    return n
+
+
+def write_production(con: sqlite3.Connection, metas: list[dict], weekly: pd.DataFrame,
+                     pool: pd.DataFrame, season: int) -> int:
+    """player_production_value for `season`, per league, with points_model's
+    replacement rule (MIN_GAMES qualifier, teams x starters rank)."""
+    base = (weekly[weekly["season"] == season].groupby("sleeper_id")
+            .agg(games=("week", "nunique"), ppg=("pts", "mean")).reset_index()
+            .merge(pool[["player_id", "position"]], left_on="sleeper_id", right_on="player_id"))
+    n = 0
+    for m in metas:
+        df = base.assign(ppg=base["ppg"] * base["position"].map(scoring_multiplier(m)))
+        starters = starters_per_position(json.loads(m["roster_positions_json"]))
+        df["replacement_ppg"] = 0.0
+        for p, g in df.groupby("position"):
+            q = g.loc[g["games"] >= MIN_GAMES, "ppg"].sort_values(ascending=False).to_numpy()
+            rank = max(1, round(m["number_of_teams"] * starters.get(p, 0)))
+            df.loc[g.index, "replacement_ppg"] = float(q[min(rank, len(q)) - 1]) if len(q) else 0.0
+        df["vorp"] = (df["ppg"] - df["replacement_ppg"]).clip(lower=0)
+        top = df["vorp"].max()
+        df["vbd_value"] = (df["vorp"] / top * 10000).round(0) if top else 0
+        df[["ppg", "replacement_ppg", "vorp"]] = df[["ppg", "replacement_ppg", "vorp"]].round(2)
+        n += _insert(con, "player_production_value", df.assign(season=season, league_id=m["league_id"])[[
+            "season", "league_id", "player_id", "position", "games", "ppg", "replacement_ppg", "vorp",
+            "vbd_value"]])
+    return n
+
+
+def write_fc(con: sqlite3.Connection, metas: list[dict], pool: pd.DataFrame, dates: list[str],
+             rng: np.random.Generator) -> None:
+    """fc_market_values (latest pull per league setting) and weekly
+    fc_values_snapshots over the snapshot window."""
+    priced = pool[~pool["fc_missing"]]
+    for q, t, ppr in pull_matrix(metas):
+        v = priced["value_2qb" if q == 2 else "value_1qb"] * np.exp(rng.normal(0, 0.1, len(priced)))
+        _insert(con, FC_TABLE, pd.DataFrame({
+            "num_qbs": q, "num_teams": t, "ppr": ppr, "asset_key": priced["player_id"],
+            "sleeper_id": priced["player_id"], "fc_name": priced["player_name"], "position": priced["position"],
+            "fc_value": v.round(), "fc_trend_30day": np.round(rng.normal(0, 150, len(priced))),
+            "fc_adp": priced["ecr_2qb"], "pulled_on": dates[-1]}))
+    q, t, ppr = fc_settings(metas[0])
+    for kd in dates[::-7]:
+        _insert(con, "fc_values_snapshots", pd.DataFrame({
+            "knowledge_date": kd, "sleeper_id": priced["player_id"],
+            "fc_value": (priced["value_2qb"] * np.exp(rng.normal(0, 0.1, len(priced)))).round(),
+            "fc_trend_30day": np.round(rng.normal(0, 150, len(priced))),
+            "num_qbs": q, "num_teams": t, "ppr": ppr}))
+
+
+# --------------------------------------------------------------------------- #
+# Build
+# --------------------------------------------------------------------------- #
+
+def generate(path: Path, scale: Scale) -> dict[str, int]:
+    """Write the warehouse for `scale` to `path` (which must not exist) and
+    return its row count per table."""
+    if scale.teams * scale.roster > scale.players:
+        raise ValueError(f"{scale.teams} x {scale.roster} rostered players need a pool of at least "
+                         f"{scale.teams * scale.roster} (players={scale.players})")
+    rng = np.random.default_rng(scale.seed)
+    end = date.fromisoformat(scale.end)
+    dates = [str(end - timedelta(days=k)) for k in range(scale.days - 1, -1, -1)]
+    seasons = list(range(last_season(end) - scale.seasons + 1, last_season(end) + 1))
+
+    engine = create_engine(f"sqlite:///{path.as_posix()}")
+    etl.prepare_schema(engine)
+    engine.dispose()
+    con = sqlite3.connect(path)
+    con.execute("PRAGMA journal_mode = OFF")    # a scratch build: all or nothing anyway
+    con.execute("PRAGMA synchronous = OFF")
+    for ddl in (FC_DDL, DP_DDL, OUTCOMES_DDL, PRODUCTION_DDL, PRODUCTION_INDEX):
+        con.executescript(ddl)
+
+    with stage("players", con=con):
+        pool = player_pool(scale, rng)
+        talent = season_talent(pool, seasons, rng)
+        write_players(con, pool, end)
+    with stage("leagues", con=con) as st:
+        metas = [league_meta(i, scale, rng) for i in range(scale.leagues)]
+        write_league_dims(con, metas, scale)
+        for b in range(0, len(metas), CHUNK):
+            batch = metas[b:b + CHUNK]
+            _insert(con, "fact_snapshot_calendar", pd.DataFrame(
+                [(m["league_id"], d) for m in batch for d in dates], columns=["league_id", "snapshot_date"]))
+            _insert(con, etl.FACT_TABLE, roster_fact(batch, pool, dates, scale, rng))
+            con.commit()
+        st.rows_read = len(metas)
+    with stage("dp_history", con=con):
+        dp_history(con, pool, talent, seasons, scale, rng)
+        write_fc(con, metas, pool, dates, rng)
+        con.commit()
+    with stage("outcomes", con=con):
+        con.executemany("INSERT INTO nfl_week_calendar VALUES (?,?,?,?)",
+                        [row for s in seasons for row in week_calendar(s)])
+        weekly = weekly_points(pool, talent, seasons, rng)
+        write_outcomes(con, metas[:scale.scored_leagues], weekly, pool)
+        con.commit()
+    with stage("production", con=con):
+        write_production(con, metas, weekly, pool, seasons[-1])
+        con.commit()
+    con.execute("PRAGMA journal_mode = DELETE")
+    con.close()
+
+    engine = create_engine(f"sqlite:///{path.as_posix()}")
+    with stage("current_tables"), engine.begin() as conn:
+        conn.execute(text(VALUE_VIEW))
+        refresh_current_tables(conn)
+    with engine.connect() as conn:
+        tables = [r[0] for r in conn.execute(text(
+            "SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY name"))]
+        counts = {t: conn.execute(text(f'SELECT COUNT(*) FROM "{t}"')).scalar_one() for t in tables}
+    engine.dispose()
+    return counts
+
+
+@instrumented("synth_warehouse")
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Build a synthetic warehouse of a given size")
+    ap.add_argument("--out", type=Path, required=True, help="database file to create")
+    ap.add_argument("--scale", choices=list(SCALES), help="start from a preset (flags below override it)")
+    for f in Scale.__dataclass_fields__.values():
+        kind = {"float": float, "str": str}.get(f.type, int)
+        ap.add_argument(f"--{f.name.replace('_', '-')}", type=kind, default=None, help=f"default {f.default}")
+    ap.add_argument("--force", action="store_true", help="replace --out if it exists")
+    ap.add_argument("--json", help="also write the scale and row counts here")
+    args = ap.parse_args()
+    scale = SCALES[args.scale] if args.scale else Scale()
+    scale = replace(scale, **{k: v for k, v in vars(args).items()
+                              if k in Scale.__dataclass_fields__ and v is not None})
+    if args.out.exists():
+        if not args.force:
+            print(f"{args.out} exists; pass --force to replace it")
+            return 1
+        args.out.unlink()
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+
+    t0 = time.perf_counter()
+    counts = generate(args.out, scale)
+    secs = time.perf_counter() - t0
+    mb = args.out.stat().st_size / 1e6
+    print(f"{args.out}: {mb:,.1f} MB in {secs:.1f} s  ({', '.join(f'{k}={v}' for k, v in asdict(scale).items())})")
+    for t, n in counts.items():
+        print(f"  {t:<32} {n:>12,}")
+    if args.json:
+        Path(args.json).write_text(json.dumps({"scale": asdict(scale), "seconds": round(secs, 2),
+                                               "db_mb": round(mb, 1), "rows": counts}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,370 @@
+"""
+warehouse_keys.py — integer surrogate keys + WITHOUT ROWID for the big facts.
+
+outcomes, predictions and dp_values_history key on repeated TEXT: 18-digit
+league_ids, sleeper_ids, ISO dates. Every row stores them in full, every
+index stores them again, and every join compares strings. This migration
+rewrites each of them into a `<table>_k` twin that carries integers instead:
+
+  league / player ids -> dictionary keys: key_league(league_key, league_id),
+                         key_player(player_key, player_id). Stable once
+                         assigned, so keys never need rewriting.
+  ISO dates           -> day number (days since 1970-01-01). A dictionary
+                         would work too, but a computed day number needs no
+                         join to decode and still orders and range-compares
+                         correctly.
+
+The encoded columns keep their original names in `<table>_k` (their type
+becomes INTEGER), so the original index definitions carry over. An index
+that leads with a date column is rebuilt on the decoded expression instead,
+so `knowledge_date = (SELECT MAX(...))` through the view stays an index
+seek. The `_k` tables are WITHOUT ROWID: the rows live in the primary-key
+b-tree, with no separate rowid table and PK index.
+
+The original name becomes a VIEW that decodes back to the exact original
+columns and order, so every reader (the feature builders, backtests, the
+model-lab export) is untouched. Dictionary columns that cannot be NULL decode
+through an inner join, which lets the planner turn `WHERE league_id = ?` into
+a key lookup plus an integer index seek. INSTEAD OF INSERT/UPDATE/DELETE
+triggers keep the writers working: inserts assign any new dictionary keys and
+INSERT into `_k` under the writer's own conflict policy (plain INSERT still
+raises on a duplicate key, INSERT OR REPLACE still replaces); deletes and
+updates locate the `_k` row by its encoded primary key. Re-running refreshes
+the triggers of tables already migrated. The DDL runners skip CREATE INDEX on a view (SQLite
+rejects it even with IF NOT EXISTS; the index already lives on `_k`).
+
+The roster value fact is deliberately not migrated. etl_pipeline already
+stores it change-only (fact_roster_value_scd + fact_snapshot_calendar, a few
+hundred KB), and the API reads its daily expansion: decoding ids and dates on
+every expanded row measured 35-90% slower on the Analytics queries for a
+saving of well under a megabyte. Its queries stay in --bench as a control.
+
+Each table is copied, checked row-for-row against the original through the
+decoding SELECT, and swapped in one transaction; a mismatch rolls everything
+back. Tables already migrated or absent are skipped, so re-running is safe.
+
+Usage:
+    python warehouse_keys.py --db data/dynasty.db            # migrate in place
+    python warehouse_keys.py --db data/dynasty.db --out /tmp/k.db --bench 5
+--out migrates a copy. --bench N times the heaviest API and feature-builder
+queries N times on the database before and after (best run), alongside the
+file sizes.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import shutil
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+KEY_DDL = """
+CREATE TABLE IF NOT EXISTS key_league (
+    league_key INTEGER PRIMARY KEY,
+    league_id  TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS key_player (
+    player_key INTEGER PRIMARY KEY,
+    player_id  TEXT NOT NULL UNIQUE
+);
+"""
+
+# column -> encoding, per fact.
+SPEC: dict[str, dict[str, str]] = {
+    "outcomes": {"league_id": "league", "sleeper_id": "player"},
+    "predictions": {"as_of": "date", "sleeper_id": "player"},
+    "dp_values_history": {"knowledge_date": "date", "sleeper_id": "player"},
+}
+DICTS = {"league": ("key_league", "league_key", "league_id"),
+         "player": ("key_player", "player_key", "player_id")}
+
+# The API's heaviest reads (Analytics.js) plus the feature builders' scans.
+# :league is the league with the most fact rows; :outcomes_league/:season the
+# latest season of one outcomes league, as build_features asks for it.
+BENCH_QUERIES = {
+    "diagnostics": """
+        WITH rp AS (
+          SELECT league_id, roster_id, fp_market_value AS v FROM v_player_market
+          WHERE snapshot_date = (SELECT MAX(snapshot_date) FROM v_player_market)
+            AND league_id = :league AND fp_market_value IS NOT NULL),
+        rt AS (SELECT league_id, roster_id, SUM(v) AS team_value, COUNT(*) AS n_assets
+               FROM rp GROUP BY league_id, roster_id)
+        SELECT rt.roster_id, rt.team_value,
+               PERCENT_RANK() OVER (PARTITION BY rt.league_id ORDER BY rt.team_value) AS pct
+        FROM rt""",
+    "arbitrage": """
+        SELECT player_name, position, fp_market_value, fc_market_value, arb_delta_fp_minus_fc
+        FROM v_player_market
+        WHERE snapshot_date = (SELECT MAX(snapshot_date) FROM v_player_market)
+          AND league_id = :league AND fp_market_value IS NOT NULL AND fc_market_value IS NOT NULL
+        ORDER BY ABS(arb_delta_fp_minus_fc) DESC LIMIT 25""",
+    "roster_assets": """
+        SELECT * FROM v_roster_assets
+        WHERE league_id = :league
+          AND snapshot_date = (SELECT MAX(snapshot_date) FROM v_roster_assets WHERE league_id = :league)""",
+    "value_history": """
+        SELECT snapshot_date, SUM(fp_market_value) FROM v_player_market
+        WHERE league_id = :league GROUP BY snapshot_date""",
+    "outcomes_league_season": """
+        SELECT sleeper_id, SUM(pts) FROM outcomes
+        WHERE league_id = :outcomes_league AND season = :season
+        GROUP BY sleeper_id""",
+    "dp_latest_snapshot": """
+        SELECT sleeper_id, ecr_2qb FROM dp_values_history
+        WHERE knowledge_date = (SELECT MAX(knowledge_date) FROM dp_values_history
+                                WHERE knowledge_date <= date('now'))
+          AND sleeper_id IS NOT NULL""",
+}
+
+
+# --------------------------------------------------------------------------- #
+# DDL helpers shared with the other scripts
+# --------------------------------------------------------------------------- #
+
+def _is_view(con: sqlite3.Connection, name: str) -> bool:
+    return con.execute("SELECT 1 FROM sqlite_master WHERE type = 'view' AND name = ?",
+                       (name,)).fetchone() is not None
+
+
+def executescript(con: sqlite3.Connection, ddl: str) -> None:
+    """con.executescript(ddl), except CREATE INDEX on a table this migration
+    turned into a view (SQLite rejects it even with IF NOT EXISTS; the index
+    already exists on the `_k` table)."""
+    stmt = ""
+    for line in ddl.splitlines(keepends=True):
+        stmt += line
+        if not sqlite3.complete_statement(stmt):
+            continue
+        m = re.match(r"\s*(?:--[^\n]*\n\s*)*CREATE\s+(?:UNIQUE\s+)?INDEX\b.*?\bON\s+(\w+)",
+                     stmt, re.I | re.S)
+        if not (m and _is_view(con, m.group(1))):
+            con.executescript(stmt)
+        stmt = ""
+    if stmt.strip():
+        con.executescript(stmt)
+
+
+# --------------------------------------------------------------------------- #
+# Migration
+# --------------------------------------------------------------------------- #
+
+def _enc(col: str, kind: str | None, src: str) -> str:
+    """SQL encoding `src` (a column ref like NEW.x) for column `col`."""
+    if kind == "date":
+        return f"CAST(julianday({src}) - 2440587.5 AS INTEGER)"
+    if kind in DICTS:
+        table, key, natural = DICTS[kind]
+        return f"(SELECT {key} FROM {table} WHERE {natural} = {src})"
+    return src
+
+
+def _dec(col: str, kind: str | None, alias: str) -> str:
+    if kind == "date":
+        return f"date({alias}.{col} * 86400, 'unixepoch') AS {col}"
+    if kind in DICTS:
+        return f"d_{col}.{DICTS[kind][2]} AS {col}"
+    return f"{alias}.{col}"
+
+
+def decoding_select(cols: list[str], spec: dict[str, str], src: str,
+                    not_null: set[str]) -> str:
+    joins = "".join(
+        f" {'' if c in not_null else 'LEFT '}JOIN {DICTS[kind][0]} d_{c} "
+        f"ON d_{c}.{DICTS[kind][1]} = k.{c}"
+        for c, kind in spec.items() if kind in DICTS)
+    return f"SELECT {', '.join(_dec(c, spec.get(c), 'k') for c in cols)} FROM {src} k{joins}"
+
+
+def migrate_table(con: sqlite3.Connection, table: str, spec: dict[str, str]) -> dict | None:
+    """Copy `table` into `<table>_k`, verify, swap in the view + triggers.
+    Runs inside the caller's transaction."""
+    kt = f"{table}_k"
+    if _is_view(con, table) or not con.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone():
+        return None
+    info = con.execute(f"PRAGMA table_info({table})").fetchall()   # cid, name, type, notnull, dflt, pk
+    cols = [r[1] for r in info]
+    pk = [r[1] for r in sorted((r for r in info if r[5]), key=lambda r: r[5])]
+    defaults = {r[1]: r[4] for r in info if r[4] is not None}
+    not_null = {r[1] for r in info if r[3]} | set(pk)   # WITHOUT ROWID PKs are NOT NULL
+    indexes = [(name, [c[2] for c in con.execute(f"PRAGMA index_info({name})")], unique)
+               for _, name, unique, origin, _ in con.execute(f"PRAGMA index_list({table})")
+               if origin == "c"]
+    rows = con.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    coldefs = []
+    for _, name, typ, notnull, dflt, _ in info:
+        typ = "INTEGER" if name in spec else typ
+        coldefs.append(f"{name} {typ}".strip() + (" NOT NULL" if notnull else "")
+                       + (f" DEFAULT {dflt}" if dflt is not None else ""))
+    con.execute(f"CREATE TABLE {kt} ({', '.join(coldefs)}, PRIMARY KEY ({', '.join(pk)})) WITHOUT ROWID")
+    for c, kind in spec.items():
+        if kind in DICTS:
+            dt, _, natural = DICTS[kind]
+            con.execute(f"INSERT OR IGNORE INTO {dt} ({natural}) "
+                        f"SELECT DISTINCT {c} FROM {table} WHERE {c} IS NOT NULL ORDER BY {c}")
+    enc_cols = ", ".join(_enc(c, spec.get(c), f"t.{c}") for c in cols)
+    con.execute(f"INSERT INTO {kt} ({', '.join(cols)}) SELECT {enc_cols} FROM {table} t")
+
+    # Lossless or nothing: the decoded copy must equal the original both ways.
+    dec = decoding_select(cols, spec, kt, not_null)
+    plain = f"SELECT {', '.join(cols)} FROM {table}"
+    diff = con.execute(f"SELECT (SELECT COUNT(*) FROM ({plain} EXCEPT {dec})) + "
+                       f"(SELECT COUNT(*) FROM ({dec} EXCEPT {plain}))").fetchone()[0]
+    if diff or con.execute(f"SELECT COUNT(*) FROM {kt}").fetchone()[0] != rows:
+        raise RuntimeError(f"{table}: encoded copy differs from the original in {diff} row(s); "
+                           f"check for non-ISO dates")
+
+    con.execute(f"DROP TABLE {table}")
+    for name, icols, unique in indexes:
+        if spec.get(icols[0]) == "date":   # readers compare the decoded text
+            icols = [f"date({icols[0]} * 86400, 'unixepoch')", *icols[1:]]
+        con.execute(f"CREATE {'UNIQUE ' if unique else ''}INDEX {name} ON {kt} ({', '.join(icols)})")
+    con.execute(f"CREATE VIEW {table} AS {dec}")
+    create_triggers(con, table, spec)
+    return {"table": table, "rows": rows, "indexes": len(indexes)}
+
+
+def create_triggers(con: sqlite3.Connection, table: str, spec: dict[str, str]) -> None:
+    """(Re)create the INSTEAD OF triggers that route writes on the `table`
+    view into `<table>_k`.
+
+    The insert is a plain INSERT, so a duplicate key still raises
+    IntegrityError and INSERT OR REPLACE on the view still replaces: the
+    outer statement's conflict policy overrides the ones inside a trigger.
+    For the same reason new dictionary keys are added with NOT EXISTS, not
+    OR IGNORE, which an outer OR REPLACE would turn into a delete and
+    re-insert of the dictionary row under a new key. UPDATE is a delete
+    plus that insert."""
+    kt = f"{table}_k"
+    info = con.execute(f"PRAGMA table_info({kt})").fetchall()
+    cols = [r[1] for r in info]
+    pk = [r[1] for r in sorted((r for r in info if r[5]), key=lambda r: r[5])]
+    defaults = {r[1]: r[4] for r in info if r[4] is not None}
+
+    def new_val(c: str) -> str:
+        src = f"COALESCE(NEW.{c}, {defaults[c]})" if c in defaults else f"NEW.{c}"
+        return _enc(c, spec.get(c), src)
+
+    assign = "".join(
+        f"INSERT INTO {DICTS[k][0]} ({DICTS[k][2]}) SELECT NEW.{c} WHERE NEW.{c} IS NOT NULL "
+        f"AND NOT EXISTS (SELECT 1 FROM {DICTS[k][0]} WHERE {DICTS[k][2]} = NEW.{c});\n"
+        for c, k in spec.items() if k in DICTS)
+    insert = (f"INSERT INTO {kt} ({', '.join(cols)}) "
+              f"VALUES ({', '.join(new_val(c) for c in cols)});\n")
+    where_old = " AND ".join(f"{c} = {_enc(c, spec.get(c), f'OLD.{c}')}" for c in pk)
+    for op in ("ins", "del", "upd"):
+        con.execute(f"DROP TRIGGER IF EXISTS {table}_{op}")
+    con.execute(f"CREATE TRIGGER {table}_ins INSTEAD OF INSERT ON {table} BEGIN\n{assign}{insert}END")
+    con.execute(f"CREATE TRIGGER {table}_del INSTEAD OF DELETE ON {table} BEGIN\n"
+                f"DELETE FROM {kt} WHERE {where_old};\nEND")
+    con.execute(f"CREATE TRIGGER {table}_upd INSTEAD OF UPDATE ON {table} BEGIN\n"
+                f"DELETE FROM {kt} WHERE {where_old};\n{assign}{insert}END")
+
+
+def migrate(con: sqlite3.Connection) -> list[dict]:
+    con.isolation_level = None
+    con.execute("BEGIN IMMEDIATE")
+    try:
+        for stmt in filter(None, (s.strip() for s in KEY_DDL.split(";"))):
+            con.execute(stmt)
+        done = [r for r in (migrate_table(con, t, spec) for t, spec in SPEC.items()) if r]
+        for t, spec in SPEC.items():   # tables migrated by an earlier version get current triggers
+            if _is_view(con, t) and t not in {r["table"] for r in done}:
+                create_triggers(con, t, spec)
+        con.execute("COMMIT")
+    except BaseException:
+        con.execute("ROLLBACK")
+        raise
+    return done
+
+
+# --------------------------------------------------------------------------- #
+# Before/after numbers
+# --------------------------------------------------------------------------- #
+
+def file_mb(con: sqlite3.Connection, path: Path) -> float:
+    con.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    return path.stat().st_size / 1e6
+
+
+def bench(con: sqlite3.Connection, repeats: int) -> dict[str, float | None]:
+    row = None
+    if con.execute("SELECT 1 FROM sqlite_master WHERE name = 'fact_roster_historical_value'").fetchone():
+        row = con.execute("SELECT league_id FROM fact_roster_historical_value "
+                          "GROUP BY league_id ORDER BY COUNT(*) DESC LIMIT 1").fetchone()
+    params = {"league": row[0] if row else None, "outcomes_league": None, "season": None}
+    try:
+        params.update(zip(("outcomes_league", "season"), con.execute(
+            "SELECT league_id, MAX(season) FROM outcomes GROUP BY league_id LIMIT 1").fetchone() or ()))
+    except sqlite3.OperationalError:
+        pass
+    out: dict[str, float | None] = {}
+    for name, sql in BENCH_QUERIES.items():
+        best = None
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            try:
+                con.execute(sql, params).fetchall()
+            except sqlite3.OperationalError:   # table absent in this warehouse
+                break
+            dt = (time.perf_counter() - t0) * 1000
+            best = dt if best is None else min(best, dt)
+        out[name] = None if best is None else round(best, 2)
+    return out
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Integer surrogate keys + WITHOUT ROWID for warehouse facts")
+    ap.add_argument("--db", default="etl/data/dynasty.db")
+    ap.add_argument("--out", help="migrate a copy at this path instead of --db in place")
+    ap.add_argument("--bench", type=int, default=0, metavar="N",
+                    help="time the API queries N times before and after")
+    ap.add_argument("--json", help="also write the numbers here")
+    args = ap.parse_args()
+
+    src = Path(args.db)
+    if not src.exists():
+        print(f"No warehouse at {src}")
+        return 1
+    before_con = sqlite3.connect(src)
+    size_before = file_mb(before_con, src)
+    q_before = bench(before_con, args.bench) if args.bench else {}
+    before_con.close()
+
+    dst = src
+    if args.out:
+        dst = Path(args.out)
+        shutil.copyfile(src, dst)
+    con = sqlite3.connect(dst)
+    done = migrate(con)
+    for r in done:
+        print(f"  {r['table']:<24} {r['rows']:>10} rows -> {r['table']}_k (WITHOUT ROWID), "
+              f"{r['indexes']} index(es) carried over")
+    if not done:
+        print("Nothing to migrate (already keyed, or no fact tables).")
+    con.execute("VACUUM")
+    size_after = file_mb(con, dst)
+    q_after = bench(con, args.bench) if args.bench else {}
+    con.close()
+
+    print(f"file size: {size_before:.2f} MB -> {size_after:.2f} MB "
+          f"({100 * (size_after - size_before) / size_before:+.0f}%)")
+    for name in q_before:
+        b, a = q_before[name], q_after.get(name)
+        if b is None or a is None:
+            print(f"  {name:<24} n/a")
+        else:
+            print(f"  {name:<24} {b:>9.2f} ms -> {a:>9.2f} ms  x{b / a if a else float('inf'):.1f}")
+    if args.json:
+        Path(args.json).write_text(json.dumps({
+            "migrated": done, "size_mb": {"before": size_before, "after": size_after},
+            "query_ms": {"before": q_before, "after": q_after}}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())